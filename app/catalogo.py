@@ -0,0 +1,91 @@
+"""Categorias y dificultades de las preguntas: codigos enteros, nombres y alias.
+
+Las preguntas guardan el codigo (``categoria_id``/``dificultad_id``, con tablas de
+referencia ``categorias`` y ``dificultades``); la API sigue recibiendo y devolviendo
+nombres. Cualquier alias (sin distinguir mayusculas ni acentos, y sinonimos como
+``math`` o ``easy``) se traduce al mismo codigo con un diccionario armado una vez
+al importar el modulo.
+
+Los codigos son la posicion de cada nombre en ``CATEGORIAS``/``DIFICULTADES``: los
+valores nuevos se agregan al final, sin reordenar los existentes.
+"""
+import unicodedata
+from typing import Optional
+
+from sqlalchemy import case, literal_column
+
+
+def normalizar(texto) -> str:
+    """Texto sin acentos, en minusculas y sin espacios en los extremos."""
+    if texto is None:
+        return ""
+    nfkd = unicodedata.normalize("NFKD", str(texto))
+    return "".join(c for c in nfkd if not unicodedata.combining(c)).lower().strip()
+
+
+class Catalogo:
+    """Valores permitidos de una clasificacion, con su codigo y sus alias normalizados."""
+
+    def __init__(self, nombres, sinonimos: dict):
+        self.nombres = dict(enumerate(nombres, start=1))
+        self.codigos = {nombre: codigo for codigo, nombre in self.nombres.items()}
+        self._alias = {normalizar(nombre): codigo for codigo, nombre in self.nombres.items()}
+        self._alias.update({normalizar(alias): self.codigos[nombre] for alias, nombre in sinonimos.items()})
+
+    def codigo(self, valor) -> Optional[int]:
+        """Codigo de ``valor`` (nombre, alias o sinonimo); None si no es valido."""
+        return self._alias.get(normalizar(valor))
+
+    def nombre(self, codigo) -> Optional[str]:
+        return self.nombres.get(codigo)
+
+    def filas(self):
+        """Filas de la tabla de referencia (codigo y nombre)."""
+        return [{"id": codigo, "nombre": nombre} for codigo, nombre in self.nombres.items()]
+
+    def canonico(self, valor) -> Optional[str]:
+        """Nombre con el que se guarda y se responde ``valor``; None si no es valido."""
+        return self.nombres.get(self.codigo(valor))
+
+    def expresion(self, columna):
+        """Expresion SQL con el nombre correspondiente al codigo de ``columna``."""
+        return case(
+            {codigo: literal_column(f"'{nombre}'") for codigo, nombre in self.nombres.items()},
+            value=columna,
+        )
+
+
+CATEGORIAS = Catalogo(
+    ("tecnologia", "historia", "ciencia", "general", "matematica", "geografia", "arte"),
+    {
+        "technology": "tecnologia",
+        "tech": "tecnologia",
+        "history": "historia",
+        "science": "ciencia",
+        "math": "matematica",
+        "maths": "matematica",
+        "matematicas": "matematica",
+        "mathematics": "matematica",
+        "geography": "geografia",
+        "art": "arte",
+    },
+)
+
+DIFICULTADES = Catalogo(
+    ("facil", "medio", "dificil"),
+    {
+        "easy": "facil",
+        "medium": "medio",
+        "media": "medio",
+        "intermedio": "medio",
+        "hard": "dificil",
+    },
+)
+
+
+def codificar(datos: dict) -> dict:
+    """Valores de una pregunta para insertar en la tabla: nombres reemplazados por codigos."""
+    datos = dict(datos)
+    datos["categoria_id"] = CATEGORIAS.codigo(datos.pop("categoria"))
+    datos["dificultad_id"] = DIFICULTADES.codigo(datos.pop("dificultad"))
+    return datos
@@ -0,0 +1,85 @@
+"""Compresion de las respuestas (gzip y, opcionalmente, Brotli).
+
+``COMPRESSION=gzip`` usa el ``GZipMiddleware`` de Starlette. Con ``COMPRESSION=br``
+se responde con Brotli a los clientes que lo aceptan y con gzip al resto; requiere
+``pip install brotli`` (sin el paquete se usa solo gzip). En ambos casos solo se
+comprimen los cuerpos de al menos ``COMPRESSION_MIN_SIZE`` bytes: en los mas chicos
+el costo de comprimir supera lo que se ahorra en la red.
+"""
+import logging
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+
+from .config import settings
+
+try:
+    import brotli
+    from starlette.middleware.gzip import IdentityResponder
+except ImportError:  # dependencia opcional (y Starlette >= 0.46 para IdentityResponder)
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Niveles con buena relacion entre tamaño y CPU para JSON (los maximos son 9 y 11)
+NIVEL_GZIP = 6
+CALIDAD_BROTLI = 5
+
+
+def acepta(headers: Headers, codificacion: str) -> bool:
+    """Si ``Accept-Encoding`` incluye ``codificacion`` (sin ``q=0``)."""
+    for valor in headers.get("accept-encoding", "").split(","):
+        nombre, _, parametros = valor.partition(";")
+        if nombre.strip().lower() != codificacion:
+            continue
+        clave, _, q = parametros.partition("=")
+        try:
+            return clave.strip() != "q" or float(q) > 0
+        except ValueError:
+            return False
+    return False
+
+
+if brotli is not None:
+
+    class BrotliResponder(IdentityResponder):
+        content_encoding = "br"
+
+        def __init__(self, app, minimum_size: int, calidad: int = CALIDAD_BROTLI):
+            super().__init__(app, minimum_size)
+            self.calidad = calidad
+            self.compresor = None
+
+        async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+            if self.compresor is None:
+                self.compresor = brotli.Compressor(quality=self.calidad)
+            datos = self.compresor.process(body)
+            # en las respuestas por partes cada parte se envia completa (flush)
+            return datos + (self.compresor.flush() if more_body else self.compresor.finish())
+
+
+class BrotliMiddleware:
+    """Brotli para los clientes que lo aceptan; gzip (``GZipMiddleware``) para el resto."""
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=NIVEL_GZIP)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and acepta(Headers(scope=scope), "br"):
+            await BrotliResponder(self.app, self.minimum_size)(scope, receive, send)
+            return
+        await self.gzip(scope, receive, send)
+
+
+def agregar_compresion(app):
+    """Agrega a ``app`` el middleware de ``COMPRESSION`` (debe ser el ultimo, el mas externo)."""
+    if settings.compression == "none":
+        return
+    if settings.compression == "br":
+        if brotli is not None:
+            app.add_middleware(BrotliMiddleware, minimum_size=settings.compression_min_size)
+            return
+        logger.warning("COMPRESSION=br pero brotli no esta instalado: se usa gzip")
+    app.add_middleware(GZipMiddleware, minimum_size=settings.compression_min_size, compresslevel=NIVEL_GZIP)
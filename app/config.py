@@ -0,0 +1,109 @@
+from typing import Literal, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Configuracion de la app, leida de variables de entorno o de ``.env``."""
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+    database_url: str = "sqlite:///./quiz.db"
+    db_async: bool = False
+
+    # Pool de conexiones. Los requests esperan una conexión libre en el event loop (ver
+    # get_db), sin ocupar threads, y dejan 4 para los threads en segundo plano; el
+    # máximo por defecto (60) cubre los 40 threads del threadpool. max_overflow=-1 no
+    # tiene límite: una ráfaga puede abrir tantas conexiones como requests.
+    db_pool_size: int = 20
+    db_max_overflow: int = 40
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = -1
+    db_echo: bool = False
+    # Conexiones que se abren al iniciar (hasta db_pool_size; 0 = ninguna)
+    db_pool_prewarm: int = 4
+
+    # Inicio: caches en memoria que se cargan antes del primer request, y archivo del
+    # lock que serializa las migraciones entre workers (None = junto a la base SQLite)
+    startup_warmup: bool = True
+    startup_lock_file: Optional[str] = None
+
+    # Archivo de sesiones: base SQLite aparte (None = sin archivo) adjuntada a cada
+    # conexion, a la que python -m app.services.archive_service mueve las sesiones
+    # completadas hace mas de archive_days dias, de a archive_batch_size por transaccion
+    archive_database: Optional[str] = None
+    archive_days: int = 90
+    archive_batch_size: int = 500
+
+    log_level: str = "INFO"
+
+    # Metricas en /metrics; con slow_request_ms > 0 se loguea el SQL de los requests mas lentos
+    metrics_enabled: bool = True
+    slow_request_ms: float = 0
+
+    # Cache de preguntas por id (entradas y segundos de vida; 0 entradas = sin cache)
+    question_cache_size: int = 10000
+    question_cache_ttl: float = 300
+    # Vida maxima de la entrada al corregir respuestas (respuesta_correcta modificada
+    # desde otro proceso; 0 = se lee siempre de la base)
+    question_cache_grading_ttl: float = 5
+
+    # Estadisticas globales/por categoria materializadas (opcional): segundos entre
+    # recalculos (0 = desactivado, se calculan en cada request) y respuestas nuevas que
+    # adelantan el recalculo
+    stats_snapshot_interval: float = 0
+    stats_snapshot_answers: int = 500
+
+    # Ranking de sesiones en memoria: segundos entre recargas desde la base, para
+    # incorporar las sesiones completadas por otros procesos (0 = no se recarga)
+    leaderboard_ttl: float = 60
+
+    # Indice en memoria de preguntas activas (GET /questions/random): segundos entre
+    # recargas desde la base, para incorporar las preguntas creadas en otros procesos
+    # (0 = no se recarga)
+    question_index_ttl: float = 60
+
+    # Escritura diferida de POST /answers/: las respuestas se encolan y un thread las
+    # escribe por lotes (hasta answer_batch_size respuestas o answer_batch_ms ms por
+    # transaccion). La cola admite answer_queue_size respuestas; llena, se espera hasta
+    # answer_queue_timeout segundos y luego se responde 503
+    answer_write_behind: bool = False
+    answer_batch_size: int = 200
+    answer_batch_ms: float = 5
+    answer_queue_size: int = 10000
+    answer_queue_timeout: float = 1
+
+    # Serializador de los listados y estadisticas que responden filas directamente:
+    # "json" (libreria estandar) u "orjson" (mas rapido; requiere instalar orjson)
+    json_response: Literal["json", "orjson"] = "json"
+
+    # Compresion de las respuestas de al menos compression_min_size bytes: "gzip", "br"
+    # (Brotli para los clientes que lo aceptan, gzip para el resto; requiere instalar
+    # brotli) o "none" (por ejemplo, si ya comprime un proxy delante de la app)
+    compression: Literal["gzip", "br", "none"] = "gzip"
+    compression_min_size: int = 1024
+
+    # PRAGMAs de SQLite, aplicados a cada conexion nueva (None = no se modifica).
+    # auto_vacuum solo tiene efecto en bases nuevas: con INCREMENTAL el archivo de
+    # sesiones puede devolver al sistema el espacio que libera
+    sqlite_auto_vacuum: Optional[str] = "INCREMENTAL"
+    sqlite_journal_mode: Optional[str] = "WAL"
+    sqlite_synchronous: Optional[str] = "NORMAL"
+    sqlite_mmap_size: Optional[int] = 268435456
+    sqlite_cache_size: Optional[int] = -64000
+    sqlite_busy_timeout: Optional[int] = 5000
+
+    def sqlite_pragmas(self) -> dict:
+        pragmas = {
+            # antes que journal_mode, que escribe el encabezado de una base nueva
+            "auto_vacuum": self.sqlite_auto_vacuum,
+            "journal_mode": self.sqlite_journal_mode,
+            "synchronous": self.sqlite_synchronous,
+            "mmap_size": self.sqlite_mmap_size,
+            "cache_size": self.sqlite_cache_size,
+            "busy_timeout": self.sqlite_busy_timeout,
+        }
+        return {k: v for k, v in pragmas.items() if v is not None}
+
+
+settings = Settings()
@@ -1,17 +1,91 @@
-from sqlalchemy import create_engine
+import logging
+from contextlib import nullcontext
+
+import anyio
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
-DATABASE_URL = "sqlite:///./quiz.db"
+from .config import settings
+from .metrics import instrumentar
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = settings.database_url
+
+# Modo async (AsyncEngine/AsyncSession); se activa con DB_ASYNC=1
+ASYNC_MODE = settings.db_async
+
+# Base del archivo de sesiones, adjuntada a cada conexión con este nombre
+ESQUEMA_ARCHIVO = "archivo"
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
+def _es_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _es_memoria(url: str) -> bool:
+    u = make_url(url)
+    return _es_sqlite(url) and (u.database in (None, "", ":memory:") or u.query.get("mode") == "memory")
+
+
+def engine_kwargs(url: str) -> dict:
+    """Argumentos de ``create_engine`` según el backend y la configuración."""
+    kwargs = {"echo": settings.db_echo}
+    if _es_sqlite(url):
+        kwargs["connect_args"] = {"check_same_thread": False}
+    # las bases SQLite en memoria usan un pool de una sola conexión
+    if not _es_memoria(url):
+        kwargs.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    return kwargs
+
+
+def aplicar_pragmas(engine):
+    """Aplica los PRAGMAs de SQLite configurados a cada conexión nueva del engine."""
+    pragmas = settings.sqlite_pragmas()
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nombre, valor in pragmas.items():
+            cursor.execute(f"PRAGMA {nombre}={valor}")
+        cursor.close()
+
+
+def adjuntar_archivo(engine):
+    """Adjunta la base del archivo (``ATTACH DATABASE``) a cada conexión nueva del engine."""
+
+    @event.listens_for(engine, "connect")
+    def _adjuntar_archivo(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"ATTACH DATABASE ? AS {ESQUEMA_ARCHIVO}", (settings.archive_database,))
+        for nombre, valor in settings.sqlite_pragmas().items():
+            if nombre in ("journal_mode", "synchronous"):
+                cursor.execute(f"PRAGMA {ESQUEMA_ARCHIVO}.{nombre}={valor}")
+        cursor.close()
+
+
+# El archivo es otra base SQLite: con otros motores no se usa
+ARCHIVO_HABILITADO = bool(settings.archive_database) and _es_sqlite(DATABASE_URL)
+
+engine = create_engine(DATABASE_URL, **engine_kwargs(DATABASE_URL))
+
+if _es_sqlite(DATABASE_URL):
+    aplicar_pragmas(engine)
+if ARCHIVO_HABILITADO:
+    adjuntar_archivo(engine)
+instrumentar(engine)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -19,10 +93,109 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Conexiones que los requests dejan libres para los threads en segundo plano, que abren
+# su propia sesión (escritura diferida, estadisticas materializadas y recargas del
+# ranking y del indice de preguntas): cada uno usa a lo sumo una a la vez
+CONEXIONES_EN_SEGUNDO_PLANO = 4
+
+# Threads para cerrar sesiones (devolver la conexión al pool es rápido)
+HILOS_CIERRE = 4
+
+# Cupos de conexión para los requests y limite de los cierres (se crean en el primer
+# request). Cada request reserva su cupo en el event loop, antes de ocupar un thread:
+# con el pool acotado, un endpoint sincronico nunca bloquea un thread esperando una
+# conexión que solo se libera cuando otro request consigue un thread para serializar
+# su respuesta.
+_cupos = None
+_cierres = None
+
+
+def cupo_conexion():
+    """Cupo de conexión de un request (``async with``); sin límite si el pool no lo tiene."""
+    global _cupos
+    if settings.db_max_overflow < 0 or _es_memoria(DATABASE_URL):
+        return nullcontext()
+    if _cupos is None:
+        total = settings.db_pool_size + settings.db_max_overflow
+        _cupos = anyio.CapacityLimiter(max(1, total - CONEXIONES_EN_SEGUNDO_PLANO))
+    return _cupos
+
+
+async def cerrar_sesion(db):
+    """``db.close()`` (rollback y devolver la conexión) en un thread propio de los cierres.
+
+    Como FastAPI con el ``__exit__`` de las dependencias, no espera un thread libre del
+    threadpool, que podria estar ocupado por requests que esperan esta conexión.
+    """
+    global _cierres
+    if _cierres is None:
+        _cierres = anyio.CapacityLimiter(HILOS_CIERRE)
+    await anyio.to_thread.run_sync(db.close, limiter=_cierres)
+
+
 # Dependencia para inyectar sesión en routers
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with cupo_conexion():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await cerrar_sesion(db)
+
+
+def async_url(url: str) -> str:
+    """URL equivalente con driver async (sqlite -> aiosqlite, postgresql -> asyncpg)."""
+    for sync_prefix, async_prefix in (
+        ("sqlite://", "sqlite+aiosqlite://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if ASYNC_MODE:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(async_url(DATABASE_URL), **engine_kwargs(DATABASE_URL))
+
+    if _es_sqlite(DATABASE_URL):
+        aplicar_pragmas(async_engine.sync_engine)
+    if ARCHIVO_HABILITADO:
+        adjuntar_archivo(async_engine.sync_engine)
+    instrumentar(async_engine.sync_engine)
+
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+
+# Dependencia async (solo en modo async)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def log_configuracion():
+    """Registra la configuración efectiva de la base (URL sin contraseña, pool y PRAGMAs)."""
+    url = make_url(DATABASE_URL).render_as_string(hide_password=True)
+    logger.info("Base de datos: %s | async=%s | pool=%s", url, ASYNC_MODE, engine.pool.status())
+    if ARCHIVO_HABILITADO:
+        logger.info("Archivo de sesiones: %s", settings.archive_database)
+    elif settings.archive_database:
+        logger.warning("ARCHIVE_DATABASE requiere una base SQLite: el archivo de sesiones no se usa")
+
+    if _es_sqlite(DATABASE_URL):
+        with engine.connect() as conn:
+            efectivos = {
+                nombre: conn.exec_driver_sql(f"PRAGMA {nombre}").scalar()
+                for nombre in (
+                    "auto_vacuum", "journal_mode", "synchronous", "mmap_size", "cache_size", "busy_timeout"
+                )
+            }
+        logger.info("PRAGMAs SQLite: %s", efectivos)
@@ -1,22 +1,83 @@
+import logging
+import re
+
 from fastapi import FastAPI, Response
-from fastapi.responses import RedirectResponse
-from .database import Base, engine
-from .routers import questions, quiz_sessions, statistics, answer
+from fastapi.responses import PlainTextResponse, RedirectResponse
+from . import metrics
+from .compresion import agregar_compresion
+from .config import settings
+from .database import ASYNC_MODE
+from .routers import questions, quiz_sessions, statistics, answer, export
+from .startup import lifespan
 
-# Crear Tablas
-Base.metadata.create_all(bind=engine)
+# Logging de la app (uvicorn solo configura sus propios loggers)
+_logger = logging.getLogger("app")
+if not _logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(levelname)s:     [%(name)s] %(message)s"))
+    _logger.addHandler(_handler)
+_logger.setLevel(settings.log_level.upper())
 
+# Las tablas, migraciones y precargas se hacen al iniciar cada worker (app/startup.py)
 app = FastAPI(
     title="Quiz API",
     description="API para gestionar preguntas, sesiones y estadísticas de un quiz",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware, lento_ms=settings.slow_request_ms)
+
+    @app.get("/metrics", include_in_schema=False)
+    def exponer_metricas():
+        return PlainTextResponse(metrics.exponer(), media_type="text/plain; version=0.0.4")
+
+# Despues de las metricas: el middleware mas externo comprime lo que ya se midio
+agregar_compresion(app)
+
+
+def _ruta(route):
+    return re.sub(r":\w+}", "}", route.path), frozenset(route.methods or ())
+
+
+# Quita del router sincronico las rutas que el router async reemplaza
+def _sin_reemplazadas(router_sync, router_async):
+    reemplazadas = {_ruta(r) for r in router_async.routes}
+    router_sync.routes[:] = [r for r in router_sync.routes if _ruta(r) not in reemplazadas]
+
+
 # Registrar Routers
+# (los que reemplazan rutas van primero; lo que no cubren sigue en los sincronicos)
+if settings.answer_write_behind:
+    from .routers.answer_queue import router as answer_queue
+
+    _sin_reemplazadas(answer, answer_queue)
+    app.include_router(answer_queue, prefix="/answers", tags=["Answers"])
+
+if ASYNC_MODE:
+    from .routers import aio
+
+    for router_sync, router_async in (
+        (questions, aio.questions),
+        (quiz_sessions, aio.quiz_sessions),
+        (statistics, aio.statistics),
+        (answer, aio.answer),
+    ):
+        _sin_reemplazadas(router_sync, router_async)
+    if settings.answer_write_behind:
+        _sin_reemplazadas(aio.answer, answer_queue)
+
+    app.include_router(aio.questions, prefix="/questions", tags=["Questions"])
+    app.include_router(aio.quiz_sessions, prefix="/quiz-sessions", tags=["Quiz Sessions"])
+    app.include_router(aio.statistics, prefix="/statistics", tags=["Statistics"])
+    app.include_router(aio.answer, prefix="/answers", tags=["Answers"])
+
 app.include_router(questions, prefix="/questions", tags=["Questions"])
 app.include_router(quiz_sessions, prefix="/quiz-sessions", tags=["Quiz Sessions"])
 app.include_router(statistics, prefix="/statistics", tags=["Statistics"])
 app.include_router(answer, prefix="/answers", tags=["Answers"])
+app.include_router(export, prefix="/export", tags=["Export"])
 
 @app.get("/")
 def root():
@@ -0,0 +1,213 @@
+import bisect
+import logging
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Limites de los histogramas (segundos y cantidades)
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_SENTENCIAS = (1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+BUCKETS_FILAS = (1, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+
+class Histograma:
+    def __init__(self, nombre: str, ayuda: str, etiquetas, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.buckets = buckets
+        self._series = {}
+
+    def observar(self, valores, valor: float):
+        serie = self._series.get(valores)
+        if serie is None:
+            # conteo por bucket (+Inf al final), suma, cantidad
+            serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        serie[0][bisect.bisect_left(self.buckets, valor)] += 1
+        serie[1] += valor
+        serie[2] += 1
+
+    def exponer(self):
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} histogram"
+        for valores, (conteos, suma, cantidad) in sorted(self._series.items()):
+            base = ",".join(f'{k}="{_escapar(v)}"' for k, v in zip(self.etiquetas, valores))
+            acumulado = 0
+            for limite, conteo in zip((*self.buckets, "+Inf"), conteos):
+                acumulado += conteo
+                yield f'{self.nombre}_bucket{{{base},le="{limite}"}} {acumulado}'
+            yield f"{self.nombre}_sum{{{base}}} {suma}"
+            yield f"{self.nombre}_count{{{base}}} {cantidad}"
+
+
+class Contador:
+    def __init__(self, nombre: str, ayuda: str, etiquetas):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._series = {}
+
+    def incrementar(self, valores, cantidad: float = 1):
+        self._series[valores] = self._series.get(valores, 0) + cantidad
+
+    def exponer(self):
+        yield f"# HELP {self.nombre} {self.ayuda}"
+        yield f"# TYPE {self.nombre} counter"
+        for valores, total in sorted(self._series.items()):
+            base = ",".join(f'{k}="{_escapar(v)}"' for k, v in zip(self.etiquetas, valores))
+            yield f"{self.nombre}{{{base}}} {total}"
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Metricas expuestas en /metrics (se actualizan solo desde el middleware, en el event loop)
+requests_total = Contador(
+    "http_requests_total", "Requests atendidos", ("method", "route", "status")
+)
+request_duration = Histograma(
+    "http_request_duration_seconds", "Latencia de los requests", ("method", "route"), BUCKETS_SEGUNDOS
+)
+request_db_statements = Histograma(
+    "http_request_db_statements", "Sentencias SQL por request", ("method", "route"), BUCKETS_SENTENCIAS
+)
+request_db_rows = Histograma(
+    "http_request_db_rows", "Filas leidas de la base por request", ("method", "route"), BUCKETS_FILAS
+)
+request_db_duration = Histograma(
+    "http_request_db_seconds", "Tiempo en la base por request", ("method", "route"), BUCKETS_SEGUNDOS
+)
+METRICAS = [requests_total, request_duration, request_db_statements, request_db_rows, request_db_duration]
+
+
+def exponer() -> str:
+    return "\n".join(linea for m in METRICAS for linea in m.exponer()) + "\n"
+
+
+class Medicion:
+    """Lo que la base hizo durante un request (lo completan los eventos del engine)."""
+
+    def __init__(self, registrar_sql: bool):
+        self.sentencias = 0
+        self.filas = 0
+        self.segundos_db = 0.0
+        self.sql = [] if registrar_sql else None
+
+
+_medicion: ContextVar[Optional[Medicion]] = ContextVar("medicion", default=None)
+
+
+class _CursorContado:
+    """Envuelve el cursor DBAPI para contar las filas que se leen de el."""
+
+    def __init__(self, cursor, medicion: Medicion):
+        self._cursor = cursor
+        self._medicion = medicion
+
+    def fetchone(self):
+        fila = self._cursor.fetchone()
+        if fila is not None:
+            self._medicion.filas += 1
+        return fila
+
+    def fetchmany(self, *args):
+        filas = self._cursor.fetchmany(*args)
+        self._medicion.filas += len(filas)
+        return filas
+
+    def fetchall(self):
+        filas = self._cursor.fetchall()
+        self._medicion.filas += len(filas)
+        return filas
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+def instrumentar(engine):
+    """Registra en la medicion del request actual cada sentencia que ejecuta ``engine``."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        if _medicion.get() is not None:
+            conn.info["metricas_inicio"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        medicion = _medicion.get()
+        if medicion is None:
+            return
+        segundos = time.perf_counter() - conn.info["metricas_inicio"]
+        medicion.sentencias += 1
+        medicion.segundos_db += segundos
+        if medicion.sql is not None:
+            medicion.sql.append((segundos, statement))
+        # el resultado lee las filas de context.cursor despues de este evento
+        if context is not None and cursor.description is not None:
+            context.cursor = _CursorContado(cursor, medicion)
+
+
+def _ruta(scope) -> str:
+    plantilla = getattr(scope.get("route"), "path", None)
+    if plantilla is None:
+        # sin ruta (404): una sola serie, para no crear una por URL
+        return "sin_ruta"
+    # la plantilla no incluye el prefijo del router: se toma de la URL
+    segmentos = scope["path"].split("/")
+    prefijo = "/".join(segmentos[:len(segmentos) - plantilla.count("/")])
+    return prefijo + re.sub(r":\w+}", "}", plantilla)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: latencia, status y uso de la base de cada request HTTP.
+
+    Con ``lento_ms`` > 0 registra en el log las sentencias SQL de los requests que
+    superan ese tiempo.
+    """
+
+    def __init__(self, app, lento_ms: float = 0):
+        self.app = app
+        self.lento_ms = lento_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        medicion = Medicion(registrar_sql=self.lento_ms > 0)
+        token = _medicion.set(medicion)
+        status = [500]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            duracion = time.perf_counter() - inicio
+            _medicion.reset(token)
+            self._registrar(scope, status[0], duracion, medicion)
+
+    def _registrar(self, scope, status: int, duracion: float, medicion: Medicion):
+        etiquetas = (scope["method"], _ruta(scope))
+        requests_total.incrementar((*etiquetas, status))
+        request_duration.observar(etiquetas, duracion)
+        request_db_statements.observar(etiquetas, medicion.sentencias)
+        request_db_rows.observar(etiquetas, medicion.filas)
+        request_db_duration.observar(etiquetas, medicion.segundos_db)
+
+        if self.lento_ms > 0 and duracion * 1000 >= self.lento_ms:
+            logger.warning(
+                "Request lento: %s %s %.1f ms (%s sentencias, %.1f ms en la base)\n%s",
+                scope["method"], scope["path"], duracion * 1000, medicion.sentencias,
+                medicion.segundos_db * 1000,
+                "\n".join(f"  {s * 1000:8.2f} ms  {sql}" for s, sql in medicion.sql),
+            )
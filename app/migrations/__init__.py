@@ -0,0 +1,26 @@
+"""Migraciones versionadas del esquema, en orden de version.
+
+Cada modulo define ``VERSION``, ``DESCRIPCION`` y ``upgrade(conn)``. Las aplica
+``MigrationService.migrar`` sobre bases existentes; una base nueva se crea con
+``create_all`` y se marca directamente con la ultima version.
+
+Como en SQLite algunas sentencias DDL no quedan dentro de la transaccion,
+``upgrade`` debe poder ejecutarse de nuevo sin errores (``IF NOT EXISTS``, etc.).
+"""
+from . import (
+    m001_indices_respuesta_unica,
+    m002_contadores_sesion,
+    m003_ranking_sesiones,
+    m004_busqueda_preguntas,
+    m005_codigos_clasificacion,
+    m006_ids_sin_reutilizar,
+)
+
+MIGRACIONES = [
+    m001_indices_respuesta_unica,
+    m002_contadores_sesion,
+    m003_ranking_sesiones,
+    m004_busqueda_preguntas,
+    m005_codigos_clasificacion,
+    m006_ids_sin_reutilizar,
+]
@@ -0,0 +1,32 @@
+"""Utilidades de las migraciones que reconstruyen tablas (solo SQLite)."""
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
+
+logger = logging.getLogger(__name__)
+
+
+def reconstruir(conn, tabla, despues=()):
+    """Vuelve a crear ``tabla`` (un ``Table`` del modelo) copiando sus filas.
+
+    SQLite no permite cambiar restricciones con ``ALTER TABLE`` (AUTOINCREMENT,
+    NOT NULL): se crea la tabla nueva segun el modelo, se copian las columnas que
+    existen, se reemplaza la anterior y se vuelven a crear sus indices. Los triggers
+    de la tabla se pierden al borrarla: ``despues`` son las sentencias que los crean.
+    """
+    nueva = f"{tabla.name}_nueva"
+    existentes = {c["name"] for c in inspect(conn).get_columns(tabla.name)}
+    columnas = ", ".join(c.name for c in tabla.columns if c.name in existentes)
+
+    conn.execute(text(f"DROP TABLE IF EXISTS {nueva}"))
+    ddl = str(CreateTable(tabla).compile(dialect=conn.dialect))
+    conn.execute(text(ddl.replace(f"CREATE TABLE {tabla.name} ", f"CREATE TABLE {nueva} ", 1)))
+    conn.execute(text(f"INSERT INTO {nueva} ({columnas}) SELECT {columnas} FROM {tabla.name}"))
+    conn.execute(text(f"DROP TABLE {tabla.name}"))
+    conn.execute(text(f"ALTER TABLE {nueva} RENAME TO {tabla.name}"))
+    for indice in tabla.indexes:
+        indice.create(conn, checkfirst=True)
+    for sentencia in despues:
+        conn.execute(text(sentencia))
+    logger.info("Tabla %s reconstruida", tabla.name)
@@ -0,0 +1,33 @@
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+DESCRIPCION = "Indices compuestos y una respuesta por pregunta en cada sesión"
+
+
+def upgrade(conn):
+    # respuestas duplicadas (previas a la restricción): se conserva la primera
+    borradas = conn.execute(text(
+        "DELETE FROM answers WHERE id NOT IN ("
+        "SELECT MIN(id) FROM answers GROUP BY quiz_session_id, question_id)"
+    )).rowcount
+    if borradas:
+        logger.warning("Se eliminaron %s respuestas duplicadas", borradas)
+        # los contadores se regeneran desde 'answers' (StatsCounterService.inicializar)
+        conn.execute(text("DELETE FROM question_stats"))
+        conn.execute(text("DELETE FROM category_stats"))
+
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_answers_sesion_pregunta "
+        "ON answers (quiz_session_id, question_id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_answers_question_id ON answers (question_id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_questions_activa_categoria_dificultad "
+        "ON questions (is_active, categoria, dificultad)"
+    ))
@@ -0,0 +1,17 @@
+from sqlalchemy import text
+
+VERSION = 2
+DESCRIPCION = "Contadores de progreso de las sesiones calculados desde sus respuestas"
+
+
+def upgrade(conn):
+    # hasta ahora solo se calculaban al completar la sesión
+    conn.execute(text(
+        "UPDATE quiz_sessions SET "
+        "preguntas_respondidas = (SELECT COUNT(*) FROM answers "
+        "WHERE answers.quiz_session_id = quiz_sessions.id), "
+        "preguntas_correctas = (SELECT COUNT(*) FROM answers "
+        "WHERE answers.quiz_session_id = quiz_sessions.id AND answers.es_correcta), "
+        "puntuacion_total = 10 * (SELECT COUNT(*) FROM answers "
+        "WHERE answers.quiz_session_id = quiz_sessions.id AND answers.es_correcta)"
+    ))
@@ -0,0 +1,20 @@
+from sqlalchemy import text
+
+VERSION = 3
+DESCRIPCION = "Indice de ranking de sesiones y aciertos por sesion y categoria"
+
+
+def upgrade(conn):
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_quiz_sessions_ranking "
+        "ON quiz_sessions (estado, puntuacion_total DESC, tiempo_total_segundos)"
+    ))
+    # la tabla la crea create_all; se completa desde las respuestas existentes
+    conn.execute(text("DELETE FROM session_category_stats"))
+    conn.execute(text(
+        "INSERT INTO session_category_stats (quiz_session_id, categoria, respondidas, correctas) "
+        "SELECT answers.quiz_session_id, questions.categoria, COUNT(*), "
+        "SUM(CASE WHEN answers.es_correcta THEN 1 ELSE 0 END) "
+        "FROM answers JOIN questions ON questions.id = answers.question_id "
+        "GROUP BY answers.quiz_session_id, questions.categoria"
+    ))
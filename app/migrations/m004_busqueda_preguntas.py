@@ -0,0 +1,13 @@
+from sqlalchemy import text
+
+from ..models.question_fts import DDL_BUSQUEDA, SQL_RECONSTRUIR
+
+VERSION = 4
+DESCRIPCION = "Busqueda de texto completo de preguntas (FTS5)"
+
+
+def upgrade(conn):
+    if conn.dialect.name != "sqlite":
+        return
+    for sentencia in DDL_BUSQUEDA + SQL_RECONSTRUIR:
+        conn.execute(text(sentencia))
@@ -0,0 +1,117 @@
+import logging
+
+from sqlalchemy import inspect, text
+
+from ..catalogo import CATEGORIAS, DIFICULTADES
+from ..models.question import Question
+from ..models.question_fts import DDL_BUSQUEDA
+from ._tablas import reconstruir
+
+logger = logging.getLogger(__name__)
+
+VERSION = 5
+DESCRIPCION = "Codigos enteros de categoria y dificultad en las preguntas"
+
+# Valor asignado a los textos que no corresponden a ningun alias (cargados sin validar)
+POR_DEFECTO = {"categoria": "general", "dificultad": "medio"}
+
+
+def _columnas(conn):
+    return {c["name"] for c in inspect(conn).get_columns("questions")}
+
+
+def _admiten_null(conn):
+    return [
+        c["name"] for c in inspect(conn).get_columns("questions")
+        if c["name"] in ("categoria_id", "dificultad_id") and c["nullable"]
+    ]
+
+
+def upgrade(conn):
+    # las tablas de referencia las crea create_all con todas sus filas; se completan
+    # por si la base ya las tenia con menos valores
+    for tabla, catalogo in (("categorias", CATEGORIAS), ("dificultades", DIFICULTADES)):
+        existentes = set(conn.execute(text(f"SELECT id FROM {tabla}")).scalars())
+        faltantes = [f for f in catalogo.filas() if f["id"] not in existentes]
+        if faltantes:
+            conn.execute(text(f"INSERT INTO {tabla} (id, nombre) VALUES (:id, :nombre)"), faltantes)
+
+    renombradas = False
+    for columna, catalogo, referencia in (
+        ("categoria", CATEGORIAS, "categorias"),
+        ("dificultad", DIFICULTADES, "dificultades"),
+    ):
+        if columna not in _columnas(conn):
+            continue
+        if f"{columna}_id" not in _columnas(conn):
+            conn.execute(text(
+                f"ALTER TABLE questions ADD COLUMN {columna}_id SMALLINT REFERENCES {referencia} (id)"
+            ))
+
+        # un UPDATE por texto distinto: los alias y sinonimos se traducen en Python
+        cambios = []
+        for valor in conn.execute(text(f"SELECT DISTINCT {columna} FROM questions")).scalars():
+            codigo = catalogo.codigo(valor)
+            if codigo is None:
+                logger.warning("%s desconocida %r: se asigna %r", columna, valor, POR_DEFECTO[columna])
+                codigo = catalogo.codigos[POR_DEFECTO[columna]]
+            renombradas = renombradas or catalogo.nombre(codigo) != valor
+            cambios.append({"codigo": codigo, "valor": valor})
+        if cambios:
+            conn.execute(text(f"UPDATE questions SET {columna}_id = :codigo WHERE {columna} = :valor"), cambios)
+
+    conn.execute(text("DROP INDEX IF EXISTS ix_questions_activa_categoria_dificultad"))
+    for columna in ("categoria", "dificultad"):
+        if columna in _columnas(conn):
+            conn.execute(text(f"ALTER TABLE questions DROP COLUMN {columna}"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_questions_activa_categoria_dificultad "
+        "ON questions (is_active, categoria_id, dificultad_id)"
+    ))
+
+    # las preguntas sin categoria/dificultad (texto NULL) no se tradujeron arriba
+    for columna, catalogo in (("categoria", CATEGORIAS), ("dificultad", DIFICULTADES)):
+        sin_codigo = conn.execute(
+            text(f"UPDATE questions SET {columna}_id = :codigo WHERE {columna}_id IS NULL"),
+            {"codigo": catalogo.codigos[POR_DEFECTO[columna]]},
+        ).rowcount
+        if sin_codigo:
+            logger.warning("%s preguntas sin %s: se asigna %r", sin_codigo, columna, POR_DEFECTO[columna])
+            renombradas = True
+
+    # ADD COLUMN las agrego admitiendo NULL; el modelo (y create_all) las declara NOT
+    # NULL. SQLite no cambia esa restriccion con ALTER TABLE: se reconstruye la tabla
+    # (con los triggers del indice de texto completo, que se borran con ella)
+    admiten_null = _admiten_null(conn)
+    if admiten_null and conn.dialect.name == "sqlite":
+        reconstruir(conn, Question.__table__, DDL_BUSQUEDA)
+    else:
+        for columna in admiten_null:
+            conn.execute(text(f"ALTER TABLE questions ALTER COLUMN {columna} SET NOT NULL"))
+
+    if renombradas:
+        # habia alias guardados (por ejemplo "math" y "matematica"): los agregados por
+        # categoria se recalculan con los nombres canonicos; los por hora/dia se
+        # regeneran al iniciar (RollupService.inicializar)
+        logger.warning("Se unificaron alias de categoria/dificultad; se recalculan los agregados")
+        conn.execute(text("DELETE FROM category_stats"))
+        conn.execute(text(
+            "INSERT INTO category_stats (categoria, respondidas, incorrectas, tiempo_total_segundos) "
+            "SELECT categorias.nombre, COUNT(*), "
+            "SUM(CASE WHEN answers.es_correcta THEN 0 ELSE 1 END), "
+            "COALESCE(SUM(answers.tiempo_respuesta_segundos), 0) "
+            "FROM answers JOIN questions ON questions.id = answers.question_id "
+            "JOIN categorias ON categorias.id = questions.categoria_id "
+            "GROUP BY categorias.nombre"
+        ))
+        conn.execute(text("DELETE FROM session_category_stats"))
+        conn.execute(text(
+            "INSERT INTO session_category_stats (quiz_session_id, categoria, respondidas, correctas) "
+            "SELECT answers.quiz_session_id, categorias.nombre, COUNT(*), "
+            "SUM(CASE WHEN answers.es_correcta THEN 1 ELSE 0 END) "
+            "FROM answers JOIN questions ON questions.id = answers.question_id "
+            "JOIN categorias ON categorias.id = questions.categoria_id "
+            "GROUP BY answers.quiz_session_id, categorias.nombre"
+        ))
+        conn.execute(text("DELETE FROM answer_rollup_tiempos"))
+        conn.execute(text("DELETE FROM answer_rollups"))
@@ -0,0 +1,29 @@
+from sqlalchemy import text
+
+from ..models.answer import Answer
+from ..models.quiz_session import QuizSession
+from ._tablas import reconstruir
+
+VERSION = 6
+DESCRIPCION = "AUTOINCREMENT en quiz_sessions y answers (no se reutilizan ids de filas archivadas o borradas)"
+
+
+def _tiene_autoincrement(conn, tabla: str) -> bool:
+    sql = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :nombre"), {"nombre": tabla}
+    ).scalar()
+    return "AUTOINCREMENT" in (sql or "").upper()
+
+
+def upgrade(conn):
+    # sin AUTOINCREMENT SQLite asigna max(id) + 1: al archivar o borrar las sesiones
+    # de ids mas altos, las nuevas reciben esos ids. En otros motores los ids de una
+    # secuencia no se reutilizan.
+    if conn.dialect.name != "sqlite":
+        return
+
+    # SQLite no permite agregar AUTOINCREMENT con ALTER TABLE: se reconstruye la tabla
+    for tabla in (QuizSession.__table__, Answer.__table__):
+        if _tiene_autoincrement(conn, tabla.name):
+            continue
+        reconstruir(conn, tabla)
@@ -0,0 +1,17 @@
+# Se importan todos los modelos para que las relaciones entre ellos (por nombre) se resuelvan
+from .answer import Answer
+from .answer_rollup import AnswerRollup
+from .answer_rollup_tiempo import AnswerRollupTiempo
+from .categoria import Categoria
+from .category_stats import CategoryStats
+from .dificultad import Dificultad
+from .question import Question
+from . import question_fts  # noqa: F401  (indice FTS5 de las preguntas)
+from .question_stats import QuestionStats
+from .quiz_session import QuizSession
+from .session_category_stats import SessionCategoryStats
+
+__all__ = [
+    "Answer", "AnswerRollup", "AnswerRollupTiempo", "Categoria", "CategoryStats", "Dificultad", "Question",
+    "QuestionStats", "QuizSession", "SessionCategoryStats",
+]
@@ -1,9 +1,30 @@
-from sqlalchemy import Column, Integer, ForeignKey, Boolean, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, Boolean, DateTime, Index
+from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
 
+# Indice unico de (quiz_session_id, question_id)
+INDICE_RESPUESTA_UNICA = "ux_answers_sesion_pregunta"
+
+
+def es_respuesta_duplicada(error) -> bool:
+    """Si ``error`` (``IntegrityError``) es la violacion de ``INDICE_RESPUESTA_UNICA``.
+
+    PostgreSQL informa el nombre del indice; SQLite, las columnas.
+    """
+    mensaje = str(error.orig)
+    return INDICE_RESPUESTA_UNICA in mensaje or "answers.quiz_session_id, answers.question_id" in mensaje
+
+
 class Answer(Base):
     __tablename__ = "answers"
+    __table_args__ = (
+        # una respuesta por pregunta en cada sesión (también cubre las búsquedas por sesión)
+        Index(INDICE_RESPUESTA_UNICA, "quiz_session_id", "question_id", unique=True),
+        Index("ix_answers_question_id", "question_id"),
+        # los ids de respuestas archivadas o borradas no se reutilizan
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     quiz_session_id = Column(Integer, ForeignKey("quiz_sessions.id"))
@@ -14,3 +35,6 @@ class Answer(Base):
     tiempo_respuesta_segundos = Column(Integer, nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    session = relationship("QuizSession", back_populates="answers")
+    question = relationship("Question", back_populates="answers")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from ..database import Base
+
+class AnswerRollup(Base):
+    __tablename__ = "answer_rollups"
+
+    # periodo "hora" o "dia"; inicio = comienzo del intervalo (UTC, como created_at)
+    periodo = Column(String, primary_key=True)
+    inicio = Column(DateTime, primary_key=True)
+    categoria = Column(String, primary_key=True)
+    dificultad = Column(String, primary_key=True)
+
+    respondidas = Column(Integer, nullable=False, default=0)
+    correctas = Column(Integer, nullable=False, default=0)
+    con_tiempo = Column(Integer, nullable=False, default=0)
+    tiempo_total_segundos = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from ..database import Base
+
+class AnswerRollupTiempo(Base):
+    __tablename__ = "answer_rollup_tiempos"
+
+    # un bin del DDSketch de tiempos de respuesta de cada fila de answer_rollups
+    periodo = Column(String, primary_key=True)
+    inicio = Column(DateTime, primary_key=True)
+    categoria = Column(String, primary_key=True)
+    dificultad = Column(String, primary_key=True)
+    indice = Column(Integer, primary_key=True)
+
+    cantidad = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, SmallInteger, String, event
+from ..catalogo import CATEGORIAS
+from ..database import Base
+
+class Categoria(Base):
+    """Tabla de referencia de las categorias (codigos de ``app.catalogo.CATEGORIAS``)."""
+
+    __tablename__ = "categorias"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    nombre = Column(String, nullable=False, unique=True)
+
+
+@event.listens_for(Categoria.__table__, "after_create")
+def _cargar_categorias(target, connection, **kw):
+    connection.execute(target.insert(), CATEGORIAS.filas())
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from ..database import Base
+
+class CategoryStats(Base):
+    __tablename__ = "category_stats"
+
+    categoria = Column(String, primary_key=True)
+    respondidas = Column(Integer, nullable=False, default=0)
+    incorrectas = Column(Integer, nullable=False, default=0)
+    tiempo_total_segundos = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
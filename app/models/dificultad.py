@@ -0,0 +1,16 @@
+from sqlalchemy import Column, SmallInteger, String, event
+from ..catalogo import DIFICULTADES
+from ..database import Base
+
+class Dificultad(Base):
+    """Tabla de referencia de las dificultades (codigos de ``app.catalogo.DIFICULTADES``)."""
+
+    __tablename__ = "dificultades"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    nombre = Column(String, nullable=False, unique=True)
+
+
+@event.listens_for(Dificultad.__table__, "after_create")
+def _cargar_dificultades(target, connection, **kw):
+    connection.execute(target.insert(), DIFICULTADES.filas())
@@ -1,17 +1,76 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, ForeignKey, Integer, SmallInteger, String, Boolean, DateTime, Text, Index
+from sqlalchemy.ext.hybrid import Comparator, hybrid_property
+from sqlalchemy.orm import relationship
 from sqlalchemy.types import JSON
 from datetime import datetime
+from ..catalogo import CATEGORIAS, DIFICULTADES
 from ..database import Base
 
+
+class _Clasificacion(Comparator):
+    """``Question.categoria``/``Question.dificultad`` en consultas.
+
+    Se seleccionan (y agrupan) como el nombre, pero las comparaciones se traducen al
+    codigo de cualquier alias y filtran sobre la columna entera indexada.
+    """
+
+    def __init__(self, columna, catalogo):
+        super().__init__(catalogo.expresion(columna))
+        self.columna = columna
+        self.catalogo = catalogo
+
+    def __eq__(self, otro):
+        return self.columna == self.catalogo.codigo(otro)
+
+    def __ne__(self, otro):
+        return self.columna != self.catalogo.codigo(otro)
+
+    def in_(self, otros):
+        return self.columna.in_([self.catalogo.codigo(o) for o in otros])
+
+
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_activa_categoria_dificultad", "is_active", "categoria_id", "dificultad_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     pregunta = Column(String, nullable=False)
     opciones = Column(JSON, nullable=False)
     respuesta_correcta = Column(Integer, nullable=False)
     explicacion = Column(Text, nullable=True)
-    categoria = Column(String, nullable=False)
-    dificultad = Column(String, nullable=False)
+    categoria_id = Column(SmallInteger, ForeignKey("categorias.id"), nullable=False)
+    dificultad_id = Column(SmallInteger, ForeignKey("dificultades.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
+
+    # las preguntas se desactivan en lugar de borrarse: sus respuestas (historial) no se tocan
+    answers = relationship("Answer", back_populates="question", passive_deletes="all")
+
+    # Nombres de la categoria y la dificultad (se asignan con cualquier alias)
+    @hybrid_property
+    def categoria(self):
+        return CATEGORIAS.nombre(self.categoria_id)
+
+    @categoria.inplace.setter
+    def _categoria_setter(self, valor):
+        self.categoria_id = CATEGORIAS.codigo(valor)
+
+    @categoria.inplace.comparator
+    @classmethod
+    def _categoria_comparator(cls):
+        return _Clasificacion(cls.categoria_id, CATEGORIAS)
+
+    @hybrid_property
+    def dificultad(self):
+        return DIFICULTADES.nombre(self.dificultad_id)
+
+    @dificultad.inplace.setter
+    def _dificultad_setter(self, valor):
+        self.dificultad_id = DIFICULTADES.codigo(valor)
+
+    @dificultad.inplace.comparator
+    @classmethod
+    def _dificultad_comparator(cls):
+        return _Clasificacion(cls.dificultad_id, DIFICULTADES)
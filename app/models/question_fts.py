@@ -0,0 +1,36 @@
+from sqlalchemy import DDL, event
+from .question import Question
+
+# Indice de texto completo (FTS5) de las preguntas: pregunta, explicacion y opciones.
+# "unicode61 remove_diacritics 2" ignora mayusculas y acentos, como normalizar();
+# los triggers lo mantienen sincronizado con "questions" (rowid = id de la pregunta).
+_OPCIONES = "(SELECT group_concat(value, ' ') FROM json_each({fila}.opciones))"
+
+DDL_BUSQUEDA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5("
+    "pregunta, explicacion, opciones, tokenize = 'unicode61 remove_diacritics 2')",
+
+    "CREATE TRIGGER IF NOT EXISTS questions_fts_insert AFTER INSERT ON questions BEGIN "
+    "INSERT INTO questions_fts (rowid, pregunta, explicacion, opciones) "
+    f"VALUES (new.id, new.pregunta, new.explicacion, {_OPCIONES.format(fila='new')}); END",
+
+    "CREATE TRIGGER IF NOT EXISTS questions_fts_update "
+    "AFTER UPDATE OF pregunta, explicacion, opciones ON questions BEGIN "
+    "DELETE FROM questions_fts WHERE rowid = old.id; "
+    "INSERT INTO questions_fts (rowid, pregunta, explicacion, opciones) "
+    f"VALUES (new.id, new.pregunta, new.explicacion, {_OPCIONES.format(fila='new')}); END",
+
+    "CREATE TRIGGER IF NOT EXISTS questions_fts_delete AFTER DELETE ON questions BEGIN "
+    "DELETE FROM questions_fts WHERE rowid = old.id; END",
+]
+
+# Carga inicial (bases con preguntas anteriores al indice)
+SQL_RECONSTRUIR = [
+    "DELETE FROM questions_fts",
+    "INSERT INTO questions_fts (rowid, pregunta, explicacion, opciones) "
+    f"SELECT id, pregunta, explicacion, {_OPCIONES.format(fila='questions')} FROM questions",
+]
+
+# Bases nuevas: se crea junto con la tabla (solo SQLite)
+for _sentencia in DDL_BUSQUEDA:
+    event.listen(Question.__table__, "after_create", DDL(_sentencia).execute_if(dialect="sqlite"))
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from datetime import datetime
+from ..database import Base
+
+class QuestionStats(Base):
+    __tablename__ = "question_stats"
+
+    question_id = Column(Integer, ForeignKey("questions.id"), primary_key=True)
+    respondidas = Column(Integer, nullable=False, default=0)
+    incorrectas = Column(Integer, nullable=False, default=0)
+    tiempo_total_segundos = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,9 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index, desc
+from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
 
 class QuizSession(Base):
     __tablename__ = "quiz_sessions"
+    __table_args__ = (
+        # ranking de sesiones completadas: puntuación (mayor primero), tiempo y id
+        Index("ix_quiz_sessions_ranking", "estado", desc("puntuacion_total"), "tiempo_total_segundos"),
+        # los ids de sesiones archivadas o borradas no se reutilizan
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     usuario_nombre = Column(String, nullable=True)
@@ -15,3 +22,8 @@ class QuizSession(Base):
     estado = Column(String, default="en_progreso")
     tiempo_total_segundos = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    # las respuestas pertenecen a la sesión: se borran con ella
+    answers = relationship(
+        "Answer", back_populates="session", cascade="all, delete-orphan", order_by="Answer.id"
+    )
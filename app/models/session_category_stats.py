@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from ..database import Base
+
+class SessionCategoryStats(Base):
+    __tablename__ = "session_category_stats"
+    __table_args__ = (
+        # ranking por categoria (GET /statistics/leaderboard?categoria=)
+        Index("ix_session_category_stats_ranking", "categoria", "correctas"),
+    )
+
+    quiz_session_id = Column(Integer, ForeignKey("quiz_sessions.id"), primary_key=True)
+    categoria = Column(String, primary_key=True)
+    respondidas = Column(Integer, nullable=False, default=0)
+    correctas = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,55 @@
+import base64
+import json
+
+from fastapi import HTTPException
+
+# Tamaño maximo de pagina para los listados por cursor
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(last_id: int, filtros: dict, **posicion) -> str:
+    """Cursor opaco: ultimo id entregado mas los filtros con los que se pidio la pagina.
+
+    ``posicion`` agrega otras claves del orden (por ejemplo el rank de una busqueda).
+    """
+    raw = json.dumps({"id": last_id, "f": filtros, **posicion}, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def leer_cursor(cursor: str, filtros: dict) -> dict:
+    """Contenido del cursor (``id`` y las claves de ``posicion``), validado contra los filtros."""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        data["id"] = int(data["id"])
+        cursor_filtros = data.pop("f")
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    if cursor_filtros != filtros:
+        raise HTTPException(
+            status_code=400,
+            detail="El cursor no corresponde a los filtros de la consulta"
+        )
+    return data
+
+
+def decode_cursor(cursor: str, filtros: dict) -> int:
+    return leer_cursor(cursor, filtros)["id"]
+
+
+def paginar(query, id_column, limit: int, cursor=None, filtros=None):
+    """Pagina por keyset (``id > ultimo_id ORDER BY id``): cada pagina cuesta lo mismo."""
+    filtros = filtros or {}
+
+    if cursor:
+        query = query.filter(id_column > decode_cursor(cursor, filtros))
+
+    filas = query.order_by(id_column).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        next_cursor = encode_cursor(filas[-1].id, filtros)
+
+    return {"items": filas, "next_cursor": next_cursor}
@@ -0,0 +1,115 @@
+import json
+import logging
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy import Table
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _por_defecto(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"{type(valor).__name__} no es serializable a JSON")
+
+
+class JSONRespuesta(JSONResponse):
+    """JSON con el ``json`` de la libreria estandar; admite fechas (ISO 8601)."""
+
+    def render(self, content) -> bytes:
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_por_defecto
+        ).encode("utf-8")
+
+
+class ORJSONRespuesta(JSONResponse):
+    """JSON con ``orjson`` (requiere ``pip install orjson``)."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def clase_respuesta():
+    """Clase de respuesta JSON segun ``JSON_RESPONSE`` (``orjson`` si esta instalado)."""
+    if settings.json_response == "orjson":
+        if orjson is not None:
+            return ORJSONRespuesta
+        logger.warning("JSON_RESPONSE=orjson pero orjson no esta instalado: se usa json")
+    return JSONRespuesta
+
+
+RespuestaJSON = clase_respuesta()
+
+
+# ?fields= de los listados
+FIELDS = Query(
+    None,
+    description="Campos a devolver, separados por coma (el id se incluye siempre). Por defecto, todos",
+)
+
+
+def campos_pedidos(fields: Optional[str], schema, anidados: Optional[dict] = None):
+    """Interpreta ``?fields=``: campos de ``schema`` a devolver, en el orden del schema.
+
+    Sin ``fields`` son todos. ``id`` se agrega siempre (lo usan los cursores de las
+    paginas). ``anidados`` va del nombre de un objeto embebido a su schema: sus campos
+    se piden con el prefijo ``nombre.`` (``question.pregunta``) y se devuelven en un
+    dict ``{nombre: campos}`` (todos los del schema si no se pidio ninguno).
+    """
+    anidados = anidados or {}
+    pedidos = {nombre: set() for nombre in (None, *anidados)}
+    for valor in (fields or "").split(","):
+        prefijo, _, campo = valor.strip().rpartition(".")
+        if campo:
+            pedidos.setdefault(prefijo or None, set()).add(campo)
+
+    desconocidos = [
+        f"{nombre}.{campo}" if nombre else campo
+        for nombre, campos in pedidos.items()
+        for campo in sorted(campos)
+        if nombre not in (None, *anidados) or campo not in (anidados.get(nombre) or schema).model_fields
+    ]
+    if desconocidos:
+        posibles = [*schema.model_fields, *(f"{n}.{c}" for n, s in anidados.items() for c in s.model_fields)]
+        raise HTTPException(
+            400,
+            f"fields inválido: {', '.join(desconocidos)}. Valores posibles: {', '.join(posibles)}"
+        )
+
+    def elegir(schema_, campos):
+        if not campos:
+            return list(schema_.model_fields)
+        return [c for c in schema_.model_fields if c in campos or c == "id"]
+
+    principales = elegir(schema, pedidos.pop(None))
+    if not anidados:
+        return principales
+    return principales, {nombre: elegir(anidados[nombre], campos) for nombre, campos in pedidos.items()}
+
+
+def columnas(model, schema, campos=None):
+    """Columnas de ``model`` en el orden de los campos de ``schema`` (o solo las de ``campos``).
+
+    Los listados seleccionan solo estas columnas y responden las filas como dicts con
+    ``RespuestaJSON``, sin crear objetos ORM ni validarlos con el schema (que sigue
+    declarado como ``response_model`` para la documentacion). ``model`` tambien
+    puede ser una ``Table`` (por ejemplo, una tabla del archivo de sesiones).
+    """
+    campos = campos or schema.model_fields
+    if isinstance(model, Table):
+        return [model.c[campo] for campo in campos]
+    return [getattr(model, campo) for campo in campos]
+
+
+def como_dicts(filas):
+    return [dict(fila._mapping) for fila in filas]
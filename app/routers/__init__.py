@@ -2,6 +2,7 @@ from .questions import router as questions
 from .quiz_sessions import router as quiz_sessions
 from .statistics import router as statistics
 from .answer import router as answer
+from .export import router as export
 
-__all__ = ["questions", "quiz_sessions", "statistics", "answer"]
+__all__ = ["questions", "quiz_sessions", "statistics", "answer", "export"]
 
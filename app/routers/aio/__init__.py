@@ -0,0 +1,14 @@
+"""Routers async (modo ``DB_ASYNC``) para los endpoints del flujo del quiz.
+
+Usan ``AsyncSession``; los endpoints que no estan aqui (importacion, exportacion,
+altas masivas, paginas por cursor, estadisticas materializadas) siguen atendidos
+por los routers sincronicos.
+Los parametros de ruta usan el convertidor ``:int`` para no capturar rutas fijas
+como ``/page`` o ``/batch`` de esos routers.
+"""
+from .questions import router as questions
+from .quiz_sessions import router as quiz_sessions
+from .statistics import router as statistics
+from .answer import router as answer
+
+__all__ = ["questions", "quiz_sessions", "statistics", "answer"]
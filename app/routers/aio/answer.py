@@ -0,0 +1,47 @@
+from typing import Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database import get_async_db
+from ...models.answer import Answer
+from ...responses import RespuestaJSON
+from ...schemas.answer import AnswerCreate, AnswerResponse, AnswerWithQuestion
+from ...services import archivo
+from ..answer import registrar_respuesta as _registrar_respuesta
+from ..answer import actualizar_respuesta as _actualizar_respuesta
+from ..answer import FIELDS_RESPUESTAS, campos_respuestas, consulta_respuestas, incluye_pregunta, respuestas_como_dicts
+
+router = APIRouter()
+
+
+# Escrituras: misma validación y contadores que el router sincronico
+@router.post("/", response_model=AnswerResponse)
+async def registrar_respuesta(payload: AnswerCreate, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda s: _registrar_respuesta(payload, s))
+
+
+@router.get("/session/{session_id:int}", response_model=Union[list[AnswerWithQuestion], list[AnswerResponse]])
+async def respuestas_por_sesion(
+    session_id: int,
+    include: Optional[str] = Query(None, description="'question' embebe la pregunta de cada respuesta"),
+    fields: Optional[str] = Query(None, description=FIELDS_RESPUESTAS),
+    db: AsyncSession = Depends(get_async_db)
+):
+    con_pregunta = incluye_pregunta(include)
+    campos = campos_respuestas(fields)
+    filas = (await db.execute(consulta_respuestas(session_id, con_pregunta, False, *campos))).all()
+    if not filas and archivo.HABILITADO:
+        filas = (await db.execute(consulta_respuestas(session_id, con_pregunta, True, *campos))).all()
+    return RespuestaJSON(respuestas_como_dicts(filas, con_pregunta, *campos))
+
+
+@router.get("/{answer_id:int}", response_model=AnswerResponse)
+async def obtener_respuesta(answer_id: int, db: AsyncSession = Depends(get_async_db)):
+    r = await db.get(Answer, answer_id) or await db.run_sync(archivo.respuesta, answer_id)
+    if not r:
+        raise HTTPException(404, "Respuesta no encontrada")
+    return r
+
+
+@router.put("/{answer_id:int}", response_model=AnswerResponse)
+async def actualizar_respuesta(answer_id: int, payload: AnswerCreate, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda s: _actualizar_respuesta(answer_id, payload, s))
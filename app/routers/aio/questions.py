@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.database import get_async_db
+from app.responses import FIELDS, RespuestaJSON, campos_pedidos, como_dicts
+from app.routers.questions import consulta_preguntas, random_questions as _random_questions
+from app.services.question_cache import question_cache
+from app.schemas.question import QuestionResponse
+
+router = APIRouter()
+
+# Listar las Preguntas
+@router.get("/", response_model=List[QuestionResponse])
+async def list_questions(
+    categoria: Optional[str] = None,
+    dificultad: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 50,
+    fields: Optional[str] = FIELDS,
+    db: AsyncSession = Depends(get_async_db)
+):
+    campos = campos_pedidos(fields, QuestionResponse)
+    filas = await db.execute(consulta_preguntas(categoria, dificultad, campos, skip, limit))
+    return RespuestaJSON(como_dicts(filas))
+
+# Preguntas Aleatorias (usa el indice en memoria del router sincronico)
+@router.get("/random", response_model=List[QuestionResponse])
+async def random_questions(
+    limit: int = 10,
+    categoria: Optional[str] = None,
+    dificultad: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await db.run_sync(
+        lambda s: _random_questions(limit, categoria, dificultad, s)
+    )
+
+# Obtener una Pregunta por ID
+@router.get("/{question_id:int}", response_model=QuestionResponse)
+async def get_question(
+    question_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    q = await db.run_sync(question_cache.obtener, question_id)
+    if not q:
+        raise HTTPException(status_code=404, detail="Pregunta no encontrada")
+    return q
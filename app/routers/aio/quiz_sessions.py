@@ -0,0 +1,68 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database import get_async_db
+from ...models.quiz_session import QuizSession
+from ...responses import FIELDS, RespuestaJSON, campos_pedidos, columnas, como_dicts
+from ...schemas.quiz_session import QuizSessionCreate, QuizSessionResponse
+from ...services import archivo
+from ...services.quiz_service_async import AsyncQuizService
+from ...services.stats_snapshot_service import stats_snapshots
+
+router = APIRouter()
+
+
+@router.post("/", response_model=QuizSessionResponse)
+async def iniciar_sesion(payload: QuizSessionCreate, db: AsyncSession = Depends(get_async_db)):
+    sesion = QuizSession(
+        usuario_nombre=payload.usuario_nombre,
+        estado="en_progreso"
+    )
+    db.add(sesion)
+    await db.commit()
+    await db.refresh(sesion)
+    return sesion
+
+
+@router.get("/", response_model=list[QuizSessionResponse])
+async def listar_sesiones(
+    skip: int = 0,
+    limit: int = 50,
+    fields: Optional[str] = FIELDS,
+    db: AsyncSession = Depends(get_async_db)
+):
+    campos = campos_pedidos(fields, QuizSessionResponse)
+    filas = await db.execute(select(*columnas(QuizSession, QuizSessionResponse, campos)).offset(skip).limit(limit))
+    return RespuestaJSON(como_dicts(filas))
+
+
+@router.get("/{session_id:int}", response_model=QuizSessionResponse)
+async def obtener_sesion(session_id: int, db: AsyncSession = Depends(get_async_db)):
+    sesion = await db.get(QuizSession, session_id) or await db.run_sync(archivo.sesion, session_id)
+    if not sesion:
+        raise HTTPException(404, "Sesión no encontrada")
+    return sesion
+
+
+@router.put("/{session_id:int}/complete", response_model=QuizSessionResponse)
+async def completar_sesion(session_id: int, db: AsyncSession = Depends(get_async_db)):
+    sesion = await db.get(QuizSession, session_id)
+    if not sesion:
+        raise HTTPException(404, "Sesión no encontrada")
+
+    if sesion.estado != "en_progreso":
+        raise HTTPException(400, "La sesión ya fue completada o abandonada")
+
+    completada = await AsyncQuizService.finalizar_sesion(db, sesion)
+    if completada is None:
+        raise HTTPException(400, "La sesión ya fue completada o abandonada")
+    return completada
+
+
+@router.delete("/{session_id:int}")
+async def eliminar_sesion(session_id: int, db: AsyncSession = Depends(get_async_db)):
+    if not await AsyncQuizService.eliminar_sesion(db, session_id):
+        raise HTTPException(404, "Sesión no encontrada")
+    stats_snapshots.notificar_respuestas()
+    return {"message": "Sesión eliminada correctamente"}
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database import get_async_db
+from ...responses import RespuestaJSON
+from ...services.quiz_service_async import AsyncQuizService
+from ..statistics import ARCHIVO
+
+router = APIRouter()
+
+
+@router.get("/session/{session_id:int}")
+async def estadisticas_sesion(session_id: int, db: AsyncSession = Depends(get_async_db)):
+    result = await AsyncQuizService.estadisticas_sesion(db, session_id)
+    if not result:
+        raise HTTPException(404, "Sesión no encontrada")
+    return RespuestaJSON(result)
+
+
+@router.get("/questions/difficult")
+async def preguntas_dificiles(archivo: bool = ARCHIVO, db: AsyncSession = Depends(get_async_db)):
+    return RespuestaJSON(await AsyncQuizService.preguntas_dificiles(db, archivo))
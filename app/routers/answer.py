@@ -1,13 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from ..config import settings
 from ..database import get_db
-from ..models.answer import Answer
+from ..pagination import MAX_PAGE_SIZE, paginar
+from ..responses import FIELDS, RespuestaJSON, campos_pedidos, columnas, como_dicts
+from ..models.answer import Answer, es_respuesta_duplicada
 from ..models.question import Question
 from ..models.quiz_session import QuizSession
-from ..schemas.answer import AnswerCreate, AnswerResponse
+from ..schemas.answer import (
+    AnswerCreate,
+    AnswerResponse,
+    AnswerWithQuestion,
+    AnswerPage,
+    AnswerBatchItemResult,
+    AnswerBatchResponse,
+)
+from ..schemas.question import QuestionResponse
+from ..services import archivo
+from ..services.question_cache import question_cache
+from ..services.rollup_service import RollupService
+from ..services.session_counter_service import SessionCounterService
+from ..services.stats_counter_service import StatsCounterService
+from ..services.stats_snapshot_service import stats_snapshots
 
 router = APIRouter()
 
+# Máximo de respuestas por envío en /answers/batch
+MAX_BATCH_SIZE = 1000
+
+# Relaciones que se pueden embeber con ?include= en los listados
+INCLUDES = {"question"}
+
+FIELDS_RESPUESTAS = (
+    "Campos a devolver, separados por coma (el id se incluye siempre); los de la pregunta "
+    "embebida con el prefijo 'question.' (question.pregunta). Por defecto, todos"
+)
+
 
 @router.post("/", response_model=AnswerResponse)
 def registrar_respuesta(payload: AnswerCreate, db: Session = Depends(get_db)):
@@ -17,19 +49,10 @@ def registrar_respuesta(payload: AnswerCreate, db: Session = Depends(get_db)):
         raise HTTPException(404, "Sesión no existe")
 
     # validar pregunta
-    pregunta = db.query(Question).filter(Question.id == payload.question_id).first()
+    pregunta = question_cache.obtener(db, payload.question_id, settings.question_cache_grading_ttl)
     if not pregunta:
         raise HTTPException(404, "Pregunta no existe")
 
-    # evitar responder dos veces la misma pregunta
-    existente = db.query(Answer).filter(
-        Answer.quiz_session_id == payload.quiz_session_id,
-        Answer.question_id == payload.question_id
-    ).first()
-
-    if existente:
-        raise HTTPException(400, "La pregunta ya fue respondida en esta sesión")
-
     # validar rango
     if payload.respuesta_seleccionada < 0 or payload.respuesta_seleccionada >= len(pregunta.opciones):
         raise HTTPException(400, "La respuesta está fuera de rango")
@@ -44,21 +67,199 @@ def registrar_respuesta(payload: AnswerCreate, db: Session = Depends(get_db)):
         es_correcta=es_correcta
     )
 
-    db.add(respuesta)
-    db.commit()
+    # una respuesta por pregunta y sesión: lo garantiza el índice único de la base
+    try:
+        db.add(respuesta)
+
+        # contadores de estadisticas y de la sesión (misma transacción)
+        StatsCounterService.registrar_respuesta(db, respuesta, pregunta.categoria)
+        SessionCounterService.registrar_respuesta(db, respuesta, pregunta.categoria)
+        RollupService.registrar_respuesta(db, respuesta, pregunta)
+
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if not es_respuesta_duplicada(e):
+            raise
+        raise HTTPException(400, "La pregunta ya fue respondida en esta sesión")
     db.refresh(respuesta)
+    stats_snapshots.notificar_respuestas()
 
     return respuesta
 
 
-@router.get("/session/{session_id}", response_model=list[AnswerResponse])
-def respuestas_por_sesion(session_id: int, db: Session = Depends(get_db)):
-    return db.query(Answer).filter(Answer.quiz_session_id == session_id).all()
+@router.post("/batch", response_model=AnswerBatchResponse)
+def registrar_respuestas_batch(payload: List[AnswerCreate], db: Session = Depends(get_db)):
+    if not payload:
+        raise HTTPException(400, "No se enviaron respuestas")
+    if len(payload) > MAX_BATCH_SIZE:
+        raise HTTPException(400, f"Se admiten como máximo {MAX_BATCH_SIZE} respuestas por envío")
+
+    session_id = payload[0].quiz_session_id
+
+    # validar sesión
+    if not db.query(QuizSession.id).filter(QuizSession.id == session_id).first():
+        raise HTTPException(404, "Sesión no existe")
+
+    # precargar preguntas y respuestas ya registradas (una consulta cada una)
+    question_ids = {p.question_id for p in payload}
+    preguntas = question_cache.obtener_varios(db, question_ids, settings.question_cache_grading_ttl)
+    respondidas = {
+        qid
+        for (qid,) in db.query(Answer.question_id).filter(
+            Answer.quiz_session_id == session_id,
+            Answer.question_id.in_(question_ids)
+        )
+    }
+
+    # validar en memoria, con las mismas reglas que registrar_respuesta
+    resultados: List[Optional[AnswerBatchItemResult]] = [None] * len(payload)
+    nuevas = []
+    ahora = datetime.utcnow()
+
+    for i, item in enumerate(payload):
+        pregunta = preguntas.get(item.question_id)
+
+        if item.quiz_session_id != session_id:
+            error = "La respuesta pertenece a otra sesión"
+        elif not pregunta:
+            error = "Pregunta no existe"
+        elif item.question_id in respondidas:
+            error = "La pregunta ya fue respondida en esta sesión"
+        elif item.respuesta_seleccionada < 0 or item.respuesta_seleccionada >= len(pregunta.opciones):
+            error = "La respuesta está fuera de rango"
+        else:
+            error = None
+
+        if error:
+            resultados[i] = AnswerBatchItemResult(index=i, ok=False, error=error)
+            continue
+
+        respondidas.add(item.question_id)
+        respuesta = Answer(
+            quiz_session_id=session_id,
+            question_id=item.question_id,
+            respuesta_seleccionada=item.respuesta_seleccionada,
+            tiempo_respuesta_segundos=item.tiempo_respuesta_segundos,
+            es_correcta=item.respuesta_seleccionada == pregunta.respuesta_correcta,
+            created_at=ahora,
+        )
+        nuevas.append((i, respuesta, pregunta.categoria))
+
+    # insertar todo en una sola transacción
+    if nuevas:
+        try:
+            db.add_all([r for _, r, _ in nuevas])
+            db.flush()
+        except IntegrityError as e:
+            # otra petición registró alguna de estas preguntas entre la validación y el insert
+            db.rollback()
+            if not es_respuesta_duplicada(e):
+                raise
+            raise HTTPException(400, "Alguna pregunta ya fue respondida en esta sesión")
+
+        StatsCounterService.registrar_respuestas(db, [(r, cat) for _, r, cat in nuevas])
+        SessionCounterService.registrar_respuestas(db, [(r, cat) for _, r, cat in nuevas])
+        RollupService.registrar_respuestas(db, [(r, preguntas[r.question_id]) for _, r, _ in nuevas])
+
+        for i, r, _ in nuevas:
+            resultados[i] = AnswerBatchItemResult(
+                index=i, ok=True, respuesta=AnswerResponse.model_validate(r)
+            )
+        db.commit()
+        stats_snapshots.notificar_respuestas(len(nuevas))
+
+    return AnswerBatchResponse(
+        quiz_session_id=session_id,
+        registradas=len(nuevas),
+        rechazadas=len(payload) - len(nuevas),
+        resultados=resultados,
+    )
+
+
+def incluye_pregunta(include: Optional[str]) -> bool:
+    """Interpreta ``?include=``; por ahora solo se puede embeber ``question``."""
+    valores = {v.strip() for v in (include or "").split(",") if v.strip()}
+    desconocidos = valores - INCLUDES
+    if desconocidos:
+        raise HTTPException(
+            400,
+            f"include inválido: {', '.join(sorted(desconocidos))}. Valores posibles: {', '.join(sorted(INCLUDES))}"
+        )
+    return "question" in valores
+
+
+def campos_respuestas(fields: Optional[str]):
+    """``?fields=`` de los listados de respuestas: (campos, campos de la pregunta embebida)."""
+    campos, anidados = campos_pedidos(fields, AnswerResponse, {"question": QuestionResponse})
+    return campos, anidados["question"]
+
+
+def consulta_respuestas(
+    session_id: int, con_pregunta: bool, archivadas: bool = False, campos=None, campos_pregunta=None
+):
+    """Respuestas de la sesión (columnas de AnswerResponse), con las de su pregunta en la misma consulta.
+
+    Con ``archivadas`` se leen de la copia de ``answers`` en el archivo. ``campos`` y
+    ``campos_pregunta`` limitan las columnas (``?fields=``).
+    """
+    respuestas = archivo.RESPUESTAS if archivadas else Answer.__table__
+    query = select(*columnas(respuestas, AnswerResponse, campos))
+    if con_pregunta:
+        query = query.add_columns(*columnas(Question, QuestionResponse, campos_pregunta)).join(
+            Question, Question.id == respuestas.c.question_id
+        )
+    return query.where(respuestas.c.quiz_session_id == session_id).order_by(respuestas.c.id)
+
+
+def respuestas_como_dicts(filas, con_pregunta: bool, campos=None, campos_pregunta=None):
+    if not con_pregunta:
+        return como_dicts(filas)
+    campos = list(campos or AnswerResponse.model_fields)
+    campos_pregunta = list(campos_pregunta or QuestionResponse.model_fields)
+    n = len(campos)
+    return [
+        {**dict(zip(campos, fila[:n])), "question": dict(zip(campos_pregunta, fila[n:]))}
+        for fila in filas
+    ]
+
+
+@router.get("/session/{session_id}", response_model=Union[list[AnswerWithQuestion], list[AnswerResponse]])
+def respuestas_por_sesion(
+    session_id: int,
+    include: Optional[str] = Query(None, description="'question' embebe la pregunta de cada respuesta"),
+    fields: Optional[str] = Query(None, description=FIELDS_RESPUESTAS),
+    db: Session = Depends(get_db)
+):
+    con_pregunta = incluye_pregunta(include)
+    campos = campos_respuestas(fields)
+    filas = db.execute(consulta_respuestas(session_id, con_pregunta, False, *campos)).all()
+    if not filas and archivo.HABILITADO:
+        filas = db.execute(consulta_respuestas(session_id, con_pregunta, True, *campos)).all()
+    return RespuestaJSON(respuestas_como_dicts(filas, con_pregunta, *campos))
+
+
+@router.get("/session/{session_id}/page", response_model=AnswerPage)
+def respuestas_por_sesion_pagina(
+    session_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = FIELDS,
+    db: Session = Depends(get_db)
+):
+    campos = campos_pedidos(fields, AnswerResponse)
+    query = db.query(*columnas(Answer, AnswerResponse, campos)).filter(Answer.quiz_session_id == session_id)
+    pagina = paginar(query, Answer.id, limit, cursor, {"session_id": session_id})
+    if not pagina["items"] and archivo.HABILITADO:
+        respuestas = archivo.RESPUESTAS
+        query = db.query(*columnas(respuestas, AnswerResponse, campos)).filter(respuestas.c.quiz_session_id == session_id)
+        pagina = paginar(query, respuestas.c.id, limit, cursor, {"session_id": session_id})
+    return RespuestaJSON({**pagina, "items": como_dicts(pagina["items"])})
 
 
 @router.get("/{answer_id}", response_model=AnswerResponse)
 def obtener_respuesta(answer_id: int, db: Session = Depends(get_db)):
-    r = db.query(Answer).filter(Answer.id == answer_id).first()
+    r = db.query(Answer).filter(Answer.id == answer_id).first() or archivo.respuesta(db, answer_id)
     if not r:
         raise HTTPException(404, "Respuesta no encontrada")
     return r
@@ -70,14 +271,25 @@ def actualizar_respuesta(answer_id: int, payload: AnswerCreate, db: Session = De
     if not r:
         raise HTTPException(404, "Respuesta no encontrada")
 
-    pregunta = db.query(Question).filter(Question.id == payload.question_id).first()
+    pregunta = question_cache.obtener(db, payload.question_id, settings.question_cache_grading_ttl)
     if not pregunta:
         raise HTTPException(404, "Pregunta no existe")
 
+    era_correcta = r.es_correcta
+    tiempo_anterior = r.tiempo_respuesta_segundos
+
     r.respuesta_seleccionada = payload.respuesta_seleccionada
     r.es_correcta = payload.respuesta_seleccionada == pregunta.respuesta_correcta
     r.tiempo_respuesta_segundos = payload.tiempo_respuesta_segundos
 
+    # los contadores pertenecen a la pregunta asociada a la respuesta
+    asociada = pregunta if r.question_id == pregunta.id else question_cache.obtener(db, r.question_id)
+    categoria = asociada.categoria if asociada else None
+    StatsCounterService.actualizar_respuesta(db, r, categoria, era_correcta, tiempo_anterior)
+    SessionCounterService.actualizar_respuesta(db, r, categoria, era_correcta)
+    RollupService.actualizar_respuesta(db, r, asociada, era_correcta, tiempo_anterior)
+
     db.commit()
     db.refresh(r)
+    stats_snapshots.notificar_respuestas()
     return r
@@ -0,0 +1,30 @@
+"""``POST /answers/`` con escritura diferida (``ANSWER_WRITE_BEHIND=1``).
+
+Reemplaza al endpoint del router de respuestas: el request espera el resultado de
+su respuesta, que el thread de ``answer_writer`` escribe junto con las demas del
+lote, asi que el contrato (codigos de estado, mensajes y cuerpo) es el mismo.
+"""
+import asyncio
+
+from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
+from ..schemas.answer import AnswerCreate, AnswerResponse
+from ..services.answer_writer import ColaLlena, answer_writer
+
+router = APIRouter()
+
+
+@router.post("/", response_model=AnswerResponse)
+async def registrar_respuesta(payload: AnswerCreate):
+    try:
+        futuro = answer_writer.enviar(payload, timeout=0)
+    except ColaLlena:
+        # cola llena: se espera lugar fuera del event loop y, si no se libera, 503
+        try:
+            futuro = await run_in_threadpool(answer_writer.enviar, payload)
+        except ColaLlena:
+            raise HTTPException(
+                503, "Demasiadas respuestas pendientes, reintente en unos segundos",
+                headers={"Retry-After": "1"},
+            )
+    return await asyncio.wrap_future(futuro)
@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from starlette.concurrency import iterate_in_threadpool
+
+from ..database import SessionLocal, cupo_conexion
+from ..models.answer import Answer
+from ..models.question import Question
+from ..models.quiz_session import QuizSession
+from ..schemas.import_export import Formato
+from ..services import archivo as archivo_sesiones
+from .statistics import ARCHIVO
+
+router = APIRouter()
+
+# Filas leidas por vuelta al cursor y escritas por bloque de salida
+CHUNK_SIZE = 1000
+
+
+def _valor(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return v
+
+
+def _columnas(model):
+    """Nombres y columnas exportadas: las de la tabla, salvo en las preguntas los codigos
+    de categoria y dificultad, que se exportan por nombre (como los recibe la importacion)."""
+    if model is Question:
+        return {
+            "id": Question.id,
+            "pregunta": Question.pregunta,
+            "opciones": Question.opciones,
+            "respuesta_correcta": Question.respuesta_correcta,
+            "explicacion": Question.explicacion,
+            "categoria": Question.categoria,
+            "dificultad": Question.dificultad,
+            "created_at": Question.created_at,
+            "is_active": Question.is_active,
+        }
+    return {c.name: c for c in model.__table__.columns}
+
+
+# Copias en el archivo de sesiones de las tablas exportadas
+ARCHIVADAS = {Answer: archivo_sesiones.RESPUESTAS, QuizSession: archivo_sesiones.SESIONES}
+
+
+def _consultas(model, since: Optional[datetime], until: Optional[datetime], incluir_archivo: bool):
+    """Consultas a recorrer: la de la copia en el archivo (las sesiones mas viejas) y la de la tabla."""
+    fuentes = [_columnas(model)]
+    copia = ARCHIVADAS.get(model)
+    if incluir_archivo and archivo_sesiones.HABILITADO and copia is not None:
+        fuentes.insert(0, {nombre: copia.c[nombre] for nombre in fuentes[0]})
+
+    for columnas in fuentes:
+        stmt = select(*columnas.values()).order_by(columnas["id"])
+        if since is not None:
+            stmt = stmt.where(columnas["created_at"] >= since)
+        if until is not None:
+            stmt = stmt.where(columnas["created_at"] < until)
+        yield stmt
+
+
+def _filas(model, since: Optional[datetime], until: Optional[datetime], incluir_archivo: bool = True):
+    """Recorre la tabla con un cursor en bloques de CHUNK_SIZE, sin cargarla completa."""
+    db = SessionLocal()
+    try:
+        for stmt in _consultas(model, since, until, incluir_archivo):
+            result = db.execute(stmt.execution_options(stream_results=True, yield_per=CHUNK_SIZE))
+            for bloque in result.partitions():
+                yield bloque
+    finally:
+        db.close()
+
+
+def _ndjson(model, since, until, incluir_archivo):
+    nombres = list(_columnas(model))
+    for bloque in _filas(model, since, until, incluir_archivo):
+        yield "".join(
+            json.dumps({n: _valor(v) for n, v in zip(nombres, fila)}, ensure_ascii=False) + "\n"
+            for fila in bloque
+        )
+
+
+def _csv(model, since, until, incluir_archivo):
+    nombres = list(_columnas(model))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(nombres)
+    yield buffer.getvalue()
+
+    for bloque in _filas(model, since, until, incluir_archivo):
+        buffer.seek(0)
+        buffer.truncate()
+        for fila in bloque:
+            writer.writerow([
+                json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else _valor(v)
+                for v in fila
+            ])
+        yield buffer.getvalue()
+
+
+async def _con_cupo(contenido):
+    """Recorre ``contenido`` en el threadpool con un cupo de conexión (ver ``get_db``)."""
+    async with cupo_conexion():
+        async for parte in iterate_in_threadpool(contenido):
+            yield parte
+
+
+def _exportar(model, nombre: str, formato: Formato, since, until, incluir_archivo: bool = True):
+    if formato == Formato.csv:
+        contenido, media_type = _csv(model, since, until, incluir_archivo), "text/csv"
+    else:
+        contenido, media_type = _ndjson(model, since, until, incluir_archivo), "application/x-ndjson"
+
+    return StreamingResponse(
+        _con_cupo(contenido),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato.value}"'},
+    )
+
+
+@router.get("/answers")
+def exportar_respuestas(
+    formato: Formato = Formato.ndjson,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    archivo: bool = ARCHIVO,
+):
+    return _exportar(Answer, "answers", formato, since, until, archivo)
+
+
+@router.get("/sessions")
+def exportar_sesiones(
+    formato: Formato = Formato.ndjson,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    archivo: bool = ARCHIVO,
+):
+    return _exportar(QuizSession, "sessions", formato, since, until, archivo)
+
+
+@router.get("/questions")
+def exportar_preguntas(
+    formato: Formato = Formato.ndjson,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    return _exportar(Question, "questions", formato, since, until)
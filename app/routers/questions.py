@@ -1,27 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import random
-import unicodedata
 
+from app.catalogo import CATEGORIAS, DIFICULTADES
 from app.database import get_db
+from app.pagination import MAX_PAGE_SIZE, paginar
+from app.responses import FIELDS, RespuestaJSON, campos_pedidos, columnas, como_dicts
 from app.models.question import Question
 from app.schemas.question import (
     QuestionCreate,
     QuestionResponse,
+    QuestionPage,
     QuestionUpdate,
     ALLOWED_CATEGORIES,
     ALLOWED_DIFFICULTIES,
 )
+from app.schemas.import_export import Formato, QuestionImportSummary
+from app.services.question_import_service import QuestionImporter, lector, lineas
+from app.services.rollup_service import RollupService
+from app.services.session_counter_service import SessionCounterService
+from app.services.stats_counter_service import StatsCounterService
+from app.services.question_index import question_index
+from app.services.question_search_service import QuestionSearchService
+from app.services.question_cache import question_cache
 
 router = APIRouter()
 
-def _normalize_text(s: str) -> str:
-    if s is None:
-        return ""
-    nfkd = unicodedata.normalize("NFKD", str(s))
-    return "".join(c for c in nfkd if not unicodedata.combining(c)).lower()
-
 # Crear Pregunta
 @router.post("/", response_model=QuestionResponse)
 def create_question(
@@ -32,6 +38,8 @@ def create_question(
     db.add(db_question)
     db.commit()
     db.refresh(db_question)
+    question_index.sincronizar(db_question)
+    question_cache.invalidar(db_question.id)
     return db_question
 
 
@@ -54,6 +62,9 @@ def bulk_create(
 
     try:
         db.add_all(objs)
+        # el flush asigna ids y defaults; la respuesta se arma sin un SELECT por objeto
+        db.flush()
+        creadas = [QuestionResponse.model_validate(o) for o in objs]
         db.commit()
     except Exception as e:
         db.rollback()
@@ -62,9 +73,57 @@ def bulk_create(
             detail=f"Error al guardar preguntas: {str(e)}"
         )
 
-    for o in objs:
-        db.refresh(o)
-    return objs
+    for o in creadas:
+        question_index.sincronizar(o)
+    question_cache.invalidar(*(o.id for o in creadas))
+    return creadas
+
+# Importar Preguntas (NDJSON/CSV en streaming)
+@router.post("/import", response_model=QuestionImportSummary)
+async def import_questions(
+    request: Request,
+    formato: Formato = Formato.ndjson,
+    chunk_size: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    importer = QuestionImporter(db, chunk_size=chunk_size)
+    parser = lector(formato)
+
+    async for linea in lineas(request.stream()):
+        for fila, data in parser.leer(linea):
+            if importer.agregar(fila, data):
+                await run_in_threadpool(importer.insertar_pendientes)
+
+    for fila, data in parser.terminar():
+        importer.agregar(fila, data)
+    await run_in_threadpool(importer.insertar_pendientes)
+
+    return importer.resumen()
+
+# Consulta de los listados (solo las columnas de QuestionResponse, o las de ?fields=)
+def consulta_preguntas(
+    categoria: Optional[str] = None,
+    dificultad: Optional[str] = None,
+    campos=None,
+    skip: int = 0,
+    limit: int = 50,
+):
+    ids = select(Question.id).where(Question.is_active == True)
+
+    if categoria:
+        ids = ids.where(Question.categoria == categoria)
+
+    if dificultad:
+        ids = ids.where(Question.dificultad == dificultad)
+
+    # en orden de id para paginar con skip/limit: los ids de la pagina se ordenan con el
+    # índice (is_active, categoria_id, dificultad_id) y solo se leen las filas de esos ids
+    ids = ids.order_by(Question.id).offset(skip).limit(limit)
+    return (
+        select(*columnas(Question, QuestionResponse, campos))
+        .where(Question.id.in_(ids.scalar_subquery()))
+        .order_by(Question.id)
+    )
 
 # Listar las Preguntas
 @router.get("/", response_model=List[QuestionResponse])
@@ -73,9 +132,25 @@ def list_questions(
     dificultad: Optional[str] = None,
     skip: int = 0,
     limit: int = 50,
+    fields: Optional[str] = FIELDS,
+    db: Session = Depends(get_db)
+):
+    campos = campos_pedidos(fields, QuestionResponse)
+    filas = db.execute(consulta_preguntas(categoria, dificultad, campos, skip, limit))
+    return RespuestaJSON(como_dicts(filas))
+
+# Listar las Preguntas (paginado por cursor)
+@router.get("/page", response_model=QuestionPage)
+def list_questions_page(
+    categoria: Optional[str] = None,
+    dificultad: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = FIELDS,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Question).filter(Question.is_active == True)
+    campos = campos_pedidos(fields, QuestionResponse)
+    query = db.query(*columnas(Question, QuestionResponse, campos)).filter(Question.is_active == True)
 
     if categoria:
         query = query.filter(Question.categoria == categoria)
@@ -83,21 +158,46 @@ def list_questions(
     if dificultad:
         query = query.filter(Question.dificultad == dificultad)
 
-    return query.offset(skip).limit(limit).all()
+    filtros = {"categoria": categoria, "dificultad": dificultad}
+    pagina = paginar(query, Question.id, limit, cursor, filtros)
+    return RespuestaJSON({**pagina, "items": como_dicts(pagina["items"])})
 
 # Preguntas Aleatorias
 @router.get("/random", response_model=List[QuestionResponse])
 def random_questions(
     limit: int = 10,
+    categoria: Optional[str] = None,
+    dificultad: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    items = db.query(Question).filter(Question.is_active == True).all()
+    ids = question_index.muestra(db, limit, categoria, dificultad)
 
-    if not items:
+    if not ids:
         return []
 
-    limit = min(limit, len(items))
-    return random.sample(items, limit)
+    items = {
+        q.id: q
+        for q in db.query(Question).filter(Question.id.in_(ids), Question.is_active == True)
+    }
+
+    # ids que ya no están activos (desactivados desde otro proceso)
+    for qid in ids:
+        if qid not in items:
+            question_index.quitar(qid)
+
+    return [items[qid] for qid in ids if qid in items]
+
+# Busqueda de texto completo (pregunta, explicacion y opciones), por relevancia
+@router.get("/search", response_model=QuestionPage)
+def search_questions(
+    q: str = Query(..., min_length=1, description="Texto a buscar (sin distinguir mayúsculas ni acentos)"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    if db.get_bind().dialect.name != "sqlite":
+        raise HTTPException(status_code=501, detail="La búsqueda requiere SQLite (FTS5)")
+    return RespuestaJSON(QuestionSearchService.buscar(db, q, limit, cursor))
 
 # Obtener una Pregunta por ID
 @router.get("/{question_id}", response_model=QuestionResponse)
@@ -105,7 +205,7 @@ def get_question(
     question_id: int,
     db: Session = Depends(get_db)
 ):
-    q = db.query(Question).filter(Question.id == question_id).first()
+    q = question_cache.obtener(db, question_id)
     if not q:
         raise HTTPException(status_code=404, detail="Pregunta no encontrada")
     return q
@@ -120,6 +220,7 @@ def update_question(
     q = db.query(Question).filter(Question.id == question_id).first()
     if not q:
         raise HTTPException(status_code=404, detail="Pregunta no encontrada")
+    clasificacion = (q.categoria, q.dificultad)
 
     if payload.pregunta is not None:
         q.pregunta = payload.pregunta
@@ -142,24 +243,26 @@ def update_question(
         q.respuesta_correcta = payload.respuesta_correcta
 
     if payload.categoria is not None:
-        if _normalize_text(payload.categoria) not in {
-            _normalize_text(x) for x in ALLOWED_CATEGORIES
-        }:
+        categoria = CATEGORIAS.canonico(payload.categoria)
+        if categoria is None:
             raise HTTPException(
                 status_code=400,
                 detail=f"Categoria inválida. Debe ser una de {ALLOWED_CATEGORIES}"
             )
-        q.categoria = payload.categoria
+        anterior = q.categoria
+        StatsCounterService.cambiar_categoria(db, q.id, anterior, categoria)
+        q.categoria = categoria
+        db.flush()
+        SessionCounterService.cambiar_categoria(db, q.id, anterior, categoria)
 
     if payload.dificultad is not None:
-        if _normalize_text(payload.dificultad) not in {
-            _normalize_text(x) for x in ALLOWED_DIFFICULTIES
-        }:
+        dificultad = DIFICULTADES.canonico(payload.dificultad)
+        if dificultad is None:
             raise HTTPException(
                 status_code=400,
                 detail=f"Dificultad inválida. Debe ser una de {ALLOWED_DIFFICULTIES}"
             )
-        q.dificultad = payload.dificultad
+        q.dificultad = dificultad
 
     if payload.explicacion is not None:
         q.explicacion = payload.explicacion
@@ -167,8 +270,12 @@ def update_question(
     if payload.is_active is not None:
         q.is_active = payload.is_active
 
+    RollupService.cambiar_pregunta(db, q.id, clasificacion, (q.categoria, q.dificultad))
+
     db.commit()
     db.refresh(q)
+    question_index.sincronizar(q)
+    question_cache.invalidar(q.id)
     return q
 
 # Borrado de Pregunta
@@ -184,5 +291,7 @@ def delete_question(
     q.is_active = False
     db.commit()
     db.refresh(q)
+    question_index.quitar(q.id)
+    question_cache.invalidar(q.id)
 
     return {"message": "Pregunta desactivada correctamente"}
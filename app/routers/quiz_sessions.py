@@ -1,9 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from ..database import get_db
+from ..pagination import MAX_PAGE_SIZE, paginar
+from ..responses import FIELDS, RespuestaJSON, campos_pedidos, columnas, como_dicts
 from ..models.quiz_session import QuizSession
-from ..schemas.quiz_session import QuizSessionCreate, QuizSessionResponse
+from ..schemas.leaderboard import SessionRank
+from ..schemas.quiz_session import QuizSessionCreate, QuizSessionResponse, QuizSessionPage
+from ..services import archivo
+from ..services.leaderboard_service import LeaderboardService
+from ..services.ranking import COMPLETADA
 from ..services.quiz_service import QuizService
+from ..services.stats_snapshot_service import stats_snapshots
 
 router = APIRouter()
 
@@ -21,18 +29,53 @@ def iniciar_sesion(payload: QuizSessionCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=list[QuizSessionResponse])
-def listar_sesiones(skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
-    return db.query(QuizSession).offset(skip).limit(limit).all()
+def listar_sesiones(
+    skip: int = 0,
+    limit: int = 50,
+    fields: Optional[str] = FIELDS,
+    db: Session = Depends(get_db)
+):
+    campos = campos_pedidos(fields, QuizSessionResponse)
+    filas = db.query(*columnas(QuizSession, QuizSessionResponse, campos)).offset(skip).limit(limit)
+    return RespuestaJSON(como_dicts(filas))
+
+
+@router.get("/page", response_model=QuizSessionPage)
+def listar_sesiones_pagina(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = FIELDS,
+    db: Session = Depends(get_db)
+):
+    campos = campos_pedidos(fields, QuizSessionResponse)
+    query = db.query(*columnas(QuizSession, QuizSessionResponse, campos))
+    pagina = paginar(query, QuizSession.id, limit, cursor)
+    return RespuestaJSON({**pagina, "items": como_dicts(pagina["items"])})
 
 
 @router.get("/{session_id}", response_model=QuizSessionResponse)
 def obtener_sesion(session_id: int, db: Session = Depends(get_db)):
-    sesion = db.query(QuizSession).filter(QuizSession.id == session_id).first()
+    sesion = db.query(QuizSession).filter(QuizSession.id == session_id).first() or archivo.sesion(db, session_id)
     if not sesion:
         raise HTTPException(404, "Sesión no encontrada")
     return sesion
 
 
+# Posicion de la sesion en el ranking general (GET /statistics/leaderboard)
+@router.get("/{session_id}/rank", response_model=SessionRank)
+def posicion_sesion(session_id: int, db: Session = Depends(get_db)):
+    sesion = db.get(QuizSession, session_id)
+    if not sesion:
+        if archivo.sesion(db, session_id):
+            raise HTTPException(400, "La sesión está archivada: no participa del ranking")
+        raise HTTPException(404, "Sesión no encontrada")
+
+    if sesion.estado != COMPLETADA:
+        raise HTTPException(400, "La sesión no está completada")
+
+    return LeaderboardService.posicion(db, sesion)
+
+
 @router.put("/{session_id}/complete", response_model=QuizSessionResponse)
 def completar_sesion(session_id: int, db: Session = Depends(get_db)):
     sesion = db.query(QuizSession).filter(QuizSession.id == session_id).first()
@@ -42,14 +85,15 @@ def completar_sesion(session_id: int, db: Session = Depends(get_db)):
     if sesion.estado != "en_progreso":
         raise HTTPException(400, "La sesión ya fue completada o abandonada")
 
-    return QuizService.finalizar_sesion(db, sesion)
+    completada = QuizService.finalizar_sesion(db, sesion)
+    if completada is None:
+        raise HTTPException(400, "La sesión ya fue completada o abandonada")
+    return completada
 
 
 @router.delete("/{session_id}")
 def eliminar_sesion(session_id: int, db: Session = Depends(get_db)):
-    sesion = db.query(QuizSession).filter(QuizSession.id == session_id).first()
-    if not sesion:
+    if not QuizService.eliminar_sesion(db, session_id):
         raise HTTPException(404, "Sesión no encontrada")
-    db.delete(sesion)
-    db.commit()
+    stats_snapshots.notificar_respuestas()
     return {"message": "Sesión eliminada correctamente"}
@@ -1,14 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timedelta
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from ..database import get_db
+from ..responses import RespuestaJSON
+from ..schemas.leaderboard import LeaderboardEntry
+from ..services.leaderboard_service import MAX_LEADERBOARD, LeaderboardService
+from ..services.question_cache import question_cache
 from ..services.quiz_service import QuizService
+from ..services.rollup_service import CUANTILES, RollupService
+from ..services.stats_snapshot_service import stats_snapshots
 
 router = APIRouter()
 
+# Rango de /timeseries cuando no se indica since
+RANGO_POR_DEFECTO = {"hora": timedelta(days=2), "dia": timedelta(days=90)}
 
+# ?archivo=false: solo las sesiones y respuestas de la base principal
+ARCHIVO = Query(True, description="Incluir las sesiones archivadas")
+
+
+def _encabezados(response: Response, snapshot):
+    response.headers["X-Generated-At"] = snapshot.generated_at.isoformat()
+    response.headers["Age"] = str(int(snapshot.edad))
+
+
+# Globales y por categoria: se sirven del ultimo snapshot (fresh=true recalcula)
 @router.get("/global")
-def estadisticas_globales(db: Session = Depends(get_db)):
-    return QuizService.estadisticas_globales(db)
+def estadisticas_globales(response: Response, fresh: bool = False, archivo: bool = ARCHIVO):
+    snapshot = stats_snapshots.obtener("global", fresh, archivo)
+    _encabezados(response, snapshot)
+    return snapshot.datos
 
 
 @router.get("/session/{session_id}")
@@ -16,14 +38,65 @@ def estadisticas_sesion(session_id: int, db: Session = Depends(get_db)):
     result = QuizService.estadisticas_sesion(db, session_id)
     if not result:
         raise HTTPException(404, "Sesión no encontrada")
-    return result
+    return RespuestaJSON(result)
 
 
+# (una fila por pregunta respondida: se serializa directamente, sin jsonable_encoder)
 @router.get("/questions/difficult")
-def preguntas_dificiles(db: Session = Depends(get_db)):
-    return QuizService.preguntas_dificiles(db)
+def preguntas_dificiles(archivo: bool = ARCHIVO, db: Session = Depends(get_db)):
+    return RespuestaJSON(QuizService.preguntas_dificiles(db, archivo))
 
 
 @router.get("/categories")
-def categorias(db: Session = Depends(get_db)):
-    return QuizService.estadisticas_por_categoria(db)
+def categorias(response: Response, fresh: bool = False, archivo: bool = ARCHIVO):
+    snapshot = stats_snapshots.obtener("categorias", fresh, archivo)
+    _encabezados(response, snapshot)
+    return snapshot.datos
+
+
+# Mejores sesiones completadas (categoria = puntos obtenidos en esa categoria)
+@router.get("/leaderboard", response_model=list[LeaderboardEntry])
+def leaderboard(
+    limit: int = Query(10, ge=1, le=MAX_LEADERBOARD),
+    categoria: Optional[str] = None,
+    since: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    return RespuestaJSON(LeaderboardService.top(db, limit, categoria, since))
+
+
+def _cuantiles(valor: Optional[str]):
+    if not valor:
+        return CUANTILES
+    try:
+        cuantiles = tuple(float(q) for q in valor.split(","))
+    except ValueError:
+        cuantiles = ()
+    if not cuantiles or not all(0 <= q <= 1 for q in cuantiles):
+        raise HTTPException(400, "cuantiles debe ser una lista de valores entre 0 y 1 (ej.: 0.5,0.95)")
+    return cuantiles
+
+
+# Respuestas por hora o por dia, con cuantiles del tiempo de respuesta (de los agregados)
+@router.get("/timeseries")
+def serie_temporal(
+    periodo: Literal["hora", "dia"] = "dia",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    categoria: Optional[str] = None,
+    dificultad: Optional[str] = None,
+    cuantiles: Optional[str] = Query(None, description="Ej.: 0.5,0.95,0.99"),
+    archivo: bool = ARCHIVO,
+    db: Session = Depends(get_db)
+):
+    if since is None:
+        since = (until or datetime.utcnow()) - RANGO_POR_DEFECTO[periodo]
+    return RespuestaJSON(
+        RollupService.serie(db, periodo, since, until, categoria, dificultad, _cuantiles(cuantiles), archivo)
+    )
+
+
+# Contadores del cache de preguntas (para dimensionarlo)
+@router.get("/cache")
+def estadisticas_cache():
+    return question_cache.estadisticas()
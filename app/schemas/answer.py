@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from .question import QuestionResponse
 
 class AnswerCreate(BaseModel):
     quiz_session_id: int
@@ -19,3 +20,27 @@ class AnswerResponse(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+# Respuesta con su pregunta embebida (?include=question)
+class AnswerWithQuestion(AnswerResponse):
+    question: QuestionResponse
+
+
+class AnswerBatchItemResult(BaseModel):
+    index: int
+    ok: bool
+    respuesta: Optional[AnswerResponse] = None
+    error: Optional[str] = None
+
+
+class AnswerBatchResponse(BaseModel):
+    quiz_session_id: int
+    registradas: int
+    rechazadas: int
+    resultados: List[AnswerBatchItemResult]
+
+
+class AnswerPage(BaseModel):
+    items: List[AnswerResponse]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from enum import Enum
+
+
+# Formatos de Importacion / Exportacion
+class Formato(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ImportRowError(BaseModel):
+    fila: int
+    error: str
+
+
+class QuestionImportSummary(BaseModel):
+    total_filas: int
+    importadas: int
+    con_error: int
+    chunks: int
+    primer_id: Optional[int] = None
+    ultimo_id: Optional[int] = None
+    errores: List[ImportRowError]
+    errores_omitidos: int = 0
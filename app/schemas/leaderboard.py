@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class LeaderboardEntry(BaseModel):
+    posicion: int
+    session_id: int
+    usuario_nombre: Optional[str]
+    puntuacion_total: int
+    tiempo_total_segundos: Optional[int]
+    fecha_fin: Optional[datetime]
+
+
+class SessionRank(BaseModel):
+    session_id: int
+    posicion: int
+    total: int
+    puntuacion_total: int
+    tiempo_total_segundos: Optional[int]
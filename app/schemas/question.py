@@ -1,37 +1,12 @@
 from pydantic import BaseModel, field_validator
 from typing import List, Optional
 from datetime import datetime
-import unicodedata
-
-
-# Categorias y Dificultades Permitidas
-ALLOWED_CATEGORIES = [
-    "tecnologia",
-    "historia",
-    "ciencia",
-    "general",
-    "math",
-    "science",
-    "history",
-    "geografia",
-    "arte",
-]
-ALLOWED_DIFFICULTIES = [
-    "facil",
-    "medio",
-    "dificil",
-    "easy",
-    "medium",
-    "hard",
-]
-
-
-def _normalize_text(s: str) -> str:
-    if s is None:
-        return ""
-    s = str(s)
-    nfkd = unicodedata.normalize("NFKD", s)
-    return "".join(c for c in nfkd if not unicodedata.combining(c)).lower()
+from ..catalogo import CATEGORIAS, DIFICULTADES
+
+
+# Categorias y Dificultades Permitidas (nombres canonicos; se aceptan tambien sus alias)
+ALLOWED_CATEGORIES = list(CATEGORIAS.codigos)
+ALLOWED_DIFFICULTIES = list(DIFICULTADES.codigos)
 
 
 # Base
@@ -65,16 +40,18 @@ class QuestionCreate(QuestionBase):
     @field_validator("categoria")
     @classmethod
     def validar_categoria(cls, v):
-        if _normalize_text(v) not in { _normalize_text(x) for x in ALLOWED_CATEGORIES }:
+        nombre = CATEGORIAS.canonico(v)
+        if nombre is None:
             raise ValueError(f"categoria inválida. Debe ser una de: {ALLOWED_CATEGORIES}")
-        return v
+        return nombre
 
     @field_validator("dificultad")
     @classmethod
     def validar_dificultad(cls, v):
-        if _normalize_text(v) not in { _normalize_text(x) for x in ALLOWED_DIFFICULTIES }:
+        nombre = DIFICULTADES.canonico(v)
+        if nombre is None:
             raise ValueError(f"dificultad inválida. Debe ser una de: {ALLOWED_DIFFICULTIES}")
-        return v
+        return nombre
 
 
 # Actualizacion
@@ -95,3 +72,9 @@ class QuestionResponse(QuestionBase):
     is_active: bool
 
     model_config = {"from_attributes": True}
+
+
+# Pagina (cursor)
+class QuestionPage(BaseModel):
+    items: List[QuestionResponse]
+    next_cursor: Optional[str] = None
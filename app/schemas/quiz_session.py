@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class QuizSessionCreate(BaseModel):
@@ -19,3 +19,8 @@ class QuizSessionResponse(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class QuizSessionPage(BaseModel):
+    items: List[QuizSessionResponse]
+    next_cursor: Optional[str] = None
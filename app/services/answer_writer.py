@@ -0,0 +1,220 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.answer import Answer, es_respuesta_duplicada
+from ..models.quiz_session import QuizSession
+from ..schemas.answer import AnswerCreate, AnswerResponse
+from .contadores import filtro_indice
+from .question_cache import question_cache
+from .rollup_service import RollupService
+from .session_counter_service import SessionCounterService
+from .stats_counter_service import StatsCounterService
+from .stats_snapshot_service import stats_snapshots
+
+logger = logging.getLogger(__name__)
+
+_FIN = object()
+
+
+class ColaLlena(Exception):
+    """La cola de respuestas sigue llena despues de esperar el tiempo configurado."""
+
+
+class AnswerWriter:
+    """Registro de respuestas con escritura diferida (group commit).
+
+    ``enviar`` pone la respuesta en una cola acotada y devuelve un ``Future``; un
+    thread la vacia por lotes de hasta ``tamano_lote`` respuestas, o lo que haya
+    llegado en ``espera_ms`` milisegundos desde la primera, y escribe cada lote
+    (respuestas y contadores) en una sola transaccion. Cada ``Future`` se resuelve
+    con la respuesta registrada o con el mismo ``HTTPException`` que devolveria
+    ``POST /answers/``, por lo que quien espera su resultado no ve diferencias.
+    Con la cola llena, ``enviar`` espera hasta ``timeout`` segundos y luego lanza
+    ``ColaLlena``.
+    """
+
+    def __init__(self, tamano_lote: int, espera_ms: float, capacidad: int, timeout: float):
+        self.tamano_lote = max(tamano_lote, 1)
+        self.espera = espera_ms / 1000
+        self.timeout = timeout
+        self._cola = queue.Queue(maxsize=capacidad)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._atexit = False
+
+    def enviar(self, payload: AnswerCreate, timeout=None) -> Future:
+        self._iniciar()
+        futuro = Future()
+        try:
+            self._cola.put(
+                (payload, datetime.utcnow(), futuro),
+                timeout=self.timeout if timeout is None else timeout,
+            )
+        except queue.Full:
+            raise ColaLlena()
+        return futuro
+
+    def _iniciar(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._bucle, name="answer-writer", daemon=True)
+            self._thread.start()
+            if not self._atexit:
+                atexit.register(self.detener)
+                self._atexit = True
+
+    def _bucle(self):
+        while True:
+            item = self._cola.get()
+            if item is _FIN:
+                return
+            lote = [item]
+            limite = time.monotonic() + self.espera
+            while len(lote) < self.tamano_lote:
+                restante = limite - time.monotonic()
+                try:
+                    item = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _FIN:
+                    self._escribir(lote)
+                    return
+                lote.append(item)
+            self._escribir(lote)
+
+    def _escribir(self, lote):
+        # los Future ya cancelados (el cliente se desconecto) se escriben igual
+        inicio = time.perf_counter()
+        try:
+            with SessionLocal() as db:
+                try:
+                    resultados = AnswerWriter.registrar_lote(db, [(p, t) for p, t, _ in lote])
+                except IntegrityError as e:
+                    # otra escritura registró alguna de estas preguntas entre la validación y
+                    # el insert: se reintenta de a una para rechazar solo las duplicadas
+                    db.rollback()
+                    if not es_respuesta_duplicada(e):
+                        raise
+                    resultados = [AnswerWriter._registrar_una(db, p, t) for p, t, _ in lote]
+        except Exception as e:
+            logger.exception("Error al registrar un lote de %d respuestas", len(lote))
+            resultados = [e] * len(lote)
+
+        registradas = 0
+        for (_, _, futuro), resultado in zip(lote, resultados):
+            if futuro.set_running_or_notify_cancel() is False:
+                continue
+            if isinstance(resultado, Exception):
+                futuro.set_exception(resultado)
+            else:
+                registradas += 1
+                futuro.set_result(resultado)
+
+        if registradas:
+            stats_snapshots.notificar_respuestas(registradas)
+        logger.debug(
+            "Lote de %d respuestas escrito en %.1f ms", len(lote), (time.perf_counter() - inicio) * 1000
+        )
+
+    @staticmethod
+    def _registrar_una(db: Session, payload: AnswerCreate, creada: datetime):
+        try:
+            return AnswerWriter.registrar_lote(db, [(payload, creada)])[0]
+        except IntegrityError as e:
+            db.rollback()
+            # otro error de integridad (por ejemplo en los contadores) falla solo esta respuesta
+            return HTTPException(400, "La pregunta ya fue respondida en esta sesión") if es_respuesta_duplicada(e) else e
+
+    @staticmethod
+    def registrar_lote(db: Session, lote):
+        """Valida e inserta ``lote`` (pares ``(payload, created_at)``) en una transacción.
+
+        Devuelve, por cada elemento, el ``AnswerResponse`` registrado o el
+        ``HTTPException`` que corresponde, con las mismas reglas que
+        ``registrar_respuesta``. Si el insert viola el indice unico se propaga el
+        ``IntegrityError`` sin confirmar nada.
+        """
+        # una consulta por tipo de dato para todo el lote
+        session_ids = {p.quiz_session_id for p, _ in lote}
+        sesiones = {
+            sid for (sid,) in db.query(QuizSession.id).filter(QuizSession.id.in_(session_ids))
+        }
+        preguntas = question_cache.obtener_varios(
+            db, {p.question_id for p, _ in lote}, settings.question_cache_grading_ttl
+        )
+        pares = {(p.quiz_session_id, p.question_id) for p, _ in lote}
+        claves = (Answer.quiz_session_id, Answer.question_id)
+        respondidas = set(
+            map(tuple, db.query(*claves).filter(*filtro_indice(claves, pares), tuple_(*claves).in_(pares)))
+        )
+
+        resultados = [None] * len(lote)
+        nuevas = []
+        for i, (payload, creada) in enumerate(lote):
+            pregunta = preguntas.get(payload.question_id)
+            par = (payload.quiz_session_id, payload.question_id)
+
+            if payload.quiz_session_id not in sesiones:
+                resultados[i] = HTTPException(404, "Sesión no existe")
+            elif not pregunta:
+                resultados[i] = HTTPException(404, "Pregunta no existe")
+            elif payload.respuesta_seleccionada < 0 or payload.respuesta_seleccionada >= len(pregunta.opciones):
+                resultados[i] = HTTPException(400, "La respuesta está fuera de rango")
+            elif par in respondidas:
+                resultados[i] = HTTPException(400, "La pregunta ya fue respondida en esta sesión")
+            else:
+                respondidas.add(par)
+                respuesta = Answer(
+                    quiz_session_id=payload.quiz_session_id,
+                    question_id=payload.question_id,
+                    respuesta_seleccionada=payload.respuesta_seleccionada,
+                    tiempo_respuesta_segundos=payload.tiempo_respuesta_segundos,
+                    es_correcta=payload.respuesta_seleccionada == pregunta.respuesta_correcta,
+                    created_at=creada,
+                )
+                nuevas.append((i, respuesta, pregunta))
+
+        if nuevas:
+            db.add_all([r for _, r, _ in nuevas])
+            db.flush()
+
+            StatsCounterService.registrar_respuestas(db, [(r, p.categoria) for _, r, p in nuevas])
+            SessionCounterService.registrar_respuestas(db, [(r, p.categoria) for _, r, p in nuevas])
+            RollupService.registrar_respuestas(db, [(r, p) for _, r, p in nuevas])
+
+            for i, r, _ in nuevas:
+                resultados[i] = AnswerResponse.model_validate(r)
+            db.commit()
+
+        return resultados
+
+    def detener(self):
+        """Escribe lo que quedo en la cola y termina el thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._cola.put(_FIN)
+            thread.join()
+
+
+answer_writer = AnswerWriter(
+    settings.answer_batch_size,
+    settings.answer_batch_ms,
+    settings.answer_queue_size,
+    settings.answer_queue_timeout,
+)
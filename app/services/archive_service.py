@@ -0,0 +1,336 @@
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, except_, func, insert, select, text, update
+from ..models.answer import Answer
+from ..models.answer_rollup import AnswerRollup
+from ..models.answer_rollup_tiempo import AnswerRollupTiempo
+from ..models.category_stats import CategoryStats
+from ..models.question import Question
+from ..models.question_stats import QuestionStats
+from ..models.quiz_session import QuizSession
+from ..models.session_category_stats import SessionCategoryStats
+from . import archivo
+from .ranking import COMPLETADA
+from .rollup_service import RollupService
+from .stats_counter_service import StatsCounterService
+
+logger = logging.getLogger(__name__)
+
+# Paginas que devuelve cada paso de PRAGMA incremental_vacuum (4 MB con paginas de 4 KB)
+PAGINAS_POR_PASO = 1000
+
+# Contadores de la base principal y sus copias en el archivo, en el orden de los servicios
+_CONTADORES = (QuestionStats, CategoryStats, AnswerRollup, AnswerRollupTiempo)
+_CONTADORES_ARCHIVO = tuple(archivo.CONTADORES[model] for model in _CONTADORES)
+
+
+def _contribuir(conn, filas, signo: int, modelos):
+    """Suma (o descuenta) ``filas`` de respuestas en los contadores y agregados ``modelos``.
+
+    Cada fila tiene las columnas de la respuesta mas la categoria y dificultad de su
+    pregunta; las respuestas sin pregunta no se contaron nunca y se ignoran.
+    """
+    filas = [f for f in filas if f.categoria is not None]
+    StatsCounterService.registrar_respuestas(conn, [(f, f.categoria) for f in filas], signo, modelos[:2])
+    RollupService.registrar_respuestas(conn, [(f, f) for f in filas], signo, modelos[2:])
+
+
+def _respuestas_con_clasificacion(ids):
+    """Respuestas de la base principal de las sesiones ``ids``, con la categoria y dificultad de su pregunta."""
+    return (
+        select(
+            *Answer.__table__.columns,
+            Question.categoria.label("categoria"),
+            Question.dificultad.label("dificultad"),
+        )
+        .outerjoin(Question, Question.id == Answer.question_id)
+        .where(Answer.quiz_session_id.in_(ids))
+    )
+
+
+def _diferencias(conn, ids):
+    """Sesiones de ``ids`` cuya copia en el archivo no coincide con la base principal (o falta en alguna)."""
+    distintas = set()
+    for model, clave in ((QuizSession, "id"), (Answer, "quiz_session_id")):
+        tabla, copia = model.__table__, (archivo.SESIONES if model is QuizSession else archivo.RESPUESTAS)
+        principal = select(*tabla.columns).where(tabla.c[clave].in_(ids))
+        archivada = select(*(copia.c[c.name] for c in tabla.columns)).where(copia.c[clave].in_(ids))
+        for a, b in ((principal, archivada), (archivada, principal)):
+            resto = except_(a, b).subquery()
+            distintas.update(conn.execute(select(resto.c[clave])).scalars())
+    return distintas
+
+
+class ArchiveService:
+    """Archivo de sesiones: las completadas hace mas de N dias pasan a otra base SQLite.
+
+    La base principal queda con las sesiones recientes o en curso (el conjunto que se
+    consulta y modifica), y sus indices y paginas siguen entrando en cache. Las
+    sesiones archivadas se siguen leyendo por id (sesion, respuestas, estadisticas de
+    la sesion) y las estadisticas las incluyen sumando los contadores del archivo.
+
+    Cada lote se mueve en dos transacciones, porque SQLite en modo WAL no confirma
+    atomicamente cambios en dos bases: primero se reemplaza la copia en el archivo
+    con el contenido actual de las sesiones, y despues se borran de la base principal
+    las que siguen iguales a su copia. Si el proceso se corta entre las dos, la
+    siguiente ejecucion vuelve a copiar esas sesiones y las termina de mover.
+    """
+
+    @staticmethod
+    def inicializar(engine):
+        """Crea las tablas del archivo (si hay archivo y faltan)."""
+        if not archivo.HABILITADO:
+            return
+        with engine.begin() as conn:
+            archivo.metadata.create_all(conn)
+            if conn.execute(select(archivo.RESUMEN.c.id)).first() is None:
+                conn.execute(insert(archivo.RESUMEN).values(id=1, sesiones=0, preguntas_correctas=0))
+            ArchiveService._reservar_ids(conn)
+
+    # Los ids ya archivados no se vuelven a asignar en la base principal: con AUTOINCREMENT
+    # (migracion 6) SQLite no baja de sqlite_sequence, que se lleva al maximo del archivo
+    # por si se archivo antes de la migracion
+    @staticmethod
+    def _reservar_ids(conn):
+        for model, copia in ((QuizSession, archivo.SESIONES), (Answer, archivo.RESPUESTAS)):
+            maximo = conn.execute(select(func.max(copia.c.id))).scalar()
+            if maximo is None:
+                continue
+            nombre = {"nombre": model.__tablename__, "maximo": maximo}
+            actual = conn.execute(text("SELECT seq FROM main.sqlite_sequence WHERE name = :nombre"), nombre).first()
+            if actual is None:
+                conn.execute(text("INSERT INTO main.sqlite_sequence (name, seq) VALUES (:nombre, :maximo)"), nombre)
+            elif actual[0] < maximo:
+                conn.execute(text("UPDATE main.sqlite_sequence SET seq = :maximo WHERE name = :nombre"), nombre)
+
+    # Sesiones de ``ids`` cuyo id, o el de alguna de sus respuestas, ya es de otra sesion
+    # en el archivo (ids reutilizados antes de la migracion 6): copiarlas reemplazaria la
+    # archivada, por lo que se dejan en la base principal
+    @staticmethod
+    def _colisiones(conn, ids):
+        # con alias: las tablas del archivo se llaman igual que las de la base principal
+        sesiones, respuestas = archivo.SESIONES.alias("archivada"), archivo.RESPUESTAS.alias("archivada")
+        colisiones = set(conn.execute(
+            select(QuizSession.id)
+            .join(sesiones, sesiones.c.id == QuizSession.id)
+            .where(QuizSession.id.in_(ids), sesiones.c.created_at.is_distinct_from(QuizSession.created_at))
+        ).scalars())
+        colisiones.update(conn.execute(
+            select(Answer.quiz_session_id)
+            .join(respuestas, respuestas.c.id == Answer.id)
+            .where(Answer.quiz_session_id.in_(ids), respuestas.c.quiz_session_id != Answer.quiz_session_id)
+        ).scalars())
+        return colisiones
+
+    @staticmethod
+    def _preparar(conn, ids):
+        """Copia en el archivo las sesiones de ``ids`` sin colisiones; devuelve las que se copiaron."""
+        colisiones = ArchiveService._colisiones(conn, ids)
+        if colisiones:
+            logger.warning(
+                "Sesiones no archivadas: su id o el de alguna respuesta ya es de otra sesion del archivo: %s",
+                sorted(colisiones),
+            )
+        copiadas = [i for i in ids if i not in colisiones]
+        if copiadas:
+            ArchiveService._copiar(conn, copiadas)
+        return copiadas
+
+    # Sesiones a archivar: completadas antes de ``corte``, en orden de id
+    @staticmethod
+    def candidatas(conn, corte: datetime, lote: int, desde: int = 0):
+        return conn.execute(
+            select(QuizSession.id)
+            .where(QuizSession.estado == COMPLETADA, QuizSession.fecha_fin < corte, QuizSession.id > desde)
+            .order_by(QuizSession.id)
+            .limit(lote)
+        ).scalars().all()
+
+    # Copia en el archivo: reemplaza la de cada sesion por su contenido actual en la base
+    # principal (si ya no esta, o con ``copiar=False``, solo se borra la copia)
+    @staticmethod
+    def _copiar(conn, ids, copiar: bool = True):
+        sesiones, respuestas, resumen = archivo.SESIONES, archivo.RESPUESTAS, archivo.RESUMEN
+
+        def _totales():
+            return conn.execute(
+                select(func.count(), func.coalesce(func.sum(sesiones.c.preguntas_correctas), 0))
+                .where(sesiones.c.id.in_(ids))
+            ).one()
+
+        previas = conn.execute(select(respuestas).where(respuestas.c.quiz_session_id.in_(ids))).all()
+        _contribuir(conn, previas, -1, _CONTADORES_ARCHIVO)
+        sesiones_previas, correctas_previas = _totales()
+        conn.execute(delete(respuestas).where(respuestas.c.quiz_session_id.in_(ids)))
+        conn.execute(delete(sesiones).where(sesiones.c.id.in_(ids)))
+
+        nuevas = []
+        if copiar:
+            conn.execute(insert(sesiones).from_select(
+                [c.name for c in QuizSession.__table__.columns],
+                select(*QuizSession.__table__.columns).where(QuizSession.id.in_(ids)),
+            ))
+            consulta = _respuestas_con_clasificacion(ids)
+            conn.execute(insert(respuestas).from_select([c.name for c in consulta.selected_columns], consulta))
+            nuevas = conn.execute(select(respuestas).where(respuestas.c.quiz_session_id.in_(ids))).all()
+            _contribuir(conn, nuevas, 1, _CONTADORES_ARCHIVO)
+
+        cantidad, correctas = _totales()
+        conn.execute(update(resumen).values(
+            sesiones=resumen.c.sesiones + cantidad - sesiones_previas,
+            preguntas_correctas=resumen.c.preguntas_correctas + correctas - correctas_previas,
+        ))
+        return len(nuevas)
+
+    # Borrado de la base principal de las sesiones iguales a su copia; devuelve las borradas
+    @staticmethod
+    def _quitar(conn, ids):
+        iguales = sorted(set(ids) - _diferencias(conn, ids))
+        if not iguales:
+            return []
+        _contribuir(conn, conn.execute(_respuestas_con_clasificacion(iguales)).all(), -1, _CONTADORES)
+        conn.execute(delete(SessionCategoryStats).where(SessionCategoryStats.quiz_session_id.in_(iguales)))
+        conn.execute(delete(Answer).where(Answer.quiz_session_id.in_(iguales)))
+        conn.execute(delete(QuizSession).where(QuizSession.id.in_(iguales)))
+        return iguales
+
+    @staticmethod
+    def archivar_lote(engine, ids):
+        """Mueve las sesiones ``ids`` al archivo. Devuelve las sesiones movidas."""
+
+        def _transaccion(funcion, *args):
+            # BEGIN IMMEDIATE toma el lock de escritura desde el principio: las sesiones
+            # no cambian entre que se leen y se escriben
+            with engine.connect() as conn:
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                resultado = funcion(conn, *args)
+                conn.commit()
+            return resultado
+
+        ids = _transaccion(ArchiveService._preparar, ids)
+        if not ids:
+            return []
+        movidas = _transaccion(ArchiveService._quitar, ids)
+        # las que cambiaron entre las dos transacciones siguen en la base principal: se
+        # descarta su copia y se archivan en la proxima ejecucion
+        pendientes = sorted(set(ids) - set(movidas))
+        if pendientes:
+            _transaccion(ArchiveService._copiar, pendientes, False)
+        return movidas
+
+    @staticmethod
+    def archivar(engine, dias: int, lote: int, pausa: float = 0):
+        """Mueve al archivo las sesiones completadas hace mas de ``dias`` dias, de a ``lote``.
+
+        ``pausa``: segundos de espera entre lotes, para no acaparar el lock de escritura.
+        """
+        if not archivo.HABILITADO:
+            raise RuntimeError("No hay archivo de sesiones: configurar ARCHIVE_DATABASE (base SQLite)")
+        corte = datetime.utcnow() - timedelta(days=dias)
+        total = {"sesiones": 0, "pendientes": 0, "lotes": 0}
+        desde = 0
+        while True:
+            with engine.connect() as conn:
+                ids = ArchiveService.candidatas(conn, corte, lote, desde)
+            if not ids:
+                break
+            movidas = len(ArchiveService.archivar_lote(engine, ids))
+            total["sesiones"] += movidas
+            total["pendientes"] += len(ids) - movidas
+            total["lotes"] += 1
+            desde = ids[-1]
+            logger.info("Lote %d: %d sesiones archivadas", total["lotes"], movidas)
+            if pausa:
+                time.sleep(pausa)
+        return total
+
+    @staticmethod
+    def auto_vacuum(engine) -> str:
+        with engine.connect() as conn:
+            modo = conn.exec_driver_sql("PRAGMA main.auto_vacuum").scalar()
+        return {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}.get(modo, str(modo))
+
+    @staticmethod
+    def liberar_espacio(engine, paginas: int = PAGINAS_POR_PASO, pausa: float = 0):
+        """Devuelve al sistema las paginas libres de la base principal, de a ``paginas`` por transaccion.
+
+        Requiere ``auto_vacuum=INCREMENTAL`` (bases nuevas, o ``compactar``). Devuelve las
+        paginas liberadas.
+        """
+        if ArchiveService.auto_vacuum(engine) != "INCREMENTAL":
+            return 0
+        liberadas = 0
+        conexion = engine.raw_connection()
+        try:
+            sqlite = conexion.driver_connection
+            libres = sqlite.execute("PRAGMA main.freelist_count").fetchone()[0]
+            while libres:
+                # executescript ejecuta el PRAGMA hasta el final (execute libera una sola pagina)
+                sqlite.executescript(f"PRAGMA main.incremental_vacuum({paginas})")
+                quedan = sqlite.execute("PRAGMA main.freelist_count").fetchone()[0]
+                if quedan >= libres:
+                    break
+                liberadas += libres - quedan
+                libres = quedan
+                if pausa:
+                    time.sleep(pausa)
+        finally:
+            conexion.close()
+        return liberadas
+
+    @staticmethod
+    def compactar(engine):
+        """Pasa la base principal a ``auto_vacuum=INCREMENTAL`` con un VACUUM completo (bloquea la base)."""
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("PRAGMA main.auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM main")
+
+
+def main(argv=None):
+    from ..config import settings
+    from ..database import engine
+    from .migration_service import MigrationService
+
+    parser = argparse.ArgumentParser(
+        description="Mueve las sesiones completadas antiguas (y sus respuestas) al archivo de sesiones."
+    )
+    parser.add_argument("--dias", type=int, default=settings.archive_days,
+                        help="Archivar las sesiones completadas hace mas de estos dias")
+    parser.add_argument("--lote", type=int, default=settings.archive_batch_size, help="Sesiones por transaccion")
+    parser.add_argument("--pausa-ms", type=float, default=0, help="Espera entre lotes")
+    parser.add_argument("--compactar", action="store_true",
+                        help="Si la base no tiene auto_vacuum=INCREMENTAL, convertirla con un VACUUM completo")
+    args = parser.parse_args(argv)
+
+    if not archivo.HABILITADO:
+        print("No hay archivo de sesiones: configurar ARCHIVE_DATABASE (base SQLite)")
+        return 1
+
+    MigrationService.migrar(engine)
+    ArchiveService.inicializar(engine)
+
+    inicio = time.perf_counter()
+    total = ArchiveService.archivar(engine, args.dias, args.lote, args.pausa_ms / 1000)
+    print(f"Sesiones archivadas: {total['sesiones']} en {total['lotes']} lotes "
+          f"({time.perf_counter() - inicio:.1f} s)")
+    if total["pendientes"]:
+        print(f"Sesiones no archivadas (modificadas durante el archivado, o con ids que ya usa el "
+              f"archivo; ver el log): {total['pendientes']}")
+
+    if ArchiveService.auto_vacuum(engine) != "INCREMENTAL":
+        if not args.compactar:
+            print("La base no tiene auto_vacuum=INCREMENTAL: el espacio liberado se reutiliza pero el "
+                  "archivo no se achica (--compactar la convierte con un VACUUM completo)")
+            return 0
+        ArchiveService.compactar(engine)
+        print("Base convertida a auto_vacuum=INCREMENTAL")
+    liberadas = ArchiveService.liberar_espacio(engine, pausa=args.pausa_ms / 1000)
+    print(f"Paginas liberadas: {liberadas}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
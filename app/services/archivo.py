@@ -0,0 +1,132 @@
+"""Tablas del archivo de sesiones y lecturas que siguen en el archivo.
+
+El archivo es otra base SQLite (``ARCHIVE_DATABASE``) adjuntada a cada conexion
+como ``archivo``: las consultas la usan con el prefijo ``archivo.`` sin abrir otro
+engine. Guarda las sesiones completadas que movio ``archive_service`` con sus
+respuestas, y los contadores y agregados de esas respuestas en tablas con la misma
+forma que las de la base principal, para sumarlos en las estadisticas sin recorrer
+las respuestas archivadas.
+
+Las tablas estan fuera de ``Base.metadata``: se crean solo si hay archivo
+(``ArchiveService.inicializar``) y no tienen claves foraneas a la base principal.
+"""
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, func, select, union_all
+from sqlalchemy.orm import Session
+from ..database import ARCHIVO_HABILITADO, ESQUEMA_ARCHIVO
+from ..models.answer import Answer
+from ..models.answer_rollup import AnswerRollup
+from ..models.answer_rollup_tiempo import AnswerRollupTiempo
+from ..models.category_stats import CategoryStats
+from ..models.question import Question
+from ..models.question_stats import QuestionStats
+from ..models.quiz_session import QuizSession
+
+HABILITADO = ARCHIVO_HABILITADO
+
+metadata = MetaData(schema=ESQUEMA_ARCHIVO)
+
+
+def _copia(model, *extra):
+    """Tabla del archivo con las columnas de ``model`` (mismos nombres, tipos y orden)."""
+    return Table(
+        model.__tablename__,
+        metadata,
+        *(
+            Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable, autoincrement=False)
+            for c in model.__table__.columns
+        ),
+        *extra,
+    )
+
+
+SESIONES = _copia(QuizSession)
+
+# cada respuesta guarda la categoria y dificultad que tenia su pregunta al archivarse:
+# los contadores del archivo se descuentan con esos valores aunque la pregunta cambie
+RESPUESTAS = _copia(
+    Answer,
+    Column("categoria", String),
+    Column("dificultad", String),
+    Index("ix_archivo_answers_sesion", "quiz_session_id"),
+)
+
+# Contadores de las respuestas archivadas (las de la base principal cuentan solo las que siguen ahi)
+CONTADORES = {
+    model: _copia(model) for model in (QuestionStats, CategoryStats, AnswerRollup, AnswerRollupTiempo)
+}
+
+# Sesiones archivadas y sus aciertos, para las estadisticas globales (una fila)
+RESUMEN = Table(
+    "resumen",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("sesiones", Integer, nullable=False, default=0),
+    Column("preguntas_correctas", Integer, nullable=False, default=0),
+)
+
+
+def union(model, incluir_archivo: bool = True):
+    """Filas de la tabla de ``model`` mas las de su copia en el archivo (``UNION ALL``).
+
+    Sin archivo (o con ``incluir_archivo=False``) devuelve la tabla de la base principal.
+    SQLite aplica los filtros de la consulta exterior a cada parte de la union.
+    """
+    tabla = model.__table__
+    if not (HABILITADO and incluir_archivo):
+        return tabla
+    copia = CONTADORES[model]
+    return union_all(
+        select(*tabla.columns),
+        select(*(copia.c[c.name] for c in tabla.columns)),
+    ).subquery(tabla.name)
+
+
+def contadores(model, valores, incluir_archivo: bool = True):
+    """Contadores de ``model`` sumando los del archivo: una fila por clave, con las columnas ``valores``."""
+    fuente = union(model, incluir_archivo)
+    if fuente is model.__table__:
+        return fuente
+    claves = [fuente.c[c.name] for c in model.__table__.primary_key]
+    return (
+        select(*claves, *(func.sum(fuente.c[v]).label(v) for v in valores))
+        .group_by(*claves)
+        .subquery(f"{model.__tablename__}_total")
+    )
+
+
+def resumen(db: Session):
+    """(sesiones, preguntas correctas) archivadas; (0, 0) sin archivo."""
+    if not HABILITADO:
+        return 0, 0
+    fila = db.execute(select(RESUMEN.c.sesiones, RESUMEN.c.preguntas_correctas)).first()
+    return tuple(fila) if fila else (0, 0)
+
+
+# ---------------------------------------------------------------------------
+# Lecturas de sesiones y respuestas que ya no estan en la base principal
+
+
+def sesion(db: Session, session_id: int):
+    """Sesion archivada (fila con las columnas de ``quiz_sessions``) o None."""
+    if not HABILITADO:
+        return None
+    return db.execute(select(SESIONES).where(SESIONES.c.id == session_id)).first()
+
+
+def respuesta(db: Session, answer_id: int):
+    if not HABILITADO:
+        return None
+    return db.execute(select(RESPUESTAS).where(RESPUESTAS.c.id == answer_id)).first()
+
+
+def respuestas_con_pregunta(db: Session, session_id: int):
+    """Pares (respuesta archivada, su Question) de la sesion, en orden de id."""
+    if not HABILITADO:
+        return []
+    filas = db.execute(
+        select(RESPUESTAS, Question)
+        .join(Question, Question.id == RESPUESTAS.c.question_id)
+        .where(RESPUESTAS.c.quiz_session_id == session_id)
+        .order_by(RESPUESTAS.c.id)
+    )
+    return [(fila, fila.Question) for fila in filas]
@@ -0,0 +1,75 @@
+from sqlalchemy import bindparam, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+# Claves por sentencia al buscar las filas existentes (limite de parametros de SQLite)
+LOTE_CLAVES = 500
+
+# Combinaciones de valores que puede buscar el filtro por indice de cada lote de claves
+MAX_COMBINACIONES = 4 * LOTE_CLAVES
+
+
+def filtro_indice(claves, lote):
+    """Filtros ``columna IN (...)`` por las primeras columnas de la clave.
+
+    SQLite no usa el indice para ``(a, b) IN (VALUES ...)`` y recorre la tabla entera;
+    con ``a IN (...) AND b IN (...)`` busca cada combinacion en el indice de la clave.
+    Se agregan columnas mientras las combinaciones no superen ``MAX_COMBINACIONES``.
+    """
+    filtros, combinaciones = [], 1
+    for i, columna in enumerate(claves):
+        valores = {clave[i] for clave in lote}
+        combinaciones *= len(valores)
+        if combinaciones > MAX_COMBINACIONES:
+            break
+        filtros.append(columna.in_(valores))
+    return filtros
+
+
+def incrementar_varios(db: Session, model, columnas_clave, incrementos: dict, iniciales=None):
+    """Incrementa varias filas de contadores con un numero fijo de sentencias.
+
+    ``incrementos`` va de la clave (tupla con los valores de ``columnas_clave``) a un
+    dict ``{columna: delta}``, con las mismas columnas para todas las claves. Se
+    buscan las filas existentes con una consulta, se actualizan todas con un
+    ``UPDATE x = x + n`` ejecutado en lote (executemany) y se insertan las que
+    faltan con ``iniciales`` mas el delta. Las claves con todos los deltas en 0 se
+    omiten, igual que en los incrementos de a uno. ``model`` puede ser un modelo
+    ORM o una ``Table`` (por ejemplo, los contadores del archivo de sesiones).
+    """
+    incrementos = {k: d for k, d in incrementos.items() if any(d.values())}
+    if not incrementos:
+        return
+
+    tabla = getattr(model, "__table__", model)
+    claves = [tabla.c[c] for c in columnas_clave]
+    nombres = list(next(iter(incrementos.values())))
+
+    pendientes = list(incrementos)
+    existentes = set()
+    for i in range(0, len(pendientes), LOTE_CLAVES):
+        lote = pendientes[i:i + LOTE_CLAVES]
+        existentes.update(
+            map(tuple, db.execute(select(*claves).where(*filtro_indice(claves, lote), tuple_(*claves).in_(lote))))
+        )
+
+    if existentes:
+        db.execute(
+            update(tabla)
+            .where(*[c == bindparam(f"k_{c.name}") for c in claves])
+            .values({tabla.c[n]: tabla.c[n] + bindparam(f"d_{n}") for n in nombres}),
+            [
+                {
+                    **{f"k_{c.name}": v for c, v in zip(claves, clave)},
+                    **{f"d_{n}": incrementos[clave][n] for n in nombres},
+                }
+                for clave in existentes
+            ],
+        )
+
+    nuevas = [
+        {**(iniciales or {}), **dict(zip(columnas_clave, clave)), **deltas}
+        for clave, deltas in incrementos.items()
+        if clave not in existentes
+    ]
+    if nuevas:
+        db.execute(insert(tabla), nuevas)
@@ -0,0 +1,107 @@
+from sqlalchemy import func, or_, and_, select
+from sqlalchemy.orm import Session
+from ..catalogo import CATEGORIAS
+from ..models.quiz_session import QuizSession
+from ..models.session_category_stats import SessionCategoryStats
+from .ranking import COMPLETADA, ranking
+from .session_counter_service import PUNTOS_POR_ACIERTO
+
+# Maximo de posiciones por consulta del leaderboard
+MAX_LEADERBOARD = 100
+
+
+class LeaderboardService:
+    """Ranking de sesiones completadas: puntuacion (mayor primero), tiempo total e id."""
+
+    @staticmethod
+    def _columnas():
+        return (
+            QuizSession.id.label("session_id"),
+            QuizSession.usuario_nombre,
+            QuizSession.puntuacion_total,
+            QuizSession.tiempo_total_segundos,
+            QuizSession.fecha_fin,
+        )
+
+    # Top-k de sesiones completadas (de memoria; con since o categoria, por indice)
+    @staticmethod
+    def top(db: Session, limit: int, categoria=None, since=None):
+        if categoria:
+            filas = LeaderboardService._top_categoria(db, limit, categoria, since)
+        elif since is not None:
+            filas = db.execute(
+                select(*LeaderboardService._columnas())
+                .where(QuizSession.estado == COMPLETADA, QuizSession.fecha_fin >= since)
+                .order_by(QuizSession.puntuacion_total.desc(), QuizSession.tiempo_total_segundos, QuizSession.id)
+                .limit(limit)
+            ).mappings().all()
+        else:
+            ids = ranking.top(db, limit)
+            por_id = {
+                f["session_id"]: f
+                for f in db.execute(
+                    select(*LeaderboardService._columnas()).where(QuizSession.id.in_(ids))
+                ).mappings()
+            }
+            filas = [por_id[i] for i in ids if i in por_id]
+
+        return [{"posicion": i, **fila} for i, fila in enumerate(filas, start=1)]
+
+    # Por categoria: puntos obtenidos en preguntas de esa categoria
+    @staticmethod
+    def _top_categoria(db: Session, limit: int, categoria: str, since=None):
+        query = (
+            select(
+                QuizSession.id.label("session_id"),
+                QuizSession.usuario_nombre,
+                (SessionCategoryStats.correctas * PUNTOS_POR_ACIERTO).label("puntuacion_total"),
+                QuizSession.tiempo_total_segundos,
+                QuizSession.fecha_fin,
+            )
+            .join(QuizSession, QuizSession.id == SessionCategoryStats.quiz_session_id)
+            .where(
+                # las filas guardan el nombre canonico; se acepta cualquier alias
+                SessionCategoryStats.categoria == CATEGORIAS.canonico(categoria),
+                QuizSession.estado == COMPLETADA,
+            )
+        )
+        if since is not None:
+            query = query.where(QuizSession.fecha_fin >= since)
+        return db.execute(
+            query.order_by(
+                SessionCategoryStats.correctas.desc(), QuizSession.tiempo_total_segundos, QuizSession.id
+            ).limit(limit)
+        ).mappings().all()
+
+    # Posicion de una sesion completada en el ranking general
+    @staticmethod
+    def posicion(db: Session, session: QuizSession):
+        puntuacion, tiempo = session.puntuacion_total or 0, session.tiempo_total_segundos or 0
+        posicion, total = ranking.posicion(db, session.id, puntuacion, tiempo)
+
+        if posicion is None:
+            # completada desde otro proceso despues de la ultima carga: se cuenta en la base
+            tiempo_col = func.coalesce(QuizSession.tiempo_total_segundos, 0)
+            posicion = 1 + db.execute(
+                select(func.count(QuizSession.id)).where(
+                    QuizSession.estado == COMPLETADA,
+                    or_(
+                        QuizSession.puntuacion_total > puntuacion,
+                        and_(QuizSession.puntuacion_total == puntuacion, tiempo_col < tiempo),
+                        and_(
+                            QuizSession.puntuacion_total == puntuacion,
+                            tiempo_col == tiempo,
+                            QuizSession.id < session.id,
+                        ),
+                    ),
+                )
+            ).scalar()
+            total = max(total, posicion)
+
+        return {
+            "session_id": session.id,
+            "posicion": posicion,
+            "total": total,
+            "puntuacion_total": session.puntuacion_total,
+            "tiempo_total_segundos": session.tiempo_total_segundos,
+        }
@@ -0,0 +1,192 @@
+import argparse
+import logging
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, insert, select
+from sqlalchemy.engine import Engine
+from ..database import Base
+from ..migrations import MIGRACIONES
+from ..models.answer import Answer
+from ..models.question import Question
+from ..models.quiz_session import QuizSession
+from ..models.session_category_stats import SessionCategoryStats
+from ..models import category_stats, question_stats  # noqa: F401  (registra las tablas)
+from .question_search_service import QuestionSearchService
+
+logger = logging.getLogger(__name__)
+
+# Tabla de control de versiones (fuera de Base.metadata: solo la usa el runner)
+_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("descripcion", String, nullable=False),
+    Column("aplicada_en", DateTime, nullable=False),
+)
+
+# Consultas frecuentes y el indice que deberian usar (EXPLAIN QUERY PLAN, solo SQLite)
+PLANES = [
+    (
+        "respuesta duplicada (registrar_respuesta)",
+        select(Answer.id).where(Answer.quiz_session_id == 1, Answer.question_id == 1),
+        "ux_answers_sesion_pregunta",
+    ),
+    (
+        "respuestas de una sesión",
+        select(Answer).where(Answer.quiz_session_id == 1),
+        "ux_answers_sesion_pregunta",
+    ),
+    (
+        "respuestas de una pregunta",
+        select(func.count()).select_from(Answer).where(Answer.question_id == 1),
+        "ix_answers_question_id",
+    ),
+    (
+        "listado de preguntas por categoría y dificultad",
+        select(Question).where(
+            Question.is_active == True,
+            Question.categoria == "historia",
+            Question.dificultad == "facil",
+        ),
+        "ix_questions_activa_categoria_dificultad",
+    ),
+    (
+        "ranking de sesiones completadas (leaderboard)",
+        select(QuizSession.id).where(QuizSession.estado == "completado").order_by(
+            QuizSession.puntuacion_total.desc(), QuizSession.tiempo_total_segundos
+        ),
+        "ix_quiz_sessions_ranking",
+    ),
+    (
+        "ranking por categoría (leaderboard?categoria=)",
+        select(SessionCategoryStats.quiz_session_id)
+        .where(SessionCategoryStats.categoria == "historia")
+        .order_by(SessionCategoryStats.correctas.desc()),
+        "ix_session_category_stats_ranking",
+    ),
+    (
+        "búsqueda de preguntas (GET /questions/search)",
+        QuestionSearchService.coincidencias('"historia"*'),
+        "questions_fts VIRTUAL TABLE INDEX",
+    ),
+]
+
+
+class MigrationService:
+    """Crea o actualiza el esquema de la base a la ultima version de ``MIGRACIONES``."""
+
+    @staticmethod
+    def ultima_version() -> int:
+        return max((m.VERSION for m in MIGRACIONES), default=0)
+
+    @staticmethod
+    def version_actual(conn) -> int:
+        if not inspect(conn).has_table(schema_version.name):
+            return 0
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+    @staticmethod
+    def _marcar(conn, migracion):
+        conn.execute(insert(schema_version).values(
+            version=migracion.VERSION,
+            descripcion=migracion.DESCRIPCION,
+            aplicada_en=datetime.utcnow(),
+        ))
+
+    # Devuelve las versiones aplicadas
+    @staticmethod
+    def migrar(engine: Engine):
+        with engine.begin() as conn:
+            existentes = set(inspect(conn).get_table_names())
+            nueva = not existentes.intersection(Base.metadata.tables)
+            actual = MigrationService.version_actual(conn)
+
+            # tablas faltantes (todas, si la base es nueva) con sus indices
+            Base.metadata.create_all(conn)
+            _metadata.create_all(conn)
+
+            if nueva:
+                for migracion in MIGRACIONES:
+                    MigrationService._marcar(conn, migracion)
+                logger.info("Esquema creado en la versión %s", MigrationService.ultima_version())
+                return []
+
+        aplicadas = []
+        for migracion in MIGRACIONES:
+            if migracion.VERSION <= actual:
+                continue
+            with engine.begin() as conn:
+                migracion.upgrade(conn)
+                MigrationService._marcar(conn, migracion)
+            logger.info("Migración %s aplicada: %s", migracion.VERSION, migracion.DESCRIPCION)
+            aplicadas.append(migracion.VERSION)
+
+        return aplicadas
+
+    # Plan de cada consulta de PLANES y si usa el indice esperado
+    @staticmethod
+    def verificar_planes(engine: Engine):
+        if engine.dialect.name != "sqlite":
+            return []
+
+        resultado = []
+        with engine.connect() as conn:
+            for descripcion, stmt, indice in PLANES:
+                sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+                plan = [fila[-1] for fila in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+                resultado.append({
+                    "consulta": descripcion,
+                    "indice": indice,
+                    "plan": plan,
+                    "ok": any(indice in paso for paso in plan),
+                })
+        return resultado
+
+
+def main(argv=None):
+    from ..database import SessionLocal, engine
+    from .rollup_service import RollupService
+    from .stats_counter_service import StatsCounterService
+
+    parser = argparse.ArgumentParser(
+        description="Aplica las migraciones pendientes del esquema de la base."
+    )
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Solo informa la version actual y las migraciones pendientes",
+    )
+    parser.add_argument(
+        "--planes",
+        action="store_true",
+        help="Verifica con EXPLAIN QUERY PLAN que las consultas frecuentes usen sus indices",
+    )
+    args = parser.parse_args(argv)
+
+    if args.status:
+        with engine.connect() as conn:
+            actual = MigrationService.version_actual(conn)
+        pendientes = [m for m in MIGRACIONES if m.VERSION > actual]
+        print(f"Version actual: {actual} (ultima: {MigrationService.ultima_version()})")
+        for m in pendientes:
+            print(f"  pendiente {m.VERSION}: {m.DESCRIPCION}")
+        return 1 if pendientes else 0
+
+    aplicadas = MigrationService.migrar(engine)
+    print(f"Migraciones aplicadas: {aplicadas or 'ninguna'}")
+    with SessionLocal() as db:
+        StatsCounterService.inicializar(db)
+        RollupService.inicializar(db)
+
+    if args.planes:
+        fallidas = 0
+        for r in MigrationService.verificar_planes(engine):
+            fallidas += not r["ok"]
+            print(f"[{'ok' if r['ok'] else 'FALLA'}] {r['consulta']}: {' | '.join(r['plan'])}")
+        return 1 if fallidas else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models.question import Question
+
+
+@dataclass(frozen=True)
+class QuestionSnapshot:
+    """Copia inmutable de una pregunta; se puede compartir entre requests y threads."""
+
+    id: int
+    pregunta: str
+    opciones: Tuple[str, ...]
+    respuesta_correcta: int
+    explicacion: Optional[str]
+    categoria: str
+    dificultad: str
+    created_at: Optional[datetime]
+    is_active: bool
+
+    @classmethod
+    def desde(cls, q: Question) -> "QuestionSnapshot":
+        return cls(
+            id=q.id,
+            pregunta=q.pregunta,
+            opciones=tuple(q.opciones),
+            respuesta_correcta=q.respuesta_correcta,
+            explicacion=q.explicacion,
+            categoria=q.categoria,
+            dificultad=q.dificultad,
+            created_at=q.created_at,
+            is_active=bool(q.is_active),
+        )
+
+
+class QuestionCache:
+    """Cache read-through de preguntas por id, con tamaño maximo (LRU) y TTL.
+
+    Los endpoints que modifican preguntas invalidan la entrada; el TTL acota lo
+    que puede quedar desactualizado cuando la escritura ocurre en otro proceso.
+    Quien corrige respuestas pide una vida maxima mas corta (``ttl``) para no usar
+    una ``respuesta_correcta`` vieja.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        # aumenta con cada invalidacion: una carga que se cruza con una invalidacion
+        # no guarda lo leido (podria ser la version anterior a la modificacion)
+        self._generacion = 0
+
+    def _leer(self, question_id: int, ttl: float):
+        entrada = self._items.get(question_id)
+        if entrada is None:
+            return None
+        snapshot, cargada = entrada
+        if cargada + ttl < time.monotonic():
+            del self._items[question_id]
+            self.expirations += 1
+            return None
+        self._items.move_to_end(question_id)
+        return snapshot
+
+    def _guardar(self, snapshot: QuestionSnapshot, cargada: float):
+        self._items[snapshot.id] = (snapshot, cargada)
+        self._items.move_to_end(snapshot.id)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    # Una pregunta (None si no existe); ``ttl`` acota la vida de la entrada para esta lectura
+    def obtener(self, db: Session, question_id: int, ttl: Optional[float] = None) -> Optional[QuestionSnapshot]:
+        return self.obtener_varios(db, [question_id], ttl).get(question_id)
+
+    # Varias preguntas: los faltantes se buscan con una sola consulta
+    def obtener_varios(self, db: Session, ids, ttl: Optional[float] = None) -> dict:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        encontrados, faltantes = {}, []
+        with self._lock:
+            generacion = self._generacion
+            for qid in dict.fromkeys(ids):
+                snapshot = self._leer(qid, ttl)
+                if snapshot is None:
+                    faltantes.append(qid)
+                else:
+                    encontrados[qid] = snapshot
+            self.hits += len(encontrados)
+            self.misses += len(faltantes)
+
+        if faltantes and self.max_size > 0:
+            cargada = time.monotonic()
+            snapshots = [
+                QuestionSnapshot.desde(q)
+                for q in db.query(Question).filter(Question.id.in_(faltantes))
+            ]
+            with self._lock:
+                guardar = self._generacion == generacion
+                for snapshot in snapshots:
+                    if guardar:
+                        self._guardar(snapshot, cargada)
+                    encontrados[snapshot.id] = snapshot
+        elif faltantes:
+            encontrados.update(
+                (q.id, QuestionSnapshot.desde(q))
+                for q in db.query(Question).filter(Question.id.in_(faltantes))
+            )
+
+        return encontrados
+
+    def invalidar(self, *question_ids: int):
+        with self._lock:
+            self._generacion += 1
+            for qid in question_ids:
+                if self._items.pop(qid, None) is not None:
+                    self.invalidations += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._generacion += 1
+            self.invalidations += len(self._items)
+            self._items.clear()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "ttl_segundos": self.ttl,
+                "ttl_correccion_segundos": settings.question_cache_grading_ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / consultas if consultas else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+question_cache = QuestionCache(settings.question_cache_size, settings.question_cache_ttl)
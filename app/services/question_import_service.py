@@ -0,0 +1,206 @@
+import codecs
+import csv
+import json
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from ..catalogo import codificar
+from ..models.question import Question
+from ..schemas.import_export import Formato, ImportRowError, QuestionImportSummary
+from ..schemas.question import QuestionCreate
+from .question_cache import question_cache
+from .question_index import question_index
+
+# Errores que se detallan en el resumen (el resto solo se cuentan)
+MAX_ERRORES = 1000
+
+
+def _mensaje(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(x) for x in err['loc']) or 'fila'}: {err['msg']}"
+            for err in e.errors()
+        )
+    return str(e)
+
+
+# Lectura de lineas desde el cuerpo del request, sin cargarlo completo
+async def lineas(chunks):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    resto = ""
+    async for chunk in chunks:
+        resto += decoder.decode(chunk)
+        partes = resto.split("\n")
+        resto = partes.pop()
+        for parte in partes:
+            yield parte + "\n"
+    resto += decoder.decode(b"", final=True)
+    if resto:
+        yield resto
+
+
+class LectorNdjson:
+    """Convierte lineas NDJSON en (numero de fila, dict). Las lineas vacias se ignoran."""
+
+    def __init__(self):
+        self.fila = 0
+
+    def leer(self, linea: str):
+        if not linea.strip():
+            return []
+        self.fila += 1
+        try:
+            data = json.loads(linea)
+        except ValueError as e:
+            return [(self.fila, ValueError(f"JSON inválido: {e}"))]
+        if not isinstance(data, dict):
+            return [(self.fila, ValueError("Cada línea debe ser un objeto JSON"))]
+        return [(self.fila, data)]
+
+    def terminar(self):
+        return []
+
+
+class LectorCsv:
+    """Convierte lineas CSV (con encabezado) en (numero de fila, dict).
+
+    ``opciones`` puede venir como arreglo JSON (el formato de /export) o separada por ``|``.
+    Un registro entre comillas puede ocupar varias lineas.
+    """
+
+    def __init__(self):
+        self.fila = 0
+        self.encabezado = None
+        self.pendiente = ""
+
+    def leer(self, linea: str):
+        self.pendiente += linea
+        # registro incompleto: comillas sin cerrar
+        if self.pendiente.count('"') % 2:
+            return []
+        texto, self.pendiente = self.pendiente, ""
+        if not texto.strip():
+            return []
+
+        valores = next(csv.reader([texto]))
+        if self.encabezado is None:
+            self.encabezado = [v.strip() for v in valores]
+            return []
+
+        self.fila += 1
+        data = {k: v for k, v in zip(self.encabezado, valores) if v != ""}
+        opciones = data.get("opciones")
+        if opciones is not None:
+            try:
+                data["opciones"] = json.loads(opciones)
+            except ValueError:
+                data["opciones"] = [o.strip() for o in opciones.split("|")]
+        return [(self.fila, data)]
+
+    def terminar(self):
+        if self.pendiente.strip():
+            self.fila += 1
+            return [(self.fila, ValueError("Registro CSV incompleto (comillas sin cerrar)"))]
+        return []
+
+
+def lector(formato: Formato):
+    return LectorCsv() if formato == Formato.csv else LectorNdjson()
+
+
+class QuestionImporter:
+    """Valida filas con ``QuestionCreate`` y las inserta en bloques de ``chunk_size``.
+
+    Cada bloque es una sentencia executemany con RETURNING y su propio commit, por
+    lo que la memoria usada depende del tamaño del bloque y no del archivo. Una
+    fila invalida (o un bloque que falla al guardarse) se informa sin abortar el resto.
+    """
+
+    def __init__(self, db: Session, chunk_size: int = 1000):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.pendientes = []
+        self.filas_pendientes = []
+        self.total_filas = 0
+        self.importadas = 0
+        self.con_error = 0
+        self.chunks = 0
+        self.primer_id = None
+        self.ultimo_id = None
+        self.errores = []
+
+    def registrar_error(self, fila: int, error):
+        self.con_error += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append(ImportRowError(fila=fila, error=_mensaje(error)))
+
+    # Devuelve True cuando el bloque pendiente esta lleno
+    def agregar(self, fila: int, data) -> bool:
+        self.total_filas += 1
+        if isinstance(data, Exception):
+            self.registrar_error(fila, data)
+            return False
+        try:
+            pregunta = QuestionCreate.model_validate(data)
+        except ValidationError as e:
+            self.registrar_error(fila, e)
+            return False
+
+        self.pendientes.append(codificar(pregunta.model_dump()))
+        self.filas_pendientes.append(fila)
+        return len(self.pendientes) >= self.chunk_size
+
+    def insertar_pendientes(self):
+        if not self.pendientes:
+            return
+        filas, self.filas_pendientes = self.filas_pendientes, []
+        valores, self.pendientes = self.pendientes, []
+
+        try:
+            # insert de Core sobre la tabla: executemany en lotes con RETURNING
+            tabla = Question.__table__
+            ids = self.db.connection().execute(
+                insert(tabla).returning(tabla.c.id), valores
+            ).scalars().all()
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            for fila in filas:
+                self.registrar_error(fila, ValueError(f"Error al guardar: {e.__class__.__name__}"))
+            return
+
+        self.chunks += 1
+        self.importadas += len(ids)
+        question_cache.invalidar(*ids)
+        if ids:
+            self.primer_id = min(ids) if self.primer_id is None else min(self.primer_id, min(ids))
+            self.ultimo_id = max(ids) if self.ultimo_id is None else max(self.ultimo_id, max(ids))
+
+    def resumen(self) -> QuestionImportSummary:
+        if self.importadas:
+            # el indice de preguntas activas se recarga en el proximo muestreo
+            question_index.invalidar()
+        return QuestionImportSummary(
+            total_filas=self.total_filas,
+            importadas=self.importadas,
+            con_error=self.con_error,
+            chunks=self.chunks,
+            primer_id=self.primer_id,
+            ultimo_id=self.ultimo_id,
+            errores=self.errores,
+            errores_omitidos=self.con_error - len(self.errores),
+        )
+
+    # Importacion sincronica desde un iterable de lineas (archivos locales, benchmarks)
+    def importar_lineas(self, lineas_texto, formato: Formato) -> QuestionImportSummary:
+        parser = lector(formato)
+        for linea in lineas_texto:
+            for fila, data in parser.leer(linea):
+                if self.agregar(fila, data):
+                    self.insertar_pendientes()
+        for fila, data in parser.terminar():
+            self.agregar(fila, data)
+        self.insertar_pendientes()
+        return self.resumen()
@@ -0,0 +1,193 @@
+import logging
+import random
+import threading
+import time
+from array import array
+
+from sqlalchemy.orm import Session
+from ..catalogo import CATEGORIAS, DIFICULTADES
+from ..config import settings
+from ..models.question import Question
+
+logger = logging.getLogger(__name__)
+
+
+class _Bucket:
+    """Conjunto de ids sobre un array compacto, con alta/baja O(1) y muestreo O(k)."""
+
+    __slots__ = ("ids", "pos")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.pos = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def agregar(self, qid: int):
+        if qid in self.pos:
+            return
+        self.pos[qid] = len(self.ids)
+        self.ids.append(qid)
+
+    def quitar(self, qid: int):
+        i = self.pos.pop(qid, None)
+        if i is None:
+            return
+        ultimo = self.ids.pop()
+        if ultimo != qid:
+            self.ids[i] = ultimo
+            self.pos[ultimo] = i
+
+    def muestra(self, k: int, rnd: random.Random):
+        return [self.ids[i] for i in rnd.sample(range(len(self.ids)), min(k, len(self.ids)))]
+
+
+class QuestionIndex:
+    """Indice en memoria de ids de preguntas activas, particionado por categoria/dificultad.
+
+    Se carga la primera vez que se usa (una consulta de solo ids) y luego se
+    mantiene desde los endpoints que crean, modifican o desactivan preguntas.
+    Cada proceso tiene su propio indice: las preguntas desactivadas desde otro
+    proceso se detectan al muestrear y se descartan, y las creadas o reactivadas
+    en otro proceso se incorporan al recargarlo cada ``ttl`` segundos, en segundo plano.
+    """
+
+    def __init__(self, ttl: float = 0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cargado_en = None
+        self._recargando = False
+        # cambios hechos mientras se carga el indice (una lista por carga en curso): se
+        # vuelven a aplicar sobre lo leido, que puede no incluirlos
+        self._cargas = []
+        self._claves = {}
+        self._buckets = {}
+        self._rnd = random.Random()
+
+    @staticmethod
+    def _clave(question):
+        # por nombre: tambien sirve para las respuestas (QuestionResponse) del alta masiva
+        return (CATEGORIAS.codigo(question.categoria), DIFICULTADES.codigo(question.dificultad))
+
+    def _particiones(self, clave):
+        categoria, dificultad = clave
+        return [(None, None), (categoria, None), (None, dificultad), clave]
+
+    def _agregar(self, qid: int, clave):
+        self._claves[qid] = clave
+        for p in self._particiones(clave):
+            bucket = self._buckets.get(p)
+            if bucket is None:
+                bucket = self._buckets[p] = _Bucket()
+            bucket.agregar(qid)
+
+    def _quitar(self, qid: int):
+        clave = self._claves.pop(qid, None)
+        if clave is None:
+            return
+        for p in self._particiones(clave):
+            bucket = self._buckets.get(p)
+            if bucket is not None:
+                bucket.quitar(qid)
+                if not bucket and p != (None, None):
+                    del self._buckets[p]
+
+    # Carga inicial (y recargas)
+    def cargar(self, db: Session):
+        cambios = []
+        with self._lock:
+            self._cargas.append(cambios)
+        try:
+            filas = (
+                db.query(Question.id, Question.categoria_id, Question.dificultad_id)
+                .filter(Question.is_active == True)
+                .all()
+            )
+        except BaseException:
+            with self._lock:
+                self._cargas.remove(cambios)
+            raise
+
+        with self._lock:
+            self._cargas.remove(cambios)
+            self._claves = {}
+            self._buckets = {(None, None): _Bucket()}
+            for qid, categoria_id, dificultad_id in filas:
+                self._agregar(qid, (categoria_id, dificultad_id))
+            for qid, clave in cambios:
+                self._quitar(qid)
+                if clave is not None:
+                    self._agregar(qid, clave)
+            self._cargado_en = time.monotonic()
+
+    def invalidar(self):
+        with self._lock:
+            self._cargado_en = None
+            self._claves = {}
+            self._buckets = {}
+
+    # Sincronizacion con las escrituras
+    def sincronizar(self, question: Question):
+        self._cambiar(question.id, self._clave(question) if question.is_active else None)
+
+    def quitar(self, question_id: int):
+        self._cambiar(question_id, None)
+
+    def _cambiar(self, qid: int, clave):
+        """``clave`` None: la pregunta sale del indice."""
+        with self._lock:
+            for cambios in self._cargas:
+                cambios.append((qid, clave))
+            if self._cargado_en is None:
+                return
+            self._quitar(qid)
+            if clave is not None:
+                self._agregar(qid, clave)
+
+    def _asegurar(self, db: Session):
+        if self._cargado_en is None:
+            self.cargar(db)
+            return
+        with self._lock:
+            vencido = (
+                self.ttl > 0
+                and self._cargado_en is not None
+                and time.monotonic() - self._cargado_en > self.ttl
+            )
+            if not vencido or self._recargando:
+                return
+            self._recargando = True
+        threading.Thread(target=self._recargar, name="question-index", daemon=True).start()
+
+    def _recargar(self):
+        from ..database import SessionLocal
+
+        try:
+            with SessionLocal() as db:
+                self.cargar(db)
+        except Exception:
+            logger.exception("Error al recargar el indice de preguntas")
+        finally:
+            with self._lock:
+                self._recargando = False
+
+    # Muestreo de k ids
+    def muestra(self, db: Session, k: int, categoria=None, dificultad=None):
+        self._asegurar(db)
+
+        # cualquier alias de la categoria/dificultad elige la misma particion
+        particion = (
+            CATEGORIAS.codigo(categoria) if categoria else None,
+            DIFICULTADES.codigo(dificultad) if dificultad else None,
+        )
+        if (categoria and particion[0] is None) or (dificultad and particion[1] is None):
+            return []
+        with self._lock:
+            bucket = self._buckets.get(particion)
+            if bucket is None or k <= 0:
+                return []
+            return bucket.muestra(k, self._rnd)
+
+
+question_index = QuestionIndex(settings.question_index_ttl)
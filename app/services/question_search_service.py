@@ -0,0 +1,84 @@
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import and_, column, func, literal_column, or_, select, table
+from sqlalchemy.orm import Session
+from ..catalogo import normalizar
+from ..models.question import Question
+from ..pagination import encode_cursor, leer_cursor
+from ..responses import columnas
+from ..schemas.question import QuestionResponse
+
+# Peso de cada columna del indice en bm25: pregunta, explicacion, opciones
+PESOS = (3.0, 1.0, 1.0)
+
+_fts = table("questions_fts", column("rowid"))
+_TERMINO = re.compile(r"\w+")
+
+
+class QuestionSearchService:
+    """Busqueda de preguntas sobre el indice FTS5 ``questions_fts`` (solo SQLite).
+
+    Los resultados se ordenan por relevancia (bm25, menor es mejor) y luego por id,
+    y se paginan por keyset sobre ese par: cada pagina solo calcula el rank de las
+    preguntas que coinciden, sin recorrer la tabla.
+    """
+
+    @staticmethod
+    def expresion(q: str):
+        """Consulta FTS5 para el texto ``q``: todos los terminos, el ultimo como prefijo.
+
+        Cada termino va entre comillas, de modo que la sintaxis de FTS5 (OR, NEAR, "-",
+        etc.) en el texto del usuario no se interpreta. None si no hay terminos.
+        """
+        terminos = _TERMINO.findall(normalizar(q))
+        if not terminos:
+            return None
+        return " ".join(f'"{t}"' for t in terminos) + "*"
+
+    @staticmethod
+    def coincidencias(expresion: str):
+        """Ids de las preguntas que coinciden con ``expresion`` y su rank bm25."""
+        return select(
+            _fts.c.rowid.label("id"),
+            func.bm25(literal_column("questions_fts"), *PESOS).label("rank"),
+        ).where(literal_column("questions_fts").op("MATCH")(expresion))
+
+    @staticmethod
+    def buscar(db: Session, q: str, limit: int, cursor=None):
+        expresion = QuestionSearchService.expresion(q)
+        if expresion is None:
+            return {"items": [], "next_cursor": None}
+
+        coincidencias = QuestionSearchService.coincidencias(expresion).subquery()
+        query = (
+            select(*columnas(Question, QuestionResponse), coincidencias.c.rank)
+            .join(coincidencias, coincidencias.c.id == Question.id)
+            .where(Question.is_active == True)
+        )
+
+        filtros = {"q": q}
+        if cursor:
+            posicion = leer_cursor(cursor, filtros)
+            rank = posicion.get("rank")
+            if not isinstance(rank, (int, float)):
+                raise HTTPException(status_code=400, detail="Cursor inválido")
+            query = query.where(or_(
+                coincidencias.c.rank > rank,
+                and_(coincidencias.c.rank == rank, Question.id > posicion["id"]),
+            ))
+
+        filas = db.execute(
+            query.order_by(coincidencias.c.rank, Question.id).limit(limit + 1)
+        ).all()
+
+        next_cursor = None
+        if len(filas) > limit:
+            filas = filas[:limit]
+            next_cursor = encode_cursor(filas[-1].id, filtros, rank=filas[-1].rank)
+
+        campos = list(QuestionResponse.model_fields)
+        return {
+            "items": [dict(zip(campos, fila)) for fila in filas],
+            "next_cursor": next_cursor,
+        }
@@ -1,64 +1,110 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
 from ..models.answer import Answer
+from ..models.category_stats import CategoryStats
 from ..models.question import Question
+from ..models.question_stats import QuestionStats
 from ..models.quiz_session import QuizSession
+from . import archivo
+from .rollup_service import RollupService
+from .session_counter_service import SessionCounterService
+from .stats_counter_service import StatsCounterService
 from datetime import datetime
 
 
 class QuizService:
 
+    # Contadores por Pregunta (filas precalculadas en "question_stats", mas las del archivo)
+    @staticmethod
+    def _respuestas_por_pregunta(db: Session, incluir_archivo: bool = True):
+        stats = archivo.contadores(QuestionStats, ("respondidas", "incorrectas"), incluir_archivo)
+        return (
+            db.query(
+                Question.id,
+                Question.pregunta,
+                Question.categoria,
+                stats.c.respondidas,
+                stats.c.incorrectas,
+            )
+            .join(stats, stats.c.question_id == Question.id)
+            .filter(stats.c.respondidas > 0)
+            .order_by(Question.id)
+            .all()
+        )
+
     # Calculo de Sesion Completa
+    # (respondidas, correctas y puntuacion ya estan al dia: los actualiza cada respuesta)
+    # (None si la sesion ya no estaba en progreso, por ejemplo si otro request la completo)
     @staticmethod
     def finalizar_sesion(db: Session, session: QuizSession):
-        respuestas = db.query(Answer).filter(Answer.quiz_session_id == session.id).all()
-
-        total_preguntas = len(respuestas)
-        correctas = sum(1 for r in respuestas if r.es_correcta)
-
-        session.preguntas_respondidas = total_preguntas
-        session.preguntas_correctas = correctas
-        session.puntuacion_total = correctas * 10
-
-        session.fecha_fin = datetime.utcnow()
+        valores = {"fecha_fin": datetime.utcnow()}
 
         # Duración Total
-        if session.fecha_inicio and session.fecha_fin:
-            session.tiempo_total_segundos = int((session.fecha_fin - session.fecha_inicio).total_seconds())
+        if session.fecha_inicio:
+            valores["tiempo_total_segundos"] = int((valores["fecha_fin"] - session.fecha_inicio).total_seconds())
 
-        session.estado = "completado"
+        if not SessionCounterService.completar_sesion(db, session.id, **valores):
+            db.rollback()
+            return None
 
         db.commit()
         db.refresh(session)
 
         return session
 
+    # Borrado de Sesion (sus respuestas se borran en cascada y se descuentan de los contadores)
+    @staticmethod
+    def eliminar_sesion(db: Session, session_id: int):
+        session = (
+            db.query(QuizSession)
+            .options(selectinload(QuizSession.answers).joinedload(Answer.question))
+            .filter(QuizSession.id == session_id)
+            .first()
+        )
+        if not session:
+            return False
+
+        StatsCounterService.eliminar_respuestas(
+            db, [(r, r.question.categoria) for r in session.answers if r.question is not None]
+        )
+        RollupService.registrar_respuestas(
+            db, [(r, r.question) for r in session.answers if r.question is not None], signo=-1
+        )
+        SessionCounterService.quitar_sesion(db, session)
+        db.delete(session)
+        db.commit()
+        return True
+
     # Estadisticas (Globales)
     @staticmethod
-    def estadisticas_globales(db: Session):
+    def estadisticas_globales(db: Session, incluir_archivo: bool = True):
         total_preguntas = db.query(Question).filter(Question.is_active == True).count()
 
-        sesiones = db.query(QuizSession).filter(QuizSession.estado == "completado").all()
-        total_sesiones = len(sesiones)
+        total_sesiones, suma_correctas = db.query(
+            func.count(QuizSession.id),
+            func.sum(QuizSession.preguntas_correctas),
+        ).filter(QuizSession.estado == "completado").one()
+
+        # las sesiones archivadas (todas completadas) se suman desde su resumen
+        if incluir_archivo:
+            archivadas, correctas_archivadas = archivo.resumen(db)
+            total_sesiones += archivadas
+            suma_correctas = (suma_correctas or 0) + correctas_archivadas
 
         if total_sesiones > 0:
-            promedio_aciertos = sum(s.preguntas_correctas for s in sesiones) / total_sesiones
+            promedio_aciertos = (suma_correctas or 0) / total_sesiones
         else:
             promedio_aciertos = 0
 
         # Categorias dificiles
-        preguntas = db.query(Question).all()
         categoria_stats = {}
 
-        for p in preguntas:
-            respuestas = db.query(Answer).filter(Answer.question_id == p.id).all()
-            if len(respuestas) == 0:
-                continue
-            incorrectas = sum(1 for r in respuestas if not r.es_correcta)
-            tasa_error = incorrectas / len(respuestas)
+        for _, _, categoria, total, incorrectas in QuizService._respuestas_por_pregunta(db, incluir_archivo):
+            tasa_error = incorrectas / total
 
-            if p.categoria not in categoria_stats:
-                categoria_stats[p.categoria] = []
-            categoria_stats[p.categoria].append(tasa_error)
+            if categoria not in categoria_stats:
+                categoria_stats[categoria] = []
+            categoria_stats[categoria].append(tasa_error)
 
         categorias_dificiles = {
             cat: sum(vals) / len(vals)
@@ -75,25 +121,31 @@ class QuizService:
     # Estadisticas (por Sesion)
     @staticmethod
     def estadisticas_sesion(db: Session, session_id: int):
-        session = db.query(QuizSession).filter(QuizSession.id == session_id).first()
-        if not session:
-            return None
-
-        respuestas = db.query(Answer).filter(Answer.quiz_session_id == session_id).all()
-
-        if len(respuestas) > 0:
-            tiempo_promedio = sum(
-                r.tiempo_respuesta_segundos for r in respuestas if r.tiempo_respuesta_segundos
-            ) / len(respuestas)
+        # sesión + respuestas con su pregunta: dos consultas
+        session = (
+            db.query(QuizSession)
+            .options(selectinload(QuizSession.answers).joinedload(Answer.question))
+            .filter(QuizSession.id == session_id)
+            .first()
+        )
+        if session:
+            respuestas = [(r, r.question) for r in session.answers]
         else:
-            tiempo_promedio = 0
+            # sesión archivada: se lee del archivo (las preguntas siguen en la base principal)
+            session = archivo.sesion(db, session_id)
+            if not session:
+                return None
+            respuestas = archivo.respuestas_con_pregunta(db, session_id)
+
+        # promedio sobre las respuestas que informaron su tiempo
+        tiempos = [r.tiempo_respuesta_segundos for r, _ in respuestas if r.tiempo_respuesta_segundos is not None]
+        tiempo_promedio = sum(tiempos) / len(tiempos) if tiempos else 0
 
         detalle = []
-        for r in respuestas:
-            pregunta = db.query(Question).filter(Question.id == r.question_id).first()
+        for r, pregunta in respuestas:
             detalle.append({
                 "pregunta": pregunta.pregunta,
-                "opciones": pregunta.opciones,
+                "opciones": list(pregunta.opciones),
                 "respuesta_correcta": pregunta.respuesta_correcta,
                 "respuesta_usuario": r.respuesta_seleccionada,
                 "es_correcta": r.es_correcta
@@ -109,24 +161,15 @@ class QuizService:
 
     # Preguntas mas Dificiles
     @staticmethod
-    def preguntas_dificiles(db: Session):
-        preguntas = db.query(Question).all()
+    def preguntas_dificiles(db: Session, incluir_archivo: bool = True):
         resultado = []
 
-        for p in preguntas:
-            respuestas = db.query(Answer).filter(Answer.question_id == p.id).all()
-            if not respuestas:
-                continue
-
-            incorrectas = sum(1 for r in respuestas if not r.es_correcta)
-            total = len(respuestas)
-            tasa_error = incorrectas / total
-
+        for _, pregunta, _, total, incorrectas in QuizService._respuestas_por_pregunta(db, incluir_archivo):
             resultado.append({
-                "pregunta": p.pregunta,
+                "pregunta": pregunta,
                 "veces_respondida": total,
                 "incorrectas": incorrectas,
-                "tasa_de_error": tasa_error
+                "tasa_de_error": incorrectas / total
             })
 
         # Orden por Mayor Dificultad
@@ -135,22 +178,25 @@ class QuizService:
 
     # Estadisticas (por Categoria)
     @staticmethod
-    def estadisticas_por_categoria(db: Session):
-        preguntas = db.query(Question).all()
-        categorias = {}
-
-        for q in preguntas:
-            if q.categoria not in categorias:
-                categorias[q.categoria] = {"preguntas": 0, "correctas": 0, "total": 0}
-
-            categorias[q.categoria]["preguntas"] += 1
-
-            respuestas = db.query(Answer).filter(Answer.question_id == q.id).all()
-
-            for r in respuestas:
-                categorias[q.categoria]["total"] += 1
-                if r.es_correcta:
-                    categorias[q.categoria]["correctas"] += 1
+    def estadisticas_por_categoria(db: Session, incluir_archivo: bool = True):
+        # Orden de aparicion: primera pregunta (por id) de cada categoria
+        orden = (
+            db.query(Question.categoria, func.min(Question.id).label("primera"))
+            .group_by(Question.categoria_id)
+            .subquery()
+        )
+        stats = archivo.contadores(CategoryStats, ("respondidas", "incorrectas"), incluir_archivo)
+        filas = (
+            db.query(orden.c.categoria, stats.c.respondidas, stats.c.incorrectas)
+            .outerjoin(stats, stats.c.categoria == orden.c.categoria)
+            .order_by(orden.c.primera)
+            .all()
+        )
+
+        categorias = {
+            cat: {"correctas": (total or 0) - (incorrectas or 0), "total": total or 0}
+            for cat, total, incorrectas in filas
+        }
 
         # Resultado Final
         resultado = {}
@@ -0,0 +1,36 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.quiz_session import QuizSession
+from .quiz_service import QuizService
+
+
+class AsyncQuizService:
+    """Version async de ``QuizService`` para el modo ``DB_ASYNC``.
+
+    Cada metodo ejecuta la implementacion sincronica con ``AsyncSession.run_sync``:
+    las consultas se hacen sobre la conexion async (sin ocupar el pool de threads)
+    y la logica de calculo sigue estando en un solo lugar.
+    """
+
+    @staticmethod
+    async def finalizar_sesion(db: AsyncSession, session: QuizSession):
+        return await db.run_sync(QuizService.finalizar_sesion, session)
+
+    @staticmethod
+    async def eliminar_sesion(db: AsyncSession, session_id: int):
+        return await db.run_sync(QuizService.eliminar_sesion, session_id)
+
+    @staticmethod
+    async def estadisticas_globales(db: AsyncSession, incluir_archivo: bool = True):
+        return await db.run_sync(QuizService.estadisticas_globales, incluir_archivo)
+
+    @staticmethod
+    async def estadisticas_sesion(db: AsyncSession, session_id: int):
+        return await db.run_sync(QuizService.estadisticas_sesion, session_id)
+
+    @staticmethod
+    async def preguntas_dificiles(db: AsyncSession, incluir_archivo: bool = True):
+        return await db.run_sync(QuizService.preguntas_dificiles, incluir_archivo)
+
+    @staticmethod
+    async def estadisticas_por_categoria(db: AsyncSession, incluir_archivo: bool = True):
+        return await db.run_sync(QuizService.estadisticas_por_categoria, incluir_archivo)
@@ -0,0 +1,209 @@
+import bisect
+import logging
+import threading
+import time
+from array import array
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models.quiz_session import QuizSession
+
+logger = logging.getLogger(__name__)
+
+COMPLETADA = "completado"
+
+
+def _clave(tiempo, session_id: int) -> int:
+    """Orden dentro de una misma puntuacion: menor tiempo y luego menor id (en un entero de 64 bits)."""
+    return (min(max(tiempo or 0, 0), 2**31 - 1) << 32) | session_id
+
+
+class _Fenwick:
+    """Cantidad de sesiones por puntuacion, con sumas de prefijo en O(log n)."""
+
+    def __init__(self, capacidad: int = 1024):
+        self._arbol = [0] * (capacidad + 1)
+
+    def _crecer(self, minimo: int):
+        conteos = [self.prefijo(i) - self.prefijo(i - 1) for i in range(len(self._arbol) - 1)]
+        capacidad = len(conteos)
+        while capacidad <= minimo:
+            capacidad *= 2
+        self._arbol = [0] * (capacidad + 1)
+        for i, n in enumerate(conteos):
+            if n:
+                self.sumar(i, n)
+
+    def sumar(self, puntuacion: int, n: int):
+        if puntuacion >= len(self._arbol) - 1:
+            self._crecer(puntuacion)
+        i = puntuacion + 1
+        while i < len(self._arbol):
+            self._arbol[i] += n
+            i += i & -i
+
+    def prefijo(self, puntuacion: int) -> int:
+        """Sesiones con puntuacion <= ``puntuacion``."""
+        total = 0
+        i = min(puntuacion + 1, len(self._arbol) - 1)
+        while i > 0:
+            total += self._arbol[i]
+            i -= i & -i
+        return total
+
+
+class Ranking:
+    """Ranking en memoria de las sesiones completadas (puntuacion, tiempo, id).
+
+    Por cada puntuacion guarda un array ordenado de claves (tiempo, id) de 8 bytes y
+    un arbol de Fenwick con la cantidad de sesiones por puntuacion, de modo que la
+    posicion de una sesion cuesta O(log n) y el top-k O(k).
+
+    Se carga la primera vez que se usa (recorriendo el indice ``ix_quiz_sessions_ranking``)
+    y se mantiene con los cambios que se confirman en este proceso. Los de otros
+    procesos se incorporan al recargarlo cada ``ttl`` segundos, en segundo plano.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cargado_en = None
+        self._recargando = False
+        self._vaciar()
+
+    def _vaciar(self):
+        self._por_puntuacion = {}
+        self._puntuaciones = []
+        self._conteos = _Fenwick()
+        self._total = 0
+
+    # Alta / baja (con el lock tomado)
+    def _agregar(self, session_id: int, puntuacion: int, tiempo):
+        puntuacion = max(puntuacion or 0, 0)
+        claves = self._por_puntuacion.get(puntuacion)
+        if claves is None:
+            claves = self._por_puntuacion[puntuacion] = array("q")
+            bisect.insort(self._puntuaciones, puntuacion)
+        bisect.insort(claves, _clave(tiempo, session_id))
+        self._conteos.sumar(puntuacion, 1)
+        self._total += 1
+
+    def _quitar(self, session_id: int, puntuacion: int, tiempo):
+        puntuacion = max(puntuacion or 0, 0)
+        claves = self._por_puntuacion.get(puntuacion)
+        clave = _clave(tiempo, session_id)
+        i = bisect.bisect_left(claves, clave) if claves is not None else 0
+        if claves is None or i == len(claves) or claves[i] != clave:
+            return
+        del claves[i]
+        if not claves:
+            del self._por_puntuacion[puntuacion]
+            self._puntuaciones.remove(puntuacion)
+        self._conteos.sumar(puntuacion, -1)
+        self._total -= 1
+
+    # Carga desde la base (ya ordenada por el indice: cada array se arma con appends)
+    def cargar(self, db: Session):
+        filas = db.execute(
+            select(QuizSession.id, QuizSession.puntuacion_total, QuizSession.tiempo_total_segundos)
+            .where(QuizSession.estado == COMPLETADA)
+            .order_by(QuizSession.puntuacion_total.desc(), QuizSession.tiempo_total_segundos, QuizSession.id)
+        )
+        por_puntuacion, conteos, total = {}, _Fenwick(), 0
+        for session_id, puntuacion, tiempo in filas:
+            puntuacion = max(puntuacion or 0, 0)
+            claves = por_puntuacion.get(puntuacion)
+            if claves is None:
+                claves = por_puntuacion[puntuacion] = array("q")
+            claves.append(_clave(tiempo, session_id))
+        for puntuacion, claves in por_puntuacion.items():
+            conteos.sumar(puntuacion, len(claves))
+            total += len(claves)
+
+        with self._lock:
+            self._por_puntuacion = por_puntuacion
+            self._puntuaciones = sorted(por_puntuacion)
+            self._conteos = conteos
+            self._total = total
+            self._cargado_en = time.monotonic()
+
+    def invalidar(self):
+        with self._lock:
+            self._cargado_en = None
+            self._vaciar()
+
+    def _asegurar(self, db: Session):
+        if self._cargado_en is None:
+            self.cargar(db)
+        elif self.ttl > 0 and time.monotonic() - self._cargado_en > self.ttl and not self._recargando:
+            self._recargando = True
+            threading.Thread(target=self._recargar, name="ranking", daemon=True).start()
+
+    def _recargar(self):
+        from ..database import SessionLocal
+
+        try:
+            with SessionLocal() as db:
+                self.cargar(db)
+        except Exception:
+            logger.exception("Error al recargar el ranking de sesiones")
+        finally:
+            self._recargando = False
+
+    # Cambios de sesiones completadas: se aplican cuando se confirma la transaccion
+    @staticmethod
+    def pendiente(db: Session, session_id: int, anterior=None, nueva=None):
+        """``anterior``/``nueva``: (puntuacion, tiempo) de la sesion, o None si no esta en el ranking."""
+        db.info.setdefault("ranking", []).append((session_id, anterior, nueva))
+
+    def aplicar(self, cambios):
+        with self._lock:
+            if self._cargado_en is None:
+                return
+            for session_id, anterior, nueva in cambios:
+                if anterior is not None:
+                    self._quitar(session_id, *anterior)
+                if nueva is not None:
+                    self._agregar(session_id, *nueva)
+
+    # Consultas
+    def top(self, db: Session, k: int):
+        """Ids de las ``k`` primeras sesiones."""
+        self._asegurar(db)
+        ids = []
+        with self._lock:
+            for puntuacion in reversed(self._puntuaciones):
+                for clave in self._por_puntuacion[puntuacion]:
+                    ids.append(clave & 0xFFFFFFFF)
+                    if len(ids) == k:
+                        return ids
+        return ids
+
+    def posicion(self, db: Session, session_id: int, puntuacion: int, tiempo):
+        """(posicion desde 1, total de sesiones); posicion None si la sesion no esta."""
+        self._asegurar(db)
+        puntuacion = max(puntuacion or 0, 0)
+        with self._lock:
+            claves = self._por_puntuacion.get(puntuacion)
+            clave = _clave(tiempo, session_id)
+            i = bisect.bisect_left(claves, clave) if claves is not None else 0
+            if claves is None or i == len(claves) or claves[i] != clave:
+                return None, self._total
+            mayores = self._total - self._conteos.prefijo(puntuacion)
+            return mayores + i + 1, self._total
+
+
+ranking = Ranking(settings.leaderboard_ttl)
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_ranking(db):
+    cambios = db.info.pop("ranking", None)
+    if cambios:
+        ranking.aplicar(cambios)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_ranking(db):
+    db.info.pop("ranking", None)
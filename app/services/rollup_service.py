@@ -0,0 +1,385 @@
+import argparse
+from datetime import datetime
+
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from ..catalogo import CATEGORIAS, DIFICULTADES
+from ..models.answer import Answer
+from ..models.answer_rollup import AnswerRollup
+from ..models.answer_rollup_tiempo import AnswerRollupTiempo
+from ..models.question import Question
+from . import archivo
+from .contadores import incrementar_varios
+from .sketch import DDSketch
+
+HORA = "hora"
+DIA = "dia"
+PERIODOS = (HORA, DIA)
+
+# Cuantiles del tiempo de respuesta que informa /statistics/timeseries por defecto
+CUANTILES = (0.5, 0.95, 0.99)
+
+# Filas por sentencia al reconstruir
+LOTE_RECONSTRUCCION = 5000
+
+
+def inicio_de(periodo: str, fecha: datetime) -> datetime:
+    """Comienzo del intervalo (hora o dia) que contiene ``fecha``."""
+    if periodo == DIA:
+        return fecha.replace(hour=0, minute=0, second=0, microsecond=0)
+    return fecha.replace(minute=0, second=0, microsecond=0)
+
+
+def nombre_cuantil(q: float) -> str:
+    return f"p{q * 100:g}"
+
+
+class RollupService:
+    """Respuestas agregadas por hora y por dia, categoria y dificultad.
+
+    Cada intervalo guarda cantidad, aciertos, suma de tiempos y un DDSketch de los
+    tiempos de respuesta (una fila por bin en ``answer_rollup_tiempos``). Se actualizan
+    con ``UPDATE x = x + n`` en la misma transaccion que la respuesta, y como los
+    sketches se combinan sumando bins, cualquier rango de fechas se responde con las
+    filas de sus intervalos en lugar de recorrer ``answers``.
+    """
+
+    # Incremento de la fila de la hora y la del dia en una sola sentencia (INSERT de las que falten)
+    @staticmethod
+    def _incrementar(db: Session, model, clave: dict, hora: datetime, **deltas):
+        deltas = {k: v for k, v in deltas.items() if v}
+        if not deltas:
+            return
+
+        # columnas de la tabla: ``model`` puede ser un modelo ORM o una Table (archivo)
+        c = getattr(model, "__table__", model).c
+        dia = inicio_de(DIA, hora)
+        filtro = [c[k] == v for k, v in clave.items()]
+        filtro.append(or_(
+            and_(c.periodo == HORA, c.inicio == hora),
+            and_(c.periodo == DIA, c.inicio == dia),
+        ))
+        actualizadas = db.execute(
+            update(model)
+            .where(*filtro)
+            .values({c[k]: c[k] + v for k, v in deltas.items()})
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        if actualizadas < len(PERIODOS):
+            existentes = set(db.execute(select(c.periodo).where(*filtro)).scalars()) if actualizadas else set()
+            for periodo, inicio in ((HORA, hora), (DIA, dia)):
+                if periodo not in existentes:
+                    db.execute(insert(model).values(periodo=periodo, inicio=inicio, **clave, **deltas))
+
+    # Agregado por hora de filas (created_at, categoria, dificultad, es_correcta, tiempo)
+    @staticmethod
+    def _agrupar(filas, signo: int = 1):
+        totales, tiempos, horas = {}, {}, {}
+        for fecha, categoria, dificultad, es_correcta, tiempo in filas:
+            if fecha is None:
+                continue
+            hora = horas.get(fecha)
+            if hora is None:
+                hora = horas[fecha] = inicio_de(HORA, fecha)
+            clave = (hora, categoria, dificultad)
+            acumulado = totales.setdefault(clave, [0, 0, 0, 0])
+            acumulado[0] += signo
+            acumulado[1] += signo if es_correcta else 0
+            if tiempo is not None:
+                acumulado[2] += signo
+                acumulado[3] += signo * tiempo
+                bin_ = (*clave, DDSketch.indice(tiempo))
+                tiempos[bin_] = tiempos.get(bin_, 0) + signo
+        return totales, tiempos
+
+    # Varias claves a la vez: las filas de la hora y del dia de todas, con un numero fijo de sentencias
+    @staticmethod
+    def _incrementar_varios(db: Session, model, columnas, incrementos: dict):
+        """``incrementos``: de (hora, *valores de ``columnas``) a ``{columna: delta}``."""
+        if len(incrementos) == 1:
+            ((hora, *valores), deltas), = incrementos.items()
+            RollupService._incrementar(db, model, dict(zip(columnas, valores)), hora, **deltas)
+            return
+
+        filas = {}
+        for (hora, *valores), deltas in incrementos.items():
+            for periodo, inicio in ((HORA, hora), (DIA, inicio_de(DIA, hora))):
+                clave = (periodo, inicio, *valores)
+                previo = filas.get(clave)
+                filas[clave] = deltas if previo is None else {k: previo[k] + v for k, v in deltas.items()}
+        incrementar_varios(db, model, ("periodo", "inicio", *columnas), filas)
+
+    @staticmethod
+    def _registrar(db: Session, filas, signo: int = 1, modelos=(AnswerRollup, AnswerRollupTiempo)):
+        totales, tiempos = RollupService._agrupar(filas, signo)
+        por_intervalo, por_bin = modelos
+        RollupService._incrementar_varios(db, por_intervalo, ("categoria", "dificultad"), {
+            clave: {
+                "respondidas": respondidas,
+                "correctas": correctas,
+                "con_tiempo": con_tiempo,
+                "tiempo_total_segundos": tiempo,
+            }
+            for clave, (respondidas, correctas, con_tiempo, tiempo) in totales.items()
+        })
+        RollupService._incrementar_varios(
+            db, por_bin, ("categoria", "dificultad", "indice"),
+            {bin_: {"cantidad": cantidad} for bin_, cantidad in tiempos.items()},
+        )
+
+    @staticmethod
+    def _fila(respuesta: Answer, pregunta, es_correcta=None, tiempo=None):
+        return (
+            respuesta.created_at or datetime.utcnow(),
+            pregunta.categoria,
+            pregunta.dificultad,
+            respuesta.es_correcta if es_correcta is None else es_correcta,
+            respuesta.tiempo_respuesta_segundos if tiempo is None else tiempo,
+        )
+
+    # Nueva Respuesta
+    @staticmethod
+    def registrar_respuesta(db: Session, respuesta: Answer, pregunta: Question):
+        RollupService._registrar(db, [RollupService._fila(respuesta, pregunta)])
+
+    # Varias Respuestas (con signo=-1 se descuentan, por ejemplo al borrar su sesion)
+    @staticmethod
+    def registrar_respuestas(
+        db: Session, respuestas, signo: int = 1, modelos=(AnswerRollup, AnswerRollupTiempo)
+    ):
+        """``respuestas``: iterable de pares (Answer, su Question).
+
+        ``modelos``: las tablas por intervalo y de bins (el archivo de sesiones tiene las suyas).
+        """
+        RollupService._registrar(db, [RollupService._fila(r, p) for r, p in respuestas], signo, modelos)
+
+    # Respuesta Modificada: se descuenta como era y se suma como quedo (en su intervalo original)
+    @staticmethod
+    def actualizar_respuesta(db: Session, respuesta: Answer, pregunta, era_correcta: bool, tiempo_anterior):
+        if pregunta is None:
+            return
+        if bool(era_correcta) == bool(respuesta.es_correcta) and tiempo_anterior == respuesta.tiempo_respuesta_segundos:
+            return
+        anterior = (respuesta.created_at, pregunta.categoria, pregunta.dificultad, era_correcta, tiempo_anterior)
+        RollupService._registrar(db, [anterior], signo=-1)
+        RollupService._registrar(db, [RollupService._fila(respuesta, pregunta)])
+
+    # Pregunta que cambia de categoria o dificultad: sus respuestas pasan a los nuevos agregados
+    @staticmethod
+    def cambiar_pregunta(db: Session, question_id: int, anterior: tuple, nueva: tuple):
+        """``anterior``/``nueva``: (categoria, dificultad) de la pregunta."""
+        if anterior == nueva:
+            return
+        respuestas = db.execute(
+            select(Answer.created_at, Answer.es_correcta, Answer.tiempo_respuesta_segundos)
+            .where(Answer.question_id == question_id)
+        ).all()
+        if not respuestas:
+            return
+        for (categoria, dificultad), signo in ((anterior, -1), (nueva, 1)):
+            RollupService._registrar(
+                db, [(f, categoria, dificultad, c, t) for f, c, t in respuestas], signo
+            )
+
+    # Serie temporal: un punto por intervalo y el total del rango (combinando los sketches)
+    @staticmethod
+    def serie(
+        db: Session,
+        periodo: str,
+        since=None,
+        until=None,
+        categoria=None,
+        dificultad=None,
+        cuantiles=CUANTILES,
+        incluir_archivo: bool = True,
+    ):
+        def _filtro(c):
+            filtro = [c.periodo == periodo]
+            if since is not None:
+                filtro.append(c.inicio >= inicio_de(periodo, since))
+            if until is not None:
+                filtro.append(c.inicio < until)
+            # las filas guardan los nombres canonicos; se acepta cualquier alias
+            if categoria:
+                filtro.append(c.categoria == CATEGORIAS.canonico(categoria))
+            if dificultad:
+                filtro.append(c.dificultad == DIFICULTADES.canonico(dificultad))
+            return filtro
+
+        # con archivo, los agregados de las respuestas archivadas se suman a los de la base principal
+        intervalos = archivo.union(AnswerRollup, incluir_archivo).c
+        bins = archivo.union(AnswerRollupTiempo, incluir_archivo).c
+
+        totales = db.execute(
+            select(
+                intervalos.inicio,
+                func.sum(intervalos.respondidas),
+                func.sum(intervalos.correctas),
+                func.sum(intervalos.con_tiempo),
+                func.sum(intervalos.tiempo_total_segundos),
+            )
+            .where(*_filtro(intervalos))
+            .group_by(intervalos.inicio)
+            .order_by(intervalos.inicio)
+        ).all()
+
+        sketches = {}
+        for inicio, indice, cantidad in db.execute(
+            select(bins.inicio, bins.indice, func.sum(bins.cantidad))
+            .where(*_filtro(bins))
+            .group_by(bins.inicio, bins.indice)
+        ):
+            if cantidad:
+                sketch = sketches.get(inicio)
+                if sketch is None:
+                    sketch = sketches[inicio] = DDSketch()
+                sketch.bins[indice] = cantidad
+
+        def _punto(respondidas, correctas, con_tiempo, tiempo, sketch):
+            return {
+                "respondidas": respondidas,
+                "correctas": correctas,
+                "tasa_acierto": round(correctas / respondidas, 4) if respondidas else 0,
+                "tiempo_promedio": round(tiempo / con_tiempo, 2) if con_tiempo else None,
+                "tiempo_cuantiles": {
+                    nombre_cuantil(q): (round(v, 2) if (v := sketch.cuantil(q)) is not None else None)
+                    for q in cuantiles
+                },
+            }
+
+        puntos, total, suma = [], DDSketch(), [0, 0, 0, 0]
+        for inicio, *valores in totales:
+            if not valores[0]:
+                continue
+            sketch = sketches.get(inicio, DDSketch())
+            total.combinar(sketch)
+            suma = [a + b for a, b in zip(suma, valores)]
+            puntos.append({"inicio": inicio, **_punto(*valores, sketch)})
+
+        return {"periodo": periodo, "total": _punto(*suma, total), "puntos": puntos}
+
+    # Agregados calculados directamente desde "answers" (por hora y por dia)
+    @staticmethod
+    def _calcular(db: Session):
+        # por la conexion (Core): filas como tuplas, sin el procesamiento del ORM
+        filas = db.connection().execute(
+            select(
+                Answer.created_at,
+                Question.categoria,
+                Question.dificultad,
+                Answer.es_correcta,
+                Answer.tiempo_respuesta_segundos,
+            )
+            .join(Question, Question.id == Answer.question_id)
+            .execution_options(stream_results=True, yield_per=LOTE_RECONSTRUCCION)
+        )
+        por_hora, tiempos_hora = RollupService._agrupar(filas)
+
+        totales, tiempos = {}, {}
+        for hora_acumulado, acumulado in ((por_hora, totales), (tiempos_hora, tiempos)):
+            for (hora, *resto), valor in hora_acumulado.items():
+                for periodo in PERIODOS:
+                    clave = (periodo, inicio_de(periodo, hora), *resto)
+                    if isinstance(valor, list):
+                        previo = acumulado.setdefault(clave, [0, 0, 0, 0])
+                        for i, v in enumerate(valor):
+                            previo[i] += v
+                    else:
+                        acumulado[clave] = acumulado.get(clave, 0) + valor
+        return totales, tiempos
+
+    @staticmethod
+    def _guardados(db: Session):
+        totales = {
+            (r.periodo, r.inicio, r.categoria, r.dificultad): [
+                r.respondidas, r.correctas, r.con_tiempo, r.tiempo_total_segundos
+            ]
+            for r in db.execute(select(AnswerRollup)).scalars()
+        }
+        tiempos = {
+            (r.periodo, r.inicio, r.categoria, r.dificultad, r.indice): r.cantidad
+            for r in db.execute(select(AnswerRollupTiempo)).scalars()
+        }
+        return totales, tiempos
+
+    # Reconstruccion completa (por ejemplo despues de un backfill)
+    @staticmethod
+    def reconstruir(db: Session):
+        totales, tiempos = RollupService._calcular(db)
+
+        db.execute(delete(AnswerRollup))
+        db.execute(delete(AnswerRollupTiempo))
+        columnas = ["respondidas", "correctas", "con_tiempo", "tiempo_total_segundos"]
+        filas = [
+            dict(zip(["periodo", "inicio", "categoria", "dificultad", *columnas], (*clave, *valores)))
+            for clave, valores in totales.items()
+        ]
+        bins = [
+            dict(zip(["periodo", "inicio", "categoria", "dificultad", "indice", "cantidad"], (*clave, cantidad)))
+            for clave, cantidad in tiempos.items()
+            if cantidad
+        ]
+        conn = db.connection()
+        for model, lista in ((AnswerRollup, filas), (AnswerRollupTiempo, bins)):
+            for i in range(0, len(lista), LOTE_RECONSTRUCCION):
+                conn.execute(insert(model.__table__), lista[i:i + LOTE_RECONSTRUCCION])
+        db.commit()
+
+        return {"intervalos": len(filas), "bins": len(bins)}
+
+    # Comparacion contra "answers" (sin modificar nada): claves con diferencias
+    @staticmethod
+    def verificar(db: Session):
+        def _diferencias(esperado, actual, vacio):
+            return sorted(
+                k for k in esperado.keys() | actual.keys()
+                if esperado.get(k, vacio) != actual.get(k, vacio)
+            )
+
+        totales, tiempos = RollupService._calcular(db)
+        guardados, guardados_tiempos = RollupService._guardados(db)
+        return {
+            "intervalos": _diferencias(totales, guardados, [0, 0, 0, 0]),
+            "bins": _diferencias(tiempos, guardados_tiempos, 0),
+        }
+
+    # Inicializacion para bases creadas antes de existir los agregados
+    @staticmethod
+    def inicializar(db: Session):
+        if db.query(AnswerRollup).first() is None and db.query(Answer).first() is not None:
+            RollupService.reconstruir(db)
+
+
+def main(argv=None):
+    from ..database import SessionLocal, engine
+    from .migration_service import MigrationService
+
+    parser = argparse.ArgumentParser(
+        description="Reconstruye o verifica los agregados por hora y por dia a partir de 'answers'."
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Solo informa diferencias, sin modificar los agregados",
+    )
+    args = parser.parse_args(argv)
+
+    MigrationService.migrar(engine)
+    db = SessionLocal()
+    try:
+        if args.check:
+            diferencias = RollupService.verificar(db)
+            print(f"Intervalos con diferencias: {len(diferencias['intervalos'])}")
+            print(f"Bins con diferencias: {len(diferencias['bins'])}")
+            return 1 if diferencias["intervalos"] or diferencias["bins"] else 0
+
+        resultado = RollupService.reconstruir(db)
+        print(f"Agregados reconstruidos: {resultado['intervalos']} intervalos, {resultado['bins']} bins")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,313 @@
+import argparse
+
+from sqlalchemy import and_, bindparam, case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from ..models.answer import Answer
+from ..models.question import Question
+from ..models.quiz_session import QuizSession
+from ..models.session_category_stats import SessionCategoryStats
+from .contadores import incrementar_varios
+from .ranking import COMPLETADA, ranking
+
+# Puntos que suma cada respuesta correcta
+PUNTOS_POR_ACIERTO = 10
+
+# Sesiones por sentencia al reparar (limite de parametros de SQLite)
+LOTE_REPARACION = 500
+
+# Incremento del progreso de una sesion; se arma una vez y se ejecuta con sus parametros
+_PROGRESO = (
+    update(QuizSession)
+    .where(QuizSession.id == bindparam("sid"))
+    .values(
+        preguntas_respondidas=func.coalesce(QuizSession.preguntas_respondidas, 0) + bindparam("d_respondidas"),
+        preguntas_correctas=func.coalesce(QuizSession.preguntas_correctas, 0) + bindparam("d_correctas"),
+        puntuacion_total=func.coalesce(QuizSession.puntuacion_total, 0)
+        + bindparam("d_correctas") * PUNTOS_POR_ACIERTO,
+    )
+    .execution_options(synchronize_session=False)
+)
+_PROGRESO_RANKING = _PROGRESO.returning(
+    QuizSession.estado, QuizSession.puntuacion_total, QuizSession.tiempo_total_segundos
+)
+
+# Completar una sesion solo si sigue en progreso; devuelve la puntuacion que tiene la
+# fila en ese momento (incluye las respuestas confirmadas despues de leer la sesion)
+_COMPLETAR = (
+    update(QuizSession)
+    .where(QuizSession.id == bindparam("sid"), QuizSession.estado == "en_progreso")
+    .returning(QuizSession.puntuacion_total, QuizSession.tiempo_total_segundos)
+    .execution_options(synchronize_session=False)
+)
+
+
+class SessionCounterService:
+    """Progreso de cada sesion (respondidas, correctas, puntuacion) mantenido en vivo.
+
+    Cada respuesta nueva o modificada actualiza la fila de su sesion con
+    ``UPDATE x = x + n`` en la misma transaccion (el commit lo hace quien llama),
+    por lo que completar una sesion no necesita recorrer sus respuestas.
+    Tambien se cuentan los aciertos por sesion y categoria (``session_category_stats``)
+    para el leaderboard por categoria.
+    """
+
+    @staticmethod
+    def _progreso(db: Session, session_id: int, respondidas: int, correctas: int):
+        if not respondidas and not correctas:
+            return
+
+        params = {"sid": session_id, "d_respondidas": respondidas, "d_correctas": correctas}
+        if correctas:
+            # si la sesión ya está completada cambia su lugar en el ranking
+            fila = db.execute(_PROGRESO_RANKING, params).first()
+            if fila is not None and fila.estado == COMPLETADA:
+                anterior = fila.puntuacion_total - correctas * PUNTOS_POR_ACIERTO
+                ranking.pendiente(
+                    db, session_id,
+                    (anterior, fila.tiempo_total_segundos),
+                    (fila.puntuacion_total, fila.tiempo_total_segundos),
+                )
+        else:
+            db.execute(_PROGRESO, params)
+
+    @staticmethod
+    def _incrementar(db: Session, session_id: int, categoria, respondidas: int, correctas: int):
+        if not respondidas and not correctas:
+            return
+
+        SessionCounterService._progreso(db, session_id, respondidas, correctas)
+
+        if categoria is None:
+            return
+        actualizadas = db.execute(
+            update(SessionCategoryStats)
+            .where(
+                SessionCategoryStats.quiz_session_id == session_id,
+                SessionCategoryStats.categoria == categoria,
+            )
+            .values(
+                respondidas=SessionCategoryStats.respondidas + respondidas,
+                correctas=SessionCategoryStats.correctas + correctas,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if actualizadas == 0:
+            db.execute(insert(SessionCategoryStats).values(
+                quiz_session_id=session_id, categoria=categoria, respondidas=respondidas, correctas=correctas
+            ))
+
+    # Nueva Respuesta
+    @staticmethod
+    def registrar_respuesta(db: Session, respuesta: Answer, categoria: str):
+        SessionCounterService._incrementar(
+            db, respuesta.quiz_session_id, categoria, 1, 1 if respuesta.es_correcta else 0
+        )
+
+    # Varias Respuestas Nuevas (un UPDATE por sesion; los aciertos por categoria, en lote)
+    @staticmethod
+    def registrar_respuestas(db: Session, respuestas):
+        """``respuestas``: iterable de pares (Answer, categoria de su pregunta)."""
+        por_sesion, por_categoria = {}, {}
+        for r, categoria in respuestas:
+            correcta = 1 if r.es_correcta else 0
+            respondidas, correctas = por_sesion.get(r.quiz_session_id, (0, 0))
+            por_sesion[r.quiz_session_id] = (respondidas + 1, correctas + correcta)
+            if categoria is not None:
+                clave = (r.quiz_session_id, categoria)
+                previo = por_categoria.get(clave) or {"respondidas": 0, "correctas": 0}
+                por_categoria[clave] = {
+                    "respondidas": previo["respondidas"] + 1, "correctas": previo["correctas"] + correcta
+                }
+
+        for session_id, (respondidas, correctas) in por_sesion.items():
+            SessionCounterService._progreso(db, session_id, respondidas, correctas)
+        incrementar_varios(db, SessionCategoryStats, ("quiz_session_id", "categoria"), por_categoria)
+
+    # Respuesta Modificada (puede pasar de correcta a incorrecta o viceversa)
+    @staticmethod
+    def actualizar_respuesta(db: Session, respuesta: Answer, categoria, era_correcta: bool):
+        SessionCounterService._incrementar(
+            db, respuesta.quiz_session_id, categoria, 0,
+            int(bool(respuesta.es_correcta)) - int(bool(era_correcta)),
+        )
+
+    # Sesion Completada: entra al ranking (False si ya no estaba en progreso)
+    @staticmethod
+    def completar_sesion(db: Session, session_id: int, **valores) -> bool:
+        """Pasa la sesion a completada con un solo UPDATE condicional.
+
+        ``valores``: columnas que se actualizan junto con el estado (``fecha_fin``,
+        ``tiempo_total_segundos``). Dos requests concurrentes no pueden completar la
+        misma sesion, y el ranking usa la puntuacion que devuelve el UPDATE.
+        """
+        fila = db.execute(_COMPLETAR.values(estado=COMPLETADA, **valores), {"sid": session_id}).first()
+        if fila is None:
+            return False
+        ranking.pendiente(db, session_id, None, (fila.puntuacion_total or 0, fila.tiempo_total_segundos))
+        return True
+
+    # Sesion Borrada: sus aciertos por categoria y su lugar en el ranking
+    @staticmethod
+    def quitar_sesion(db: Session, session: QuizSession):
+        db.execute(delete(SessionCategoryStats).where(SessionCategoryStats.quiz_session_id == session.id))
+        if session.estado == COMPLETADA:
+            ranking.pendiente(
+                db, session.id, (session.puntuacion_total or 0, session.tiempo_total_segundos), None
+            )
+
+    # Pregunta que cambia de Categoria: se recalculan las filas de las sesiones que la respondieron
+    @staticmethod
+    def cambiar_categoria(db: Session, question_id: int, anterior: str, nueva: str):
+        """Se llama despues de asignar (y hacer flush de) la nueva categoria de la pregunta."""
+        if anterior == nueva:
+            return
+        sesiones = select(Answer.quiz_session_id).where(Answer.question_id == question_id)
+        filtro = and_(
+            SessionCategoryStats.quiz_session_id.in_(sesiones),
+            SessionCategoryStats.categoria.in_([anterior, nueva]),
+        )
+        db.execute(delete(SessionCategoryStats).where(filtro).execution_options(synchronize_session=False))
+        db.execute(
+            insert(SessionCategoryStats).from_select(
+                ["quiz_session_id", "categoria", "respondidas", "correctas"],
+                SessionCounterService._por_categoria().where(
+                    Answer.quiz_session_id.in_(sesiones),
+                    Question.categoria.in_([anterior, nueva]),
+                ),
+            )
+        )
+
+    # Aciertos por sesion y categoria calculados desde "answers"
+    @staticmethod
+    def _por_categoria():
+        return (
+            select(
+                Answer.quiz_session_id,
+                Question.categoria,
+                func.count(Answer.id),
+                func.sum(case((Answer.es_correcta == True, 1), else_=0)),
+            )
+            .join(Question, Question.id == Answer.question_id)
+            .group_by(Answer.quiz_session_id, Question.categoria_id)
+        )
+
+    # Valores esperados calculados desde "answers"
+    @staticmethod
+    def _agregados():
+        return (
+            select(
+                Answer.quiz_session_id.label("session_id"),
+                func.count(Answer.id).label("respondidas"),
+                func.sum(case((Answer.es_correcta == True, 1), else_=0)).label("correctas"),
+            )
+            .group_by(Answer.quiz_session_id)
+            .subquery()
+        )
+
+    # Sesiones cuyos contadores no coinciden con sus respuestas (sin modificar nada)
+    @staticmethod
+    def verificar(db: Session):
+        agregados = SessionCounterService._agregados()
+        respondidas = func.coalesce(agregados.c.respondidas, 0)
+        correctas = func.coalesce(agregados.c.correctas, 0)
+
+        ids = {
+            session_id
+            for (session_id,) in db.execute(
+                select(QuizSession.id)
+                .outerjoin(agregados, agregados.c.session_id == QuizSession.id)
+                .where(
+                    (func.coalesce(QuizSession.preguntas_respondidas, 0) != respondidas)
+                    | (func.coalesce(QuizSession.preguntas_correctas, 0) != correctas)
+                    | (func.coalesce(QuizSession.puntuacion_total, 0) != correctas * PUNTOS_POR_ACIERTO)
+                )
+            )
+        }
+
+        # aciertos por categoria
+        esperado = {
+            (session_id, categoria): (respondidas, correctas)
+            for session_id, categoria, respondidas, correctas in db.execute(SessionCounterService._por_categoria())
+        }
+        actual = {
+            (s.quiz_session_id, s.categoria): (s.respondidas, s.correctas)
+            for s in db.query(SessionCategoryStats).all()
+        }
+        ids.update(
+            clave[0] for clave in esperado.keys() | actual.keys()
+            if esperado.get(clave, (0, 0)) != actual.get(clave, (0, 0))
+        )
+        return sorted(ids)
+
+    # Recalcula desde "answers" las sesiones con diferencias
+    @staticmethod
+    def reparar(db: Session):
+        ids = SessionCounterService.verificar(db)
+
+        respondidas = (
+            select(func.count(Answer.id))
+            .where(Answer.quiz_session_id == QuizSession.id)
+            .scalar_subquery()
+        )
+        correctas = (
+            select(func.coalesce(func.sum(case((Answer.es_correcta == True, 1), else_=0)), 0))
+            .where(Answer.quiz_session_id == QuizSession.id)
+            .scalar_subquery()
+        )
+        for i in range(0, len(ids), LOTE_REPARACION):
+            lote = ids[i:i + LOTE_REPARACION]
+            db.execute(
+                update(QuizSession)
+                .where(QuizSession.id.in_(lote))
+                .values(
+                    preguntas_respondidas=respondidas,
+                    preguntas_correctas=correctas,
+                    puntuacion_total=correctas * PUNTOS_POR_ACIERTO,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.execute(delete(SessionCategoryStats).where(SessionCategoryStats.quiz_session_id.in_(lote)))
+            db.execute(
+                insert(SessionCategoryStats).from_select(
+                    ["quiz_session_id", "categoria", "respondidas", "correctas"],
+                    SessionCounterService._por_categoria().where(Answer.quiz_session_id.in_(lote)),
+                )
+            )
+        db.commit()
+        if ids:
+            # las puntuaciones cambiaron fuera del ranking: se vuelve a cargar
+            ranking.invalidar()
+        return ids
+
+
+def main(argv=None):
+    from ..database import SessionLocal, engine
+    from .migration_service import MigrationService
+
+    parser = argparse.ArgumentParser(
+        description="Verifica y repara los contadores de progreso de las sesiones a partir de 'answers'."
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Solo informa las sesiones con diferencias, sin modificarlas",
+    )
+    args = parser.parse_args(argv)
+
+    MigrationService.migrar(engine)
+    db = SessionLocal()
+    try:
+        if args.check:
+            ids = SessionCounterService.verificar(db)
+            print(f"Sesiones con diferencias: {len(ids)}" + (f" (ej.: {ids[:20]})" if ids else ""))
+            return 1 if ids else 0
+
+        ids = SessionCounterService.reparar(db)
+        print(f"Sesiones reparadas: {len(ids)}")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
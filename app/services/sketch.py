@@ -0,0 +1,63 @@
+import math
+
+# Error relativo de los cuantiles (1%)
+PRECISION = 0.01
+
+# Indice reservado para los valores <= 0 (los positivos empiezan en el indice 0, el del 1)
+INDICE_CERO = -(2**31)
+
+
+class DDSketch:
+    """Sketch de cuantiles con error relativo acotado (DDSketch, Masson et al. 2019).
+
+    Cada valor positivo cae en el bin ``ceil(log_gamma(valor))``, con
+    ``gamma = (1 + a) / (1 - a)``: el cuantil devuelto difiere del real en menos de
+    ``a`` (relativo). Los bins son solo contadores, por lo que dos sketches se
+    combinan sumandolos y se pueden guardar como filas (indice, cantidad) que se
+    incrementan con ``UPDATE``, igual que el resto de los contadores.
+    """
+
+    gamma = (1 + PRECISION) / (1 - PRECISION)
+    _log_gamma = math.log(gamma)
+
+    def __init__(self, bins=None):
+        self.bins = dict(bins or {})
+
+    @classmethod
+    def indice(cls, valor) -> int:
+        if valor <= 0:
+            return INDICE_CERO
+        return math.ceil(math.log(valor) / cls._log_gamma)
+
+    @classmethod
+    def valor(cls, indice: int) -> float:
+        """Valor representativo del bin (punto medio en escala relativa)."""
+        if indice == INDICE_CERO:
+            return 0.0
+        return 2 * cls.gamma ** indice / (cls.gamma + 1)
+
+    @property
+    def cantidad(self) -> int:
+        return sum(self.bins.values())
+
+    def agregar(self, valor, n: int = 1):
+        i = self.indice(valor)
+        self.bins[i] = self.bins.get(i, 0) + n
+
+    def combinar(self, otro: "DDSketch"):
+        for i, n in otro.bins.items():
+            self.bins[i] = self.bins.get(i, 0) + n
+        return self
+
+    def cuantil(self, q: float):
+        """Valor aproximado del cuantil ``q`` (0..1); None si el sketch esta vacio."""
+        total = self.cantidad
+        if total <= 0:
+            return None
+        rango = q * (total - 1)
+        acumulado = 0
+        for i in sorted(self.bins):
+            acumulado += self.bins[i]
+            if acumulado > rango:
+                return self.valor(i)
+        return self.valor(max(self.bins))
@@ -0,0 +1,248 @@
+import argparse
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from ..models.answer import Answer
+from ..models.category_stats import CategoryStats
+from ..models.question import Question
+from ..models.question_stats import QuestionStats
+from .contadores import incrementar_varios
+
+
+class StatsCounterService:
+    """Contadores de respuestas por pregunta y por categoria.
+
+    Se actualizan en la misma transaccion que la escritura de la respuesta
+    (el commit lo hace quien llama), de modo que las estadisticas leen filas
+    precalculadas en lugar de recorrer la tabla ``answers``.
+    """
+
+    # Incremento atomico (UPDATE x = x + n, o INSERT si la fila no existe)
+    @staticmethod
+    def _incrementar(db: Session, model, clave: dict, **deltas):
+        deltas = {k: v for k, v in deltas.items() if v}
+        if not deltas:
+            return
+
+        filtro = [getattr(model, k) == v for k, v in clave.items()]
+        actualizadas = db.execute(
+            update(model)
+            .where(*filtro)
+            .values({getattr(model, k): getattr(model, k) + v for k, v in deltas.items()})
+        ).rowcount
+
+        if actualizadas == 0:
+            valores = {"respondidas": 0, "incorrectas": 0, "tiempo_total_segundos": 0}
+            valores.update(deltas)
+            db.execute(insert(model).values(**clave, **valores))
+
+    @staticmethod
+    def _aplicar(db: Session, question_id: int, categoria: str, **deltas):
+        StatsCounterService._incrementar(db, QuestionStats, {"question_id": question_id}, **deltas)
+        StatsCounterService._incrementar(db, CategoryStats, {"categoria": categoria}, **deltas)
+
+    # Nueva Respuesta
+    @staticmethod
+    def registrar_respuesta(db: Session, respuesta: Answer, categoria: str):
+        StatsCounterService._aplicar(
+            db,
+            respuesta.question_id,
+            categoria,
+            respondidas=1,
+            incorrectas=0 if respuesta.es_correcta else 1,
+            tiempo_total_segundos=respuesta.tiempo_respuesta_segundos or 0,
+        )
+
+    # Varias Respuestas Nuevas (un incremento por pregunta y por categoria, en lote)
+    @staticmethod
+    def registrar_respuestas(db: Session, respuestas, signo: int = 1, modelos=(QuestionStats, CategoryStats)):
+        """``respuestas``: iterable de pares (Answer, categoria de su pregunta).
+
+        Con ``signo=-1`` descuenta las respuestas en lugar de sumarlas. ``modelos``: las
+        tablas por pregunta y por categoria (el archivo de sesiones tiene las suyas).
+        """
+        por_pregunta, por_categoria = {}, {}
+
+        for respuesta, categoria in respuestas:
+            delta = (
+                signo,
+                0 if respuesta.es_correcta else signo,
+                signo * (respuesta.tiempo_respuesta_segundos or 0),
+            )
+            for acumulado, clave in ((por_pregunta, respuesta.question_id), (por_categoria, categoria)):
+                previo = acumulado.get(clave, (0, 0, 0))
+                acumulado[clave] = tuple(a + b for a, b in zip(previo, delta))
+
+        for model, nombre, acumulado in zip(
+            modelos, ("question_id", "categoria"), (por_pregunta, por_categoria)
+        ):
+            incrementar_varios(
+                db, model, (nombre,),
+                {
+                    (clave,): {"respondidas": respondidas, "incorrectas": incorrectas, "tiempo_total_segundos": tiempo}
+                    for clave, (respondidas, incorrectas, tiempo) in acumulado.items()
+                },
+            )
+
+    # Respuestas Borradas (por ejemplo, con su sesion)
+    @staticmethod
+    def eliminar_respuestas(db: Session, respuestas):
+        StatsCounterService.registrar_respuestas(db, respuestas, signo=-1)
+
+    # Respuesta Modificada
+    @staticmethod
+    def actualizar_respuesta(
+        db: Session,
+        respuesta: Answer,
+        categoria: str,
+        era_correcta: bool,
+        tiempo_anterior,
+    ):
+        StatsCounterService._aplicar(
+            db,
+            respuesta.question_id,
+            categoria,
+            incorrectas=int(bool(era_correcta)) - int(bool(respuesta.es_correcta)),
+            tiempo_total_segundos=(respuesta.tiempo_respuesta_segundos or 0) - (tiempo_anterior or 0),
+        )
+
+    # Pregunta que cambia de Categoria: mover sus contadores
+    @staticmethod
+    def cambiar_categoria(db: Session, question_id: int, anterior: str, nueva: str):
+        if anterior == nueva:
+            return
+
+        stats = db.get(QuestionStats, question_id)
+        if not stats or stats.respondidas == 0:
+            return
+
+        StatsCounterService._incrementar(
+            db, CategoryStats, {"categoria": anterior},
+            respondidas=-stats.respondidas,
+            incorrectas=-stats.incorrectas,
+            tiempo_total_segundos=-stats.tiempo_total_segundos,
+        )
+        StatsCounterService._incrementar(
+            db, CategoryStats, {"categoria": nueva},
+            respondidas=stats.respondidas,
+            incorrectas=stats.incorrectas,
+            tiempo_total_segundos=stats.tiempo_total_segundos,
+        )
+
+    # Agregados calculados directamente desde "answers" (una respuesta con es_correcta NULL,
+    # de bases anteriores a la restriccion, cuenta como incorrecta, igual que en los incrementos)
+    @staticmethod
+    def _agregados_por_pregunta():
+        return (
+            select(
+                Answer.question_id,
+                func.count(Answer.id),
+                func.sum(case((Answer.es_correcta.isnot(True), 1), else_=0)),
+                func.coalesce(func.sum(Answer.tiempo_respuesta_segundos), 0),
+            )
+            .join(Question, Question.id == Answer.question_id)
+            .group_by(Answer.question_id)
+        )
+
+    @staticmethod
+    def _agregados_por_categoria():
+        return (
+            select(
+                Question.categoria,
+                func.count(Answer.id),
+                func.sum(case((Answer.es_correcta.isnot(True), 1), else_=0)),
+                func.coalesce(func.sum(Answer.tiempo_respuesta_segundos), 0),
+            )
+            .join(Question, Question.id == Answer.question_id)
+            .group_by(Question.categoria_id)
+        )
+
+    # Reconstruccion completa (por ejemplo despues de un backfill)
+    @staticmethod
+    def reconstruir(db: Session):
+        columnas = ["respondidas", "incorrectas", "tiempo_total_segundos"]
+
+        db.execute(delete(QuestionStats))
+        db.execute(delete(CategoryStats))
+        db.execute(
+            insert(QuestionStats).from_select(
+                ["question_id", *columnas], StatsCounterService._agregados_por_pregunta()
+            )
+        )
+        db.execute(
+            insert(CategoryStats).from_select(
+                ["categoria", *columnas], StatsCounterService._agregados_por_categoria()
+            )
+        )
+        db.commit()
+
+        return {
+            "preguntas": db.query(QuestionStats).count(),
+            "categorias": db.query(CategoryStats).count(),
+        }
+
+    # Comparacion de los contadores contra "answers" (sin modificar nada)
+    @staticmethod
+    def verificar(db: Session):
+        def _diferencias(model, clave, esperado_sql):
+            esperado = {fila[0]: tuple(fila[1:]) for fila in db.execute(esperado_sql)}
+            actual = {
+                getattr(s, clave): (s.respondidas, s.incorrectas, s.tiempo_total_segundos)
+                for s in db.query(model).all()
+            }
+            return sorted(
+                k for k in esperado.keys() | actual.keys()
+                if esperado.get(k, (0, 0, 0)) != actual.get(k, (0, 0, 0))
+            )
+
+        return {
+            "preguntas": _diferencias(
+                QuestionStats, "question_id", StatsCounterService._agregados_por_pregunta()
+            ),
+            "categorias": _diferencias(
+                CategoryStats, "categoria", StatsCounterService._agregados_por_categoria()
+            ),
+        }
+
+    # Inicializacion para bases creadas antes de existir los contadores
+    @staticmethod
+    def inicializar(db: Session):
+        if db.query(QuestionStats).first() is None and db.query(Answer).first() is not None:
+            StatsCounterService.reconstruir(db)
+
+
+def main(argv=None):
+    from ..database import SessionLocal, engine
+    from .migration_service import MigrationService
+
+    parser = argparse.ArgumentParser(
+        description="Reconstruye o verifica los contadores de estadisticas a partir de 'answers'."
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Solo informa diferencias, sin modificar los contadores",
+    )
+    args = parser.parse_args(argv)
+
+    MigrationService.migrar(engine)
+    db = SessionLocal()
+    try:
+        if args.check:
+            diferencias = StatsCounterService.verificar(db)
+            print(f"Preguntas con diferencias: {diferencias['preguntas']}")
+            print(f"Categorias con diferencias: {diferencias['categorias']}")
+            return 1 if diferencias["preguntas"] or diferencias["categorias"] else 0
+
+        resultado = StatsCounterService.reconstruir(db)
+        print(
+            f"Contadores reconstruidos: {resultado['preguntas']} preguntas, "
+            f"{resultado['categorias']} categorias"
+        )
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
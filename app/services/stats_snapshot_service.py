@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+from ..config import settings
+from ..database import SessionLocal
+from .quiz_service import QuizService
+
+logger = logging.getLogger(__name__)
+
+# Estadisticas que se materializan y la funcion que las calcula
+CALCULOS = {
+    "global": QuizService.estadisticas_globales,
+    "categorias": QuizService.estadisticas_por_categoria,
+}
+
+
+class Snapshot:
+    def __init__(self, datos, generated_at: datetime):
+        self.datos = datos
+        self.generated_at = generated_at
+        self.generado = time.monotonic()
+
+    @property
+    def edad(self) -> float:
+        return time.monotonic() - self.generado
+
+
+class StatsSnapshots:
+    """Resultados precalculados de las estadisticas globales y por categoria.
+
+    Un thread en segundo plano los recalcula cada ``intervalo`` segundos, o antes
+    si se registraron ``umbral_respuestas`` respuestas nuevas. Los requests leen el
+    ultimo resultado sin consultar la base (aunque haya uno nuevo en calculo); solo
+    el primer request, o uno con ``fresh=True``, calcula en el momento.
+    Con ``intervalo`` 0 no se usan snapshots y cada request calcula.
+
+    Hay un snapshot por estadistica con y sin las sesiones archivadas (``archivo``);
+    el que no se pidio nunca no se calcula.
+    """
+
+    def __init__(self, intervalo: float, umbral_respuestas: int):
+        self.intervalo = intervalo
+        self.umbral_respuestas = umbral_respuestas
+        self._snapshots = {}
+        self._nuevas = 0
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._thread = None
+
+    @property
+    def habilitado(self) -> bool:
+        return self.intervalo > 0
+
+    def _calcular(self, nombre: str, archivo: bool = True) -> Snapshot:
+        generated_at = datetime.utcnow()
+        with SessionLocal() as db:
+            snapshot = Snapshot(CALCULOS[nombre](db, archivo), generated_at)
+        self._snapshots[nombre, archivo] = snapshot
+        return snapshot
+
+    def refrescar(self):
+        self._nuevas = 0
+        for nombre, archivo in {(nombre, True) for nombre in CALCULOS} | set(self._snapshots):
+            self._calcular(nombre, archivo)
+
+    def obtener(self, nombre: str, fresh: bool = False, archivo: bool = True) -> Snapshot:
+        if not self.habilitado or fresh:
+            return self._calcular(nombre, archivo)
+
+        snapshot = self._snapshots.get((nombre, archivo))
+        if snapshot is None:
+            with self._lock:
+                self._iniciar()
+                # otro request pudo haberlo calculado mientras se esperaba el lock
+                snapshot = self._snapshots.get((nombre, archivo)) or self._calcular(nombre, archivo)
+        return snapshot
+
+    # Respuestas nuevas o modificadas: al llegar al umbral se adelanta el recalculo
+    def notificar_respuestas(self, cantidad: int = 1):
+        if not self.habilitado or self.umbral_respuestas <= 0:
+            return
+        self._nuevas += cantidad
+        if self._nuevas >= self.umbral_respuestas:
+            self._despertar.set()
+
+    def _iniciar(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._detener.clear()
+        self._thread = threading.Thread(target=self._bucle, name="stats-snapshots", daemon=True)
+        self._thread.start()
+
+    def _bucle(self):
+        while True:
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            if self._detener.is_set():
+                return
+            inicio = time.perf_counter()
+            try:
+                self.refrescar()
+            except Exception:
+                logger.exception("Error al recalcular las estadisticas")
+                continue
+            logger.debug("Estadisticas recalculadas en %.1f ms", (time.perf_counter() - inicio) * 1000)
+
+    def detener(self):
+        self._detener.set()
+        self._despertar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._snapshots.clear()
+
+
+stats_snapshots = StatsSnapshots(settings.stats_snapshot_interval, settings.stats_snapshot_answers)
@@ -0,0 +1,177 @@
+"""Inicio y cierre de la app (lifespan de FastAPI).
+
+Al importar ``app.main`` no se toca la base: el esquema, las migraciones y la
+inicializacion de los agregados se hacen al iniciar cada worker, con un lock de
+archivo para que con varios workers (``uvicorn --workers``, gunicorn) uno solo
+ejecute el DDL mientras los demas esperan y luego encuentran la base al dia.
+Despues cada worker precarga sus caches en memoria y abre conexiones del pool.
+Al cerrar se detienen los threads en segundo plano y se cierran las conexiones.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from sqlalchemy.engine import make_url
+
+from .config import settings
+from .database import DATABASE_URL, SessionLocal, async_engine, engine, log_configuracion
+from .services.archive_service import ArchiveService
+from .services.migration_service import MigrationService
+from .services.question_index import question_index
+from .services.ranking import ranking
+from .services.rollup_service import RollupService
+from .services.stats_counter_service import StatsCounterService
+from .services.stats_snapshot_service import CALCULOS, stats_snapshots
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Lock entre procesos
+
+
+def archivo_lock() -> str:
+    """Archivo del lock de inicializacion: junto a la base SQLite, o en el directorio temporal."""
+    if settings.startup_lock_file:
+        return settings.startup_lock_file
+    url = make_url(DATABASE_URL)
+    if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+        return os.path.abspath(url.database) + ".lock"
+    clave = hashlib.sha1(url.render_as_string(hide_password=True).encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"quiz-api-{clave}.lock")
+
+
+@contextmanager
+def bloqueo_archivo(path: str):
+    """Lock exclusivo sobre ``path`` (bloquea hasta obtenerlo). El archivo no se borra."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK reintenta durante 10 s y luego falla: se sigue esperando
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# ---------------------------------------------------------------------------
+# Pasos del inicio
+
+
+def inicializar_esquema():
+    """Tablas, migraciones pendientes y agregados faltantes (una vez por base)."""
+    with bloqueo_archivo(archivo_lock()):
+        MigrationService.migrar(engine)
+        ArchiveService.inicializar(engine)
+        with SessionLocal() as db:
+            StatsCounterService.inicializar(db)
+            RollupService.inicializar(db)
+
+
+def _precargar_estadisticas(db):
+    # obtener() calcula el primer resultado y arranca el thread que lo mantiene
+    if stats_snapshots.habilitado:
+        for nombre in CALCULOS:
+            stats_snapshots.obtener(nombre)
+
+
+# Caches que se cargan al iniciar en lugar de en el primer request que las usa
+PRECARGAS = {
+    "indice de preguntas": question_index.cargar,
+    "ranking de sesiones": ranking.cargar,
+    "estadisticas": _precargar_estadisticas,
+}
+
+
+def registrar_precarga(nombre: str, funcion):
+    """Agrega ``funcion(db)`` a las precargas del inicio."""
+    PRECARGAS[nombre] = funcion
+
+
+def precargar():
+    """Ejecuta las precargas; un error se registra y no impide iniciar (la cache se carga al usarla)."""
+    for nombre, funcion in PRECARGAS.items():
+        inicio = time.perf_counter()
+        try:
+            with SessionLocal() as db:
+                funcion(db)
+        except Exception:
+            logger.exception("Error al precargar %s", nombre)
+            continue
+        logger.debug("Precarga de %s: %.1f ms", nombre, (time.perf_counter() - inicio) * 1000)
+
+
+def _conexiones_a_abrir() -> int:
+    return max(0, min(settings.db_pool_prewarm, settings.db_pool_size))
+
+
+def precalentar_pool():
+    """Abre conexiones del pool (y aplica sus PRAGMAs) antes del primer request."""
+    conexiones = []
+    try:
+        for _ in range(_conexiones_a_abrir()):
+            conexiones.append(engine.connect())
+    finally:
+        for conn in conexiones:
+            conn.close()
+
+
+async def precalentar_pool_async():
+    conexiones = await asyncio.gather(*(async_engine.connect() for _ in range(_conexiones_a_abrir())))
+    for conn in conexiones:
+        await conn.close()
+
+
+def iniciar():
+    inicializar_esquema()
+    if settings.startup_warmup:
+        precargar()
+    precalentar_pool()
+
+
+def cerrar():
+    """Detiene los threads en segundo plano (escribiendo lo pendiente) y cierra el pool."""
+    stats_snapshots.detener()
+    if settings.answer_write_behind:
+        from .services.answer_writer import answer_writer
+
+        answer_writer.detener()
+    engine.dispose()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    inicio = time.perf_counter()
+    iniciar()
+    if async_engine is not None:
+        await precalentar_pool_async()
+    log_configuracion()
+    logger.info("App iniciada en %.0f ms", (time.perf_counter() - inicio) * 1000)
+    try:
+        yield
+    finally:
+        cerrar()
+        if async_engine is not None:
+            await async_engine.dispose()
@@ -0,0 +1 @@
+"""Benchmarks de rendimiento para la Quiz API."""
@@ -0,0 +1,132 @@
+"""Utilidades compartidas por los benchmarks: bases temporales, datos y conteo de SQL."""
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.catalogo import codificar
+from app.models.answer import Answer
+from app.models.question import Question
+from app.models.quiz_session import QuizSession
+from app.services.migration_service import MigrationService
+from app.services.rollup_service import RollupService
+from app.services.stats_counter_service import StatsCounterService
+
+CATEGORIAS = ["tecnologia", "historia", "ciencia", "general", "geografia", "arte"]
+DIFICULTADES = ["facil", "medio", "dificil"]
+
+
+def crear_engine(path):
+    """Crea un engine SQLite sobre ``path`` con el esquema de la app."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    MigrationService.migrar(engine)
+    return engine
+
+
+def crear_engine_temporal():
+    """Crea un engine SQLite sobre un archivo temporal con el esquema de la app."""
+    fd, path = tempfile.mkstemp(suffix=".db", prefix="quiz_bench_")
+    os.close(fd)
+    return crear_engine(path), path
+
+
+def sesion_para(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def sembrar(engine, n_preguntas, n_sesiones, respuestas_por_sesion, seed=1234):
+    """Genera datos deterministas: preguntas, sesiones completadas y sus respuestas."""
+    rnd = random.Random(seed)
+    base = datetime(2024, 1, 1)
+
+    preguntas = [
+        codificar({
+            "pregunta": f"Pregunta {i}",
+            "opciones": ["a", "b", "c", "d"],
+            "respuesta_correcta": rnd.randrange(4),
+            "explicacion": f"Explicacion {i}",
+            "categoria": CATEGORIAS[i % len(CATEGORIAS)],
+            "dificultad": DIFICULTADES[i % len(DIFICULTADES)],
+            "created_at": base,
+            "is_active": True,
+        })
+        for i in range(n_preguntas)
+    ]
+    correctas = [p["respuesta_correcta"] for p in preguntas]
+
+    with engine.begin() as conn:
+        if preguntas:
+            conn.execute(insert(Question), preguntas)
+
+        sesiones, respuestas = [], []
+        for s in range(1, n_sesiones + 1):
+            inicio = base + timedelta(minutes=s)
+            ids = rnd.sample(range(1, n_preguntas + 1), min(respuestas_por_sesion, n_preguntas))
+            aciertos = 0
+            for qid in ids:
+                elegida = rnd.randrange(4)
+                ok = elegida == correctas[qid - 1]
+                aciertos += ok
+                respuestas.append({
+                    "quiz_session_id": s,
+                    "question_id": qid,
+                    "respuesta_seleccionada": elegida,
+                    "es_correcta": ok,
+                    "tiempo_respuesta_segundos": rnd.randint(1, 60),
+                    "created_at": inicio,
+                })
+            sesiones.append({
+                "usuario_nombre": f"user{s}",
+                "fecha_inicio": inicio,
+                "fecha_fin": inicio + timedelta(minutes=5),
+                "puntuacion_total": aciertos * 10,
+                "preguntas_respondidas": len(ids),
+                "preguntas_correctas": aciertos,
+                "estado": "completado",
+                "tiempo_total_segundos": 300,
+                "created_at": inicio,
+            })
+            # las respuestas se insertan por bloques para no acumularlas todas en memoria
+            if len(respuestas) >= 50_000:
+                conn.execute(insert(Answer), respuestas)
+                respuestas = []
+        if sesiones:
+            conn.execute(insert(QuizSession), sesiones)
+        if respuestas:
+            conn.execute(insert(Answer), respuestas)
+
+    with sesion_para(engine) as db:
+        StatsCounterService.reconstruir(db)
+        RollupService.reconstruir(db)
+
+
+class ContadorSQL:
+    """Cuenta las sentencias SQL emitidas por un engine mientras esta activo."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.total = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+
+    def __enter__(self):
+        self.total = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@contextmanager
+def cronometro():
+    resultado = {}
+    inicio = time.perf_counter()
+    yield resultado
+    resultado["ms"] = (time.perf_counter() - inicio) * 1000
@@ -0,0 +1,191 @@
+"""Benchmark de concurrencia: modo sincronico (threadpool) vs. modo async (DB_ASYNC=1).
+
+Uso:
+    python -m benchmarks.bench_concurrency [--clientes 50,100,250,500] [--segundos 10] [--escrituras 0.2]
+
+Para cada modo se levanta un ``uvicorn`` real sobre una base temporal ya sembrada
+y se lo carga con N clientes concurrentes que repiten una mezcla del flujo del
+quiz: consultar sesion, pregunta y estadisticas de sesion (en partes iguales) y
+registrar respuestas (fraccion ``--escrituras``). Se informa requests/s,
+latencias p50/p95 de los requests exitosos y errores.
+
+Los clientes usan un cliente HTTP/1.1 keep-alive minimo sobre asyncio: con cientos
+de conexiones, un cliente de proposito general consume mas CPU que el servidor
+medido y termina siendo el cuello de botella.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from ._common import crear_engine, sembrar
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+N_PREGUNTAS = 2000
+N_SESIONES = 2000
+TIMEOUT = 60
+
+
+class ConexionHttp:
+    """Una conexion keep-alive; solo lo necesario para JSON con Content-Length."""
+
+    def __init__(self, host, puerto):
+        self.host, self.puerto = host, puerto
+        self.reader = self.writer = None
+
+    async def request(self, metodo, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.puerto)
+
+        datos = json.dumps(body).encode() if body is not None else b""
+        self.writer.write(
+            f"{metodo} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(datos)}\r\n\r\n".encode()
+            + datos
+        )
+        try:
+            cabecera = await asyncio.wait_for(self.reader.readuntil(b"\r\n\r\n"), TIMEOUT)
+            lineas = cabecera.decode("latin-1").split("\r\n")
+            status = int(lineas[0].split()[1])
+            largo = next(
+                int(l.split(":", 1)[1]) for l in lineas if l.lower().startswith("content-length:")
+            )
+            cuerpo = await asyncio.wait_for(self.reader.readexactly(largo), TIMEOUT)
+        except Exception:
+            await self.cerrar()
+            raise
+        return status, cuerpo
+
+    async def cerrar(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = self.reader = None
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def levantar_servidor(directorio, modo_async, entorno=None):
+    puerto = _puerto_libre()
+    env = dict(os.environ, PYTHONPATH=RAIZ, DB_ASYNC="1" if modo_async else "0", LOG_LEVEL="WARNING")
+    env.update(entorno or {})
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(puerto),
+         "--log-level", "critical", "--no-access-log"],
+        cwd=directorio, env=env,
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", puerto), timeout=1).close()
+            return proceso, puerto
+        except OSError:
+            time.sleep(0.1)
+    proceso.kill()
+    raise RuntimeError("El servidor no respondio")
+
+
+async def _cliente(puerto, fin, latencias, errores, rnd, escrituras):
+    http = ConexionHttp("127.0.0.1", puerto)
+
+    # cada cliente abre su propia sesion para registrar respuestas sin duplicados
+    try:
+        status, cuerpo = await http.request("POST", "/quiz-sessions/", {"usuario_nombre": "bench"})
+        sesion = json.loads(cuerpo)["id"] if status == 200 else None
+    except Exception:
+        sesion = None
+    if sesion is None:
+        errores.append("sesion")
+    preguntas = iter(rnd.sample(range(1, N_PREGUNTAS + 1), N_PREGUNTAS))
+
+    while time.perf_counter() < fin:
+        escribir = sesion is not None and rnd.random() < escrituras
+        lectura = rnd.randrange(3)
+        inicio = time.perf_counter()
+        try:
+            if escribir:
+                status, _ = await http.request("POST", "/answers/", {
+                    "quiz_session_id": sesion,
+                    "question_id": next(preguntas),
+                    "respuesta_seleccionada": rnd.randrange(4),
+                    "tiempo_respuesta_segundos": rnd.randint(1, 30),
+                })
+            elif lectura == 0:
+                status, _ = await http.request("GET", f"/quiz-sessions/{rnd.randint(1, N_SESIONES)}")
+            elif lectura == 1:
+                status, _ = await http.request("GET", f"/questions/{rnd.randint(1, N_PREGUNTAS)}")
+            else:
+                status, _ = await http.request("GET", f"/statistics/session/{rnd.randint(1, N_SESIONES)}")
+        except Exception as e:
+            errores.append(type(e).__name__)
+            continue
+        if status >= 400:
+            errores.append(status)
+        else:
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    await http.cerrar()
+
+
+async def cargar(puerto, clientes, segundos, escrituras):
+    latencias, errores = [], []
+    fin = time.perf_counter() + segundos
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _cliente(puerto, fin, latencias, errores, random.Random(i), escrituras)
+        for i in range(clientes)
+    ))
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "rps": len(latencias) / duracion,
+        "p50": statistics.median(latencias) if latencias else 0,
+        "p95": latencias[int(len(latencias) * 0.95) - 1] if latencias else 0,
+        "errores": len(errores),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clientes", default="50,100,250,500")
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--escrituras", type=float, default=0.2,
+                        help="Fraccion de requests que registran una respuesta (POST /answers/)")
+    args = parser.parse_args(argv)
+
+    print(f"{'modo':<6} {'clientes':>8} {'req/s ok':>8} {'p50 ms':>8} {'p95 ms':>8} {'errores':>8}")
+    for modo_async in (False, True):
+        for clientes in (int(x) for x in args.clientes.split(",")):
+            # servidor y base nuevos por corrida, para no arrastrar conexiones colgadas
+            directorio = tempfile.mkdtemp(prefix="quiz_bench_")
+            try:
+                engine = crear_engine(os.path.join(directorio, "quiz.db"))
+                sembrar(engine, n_preguntas=N_PREGUNTAS, n_sesiones=N_SESIONES, respuestas_por_sesion=10)
+                engine.dispose()
+
+                proceso, puerto = levantar_servidor(directorio, modo_async)
+                try:
+                    r = asyncio.run(cargar(puerto, clientes, args.segundos, args.escrituras))
+                finally:
+                    proceso.terminate()
+                    proceso.wait()
+            finally:
+                shutil.rmtree(directorio, ignore_errors=True)
+
+            print(f"{'async' if modo_async else 'sync':<6} {clientes:>8} {r['rps']:>8.0f} "
+                  f"{r['p50']:>8.1f} {r['p95']:>8.1f} {r['errores']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark de registro de respuestas: insert por request vs. escritura diferida por lotes.
+
+Uso:
+    python -m benchmarks.bench_ingesta [--clientes 50,200] [--segundos 10] [--synchronous NORMAL,FULL] [--async]
+
+Levanta ``uvicorn`` sobre una base temporal ya sembrada, con ``ANSWER_WRITE_BEHIND``
+apagado (una transaccion por respuesta) y encendido (una por lote), y lo carga con
+N clientes que solo registran respuestas (``POST /answers/``), cada uno en su propia
+sesion. Se informa respuestas/s, latencias p50/p95 y errores, para cada valor de
+``SQLITE_SYNCHRONOUS`` (con ``FULL`` cada commit espera un fsync).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from ._common import crear_engine, sembrar
+from .bench_concurrency import ConexionHttp, levantar_servidor
+
+N_PREGUNTAS = 5000
+N_SESIONES = 100
+
+
+async def _cliente(puerto, fin, latencias, errores, rnd):
+    http = ConexionHttp("127.0.0.1", puerto)
+    try:
+        status, cuerpo = await http.request("POST", "/quiz-sessions/", {"usuario_nombre": "bench"})
+        sesion = json.loads(cuerpo)["id"] if status == 200 else None
+    except Exception:
+        sesion = None
+    if sesion is None:
+        errores.append("sesion")
+        return
+    preguntas = iter(rnd.sample(range(1, N_PREGUNTAS + 1), N_PREGUNTAS))
+
+    while time.perf_counter() < fin:
+        qid = next(preguntas, None)
+        if qid is None:
+            break
+        inicio = time.perf_counter()
+        try:
+            status, _ = await http.request("POST", "/answers/", {
+                "quiz_session_id": sesion,
+                "question_id": qid,
+                "respuesta_seleccionada": rnd.randrange(4),
+                "tiempo_respuesta_segundos": rnd.randint(1, 30),
+            })
+        except Exception as e:
+            errores.append(type(e).__name__)
+            continue
+        if status >= 400:
+            errores.append(status)
+        else:
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    await http.cerrar()
+
+
+async def cargar(puerto, clientes, segundos):
+    latencias, errores = [], []
+    fin = time.perf_counter() + segundos
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _cliente(puerto, fin, latencias, errores, random.Random(i)) for i in range(clientes)
+    ))
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "rps": len(latencias) / duracion,
+        "p50": statistics.median(latencias) if latencias else 0,
+        "p95": latencias[int(len(latencias) * 0.95) - 1] if latencias else 0,
+        "errores": len(errores),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clientes", default="50,200")
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--synchronous", default="NORMAL,FULL",
+                        help="Valores de SQLITE_SYNCHRONOUS a medir, separados por coma")
+    parser.add_argument("--async", dest="modo_async", action="store_true",
+                        help="Levantar la app con DB_ASYNC=1")
+    args = parser.parse_args(argv)
+
+    print(f"{'synchronous':<11} {'modo':<8} {'clientes':>8} {'resp/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errores':>8}")
+    for synchronous in args.synchronous.split(","):
+        for clientes in (int(x) for x in args.clientes.split(",")):
+            for lotes in (False, True):
+                directorio = tempfile.mkdtemp(prefix="quiz_bench_")
+                try:
+                    engine = crear_engine(os.path.join(directorio, "quiz.db"))
+                    sembrar(engine, n_preguntas=N_PREGUNTAS, n_sesiones=N_SESIONES, respuestas_por_sesion=10)
+                    engine.dispose()
+
+                    proceso, puerto = levantar_servidor(directorio, args.modo_async, {
+                        "ANSWER_WRITE_BEHIND": "1" if lotes else "0",
+                        "SQLITE_SYNCHRONOUS": synchronous,
+                    })
+                    try:
+                        r = asyncio.run(cargar(puerto, clientes, args.segundos))
+                    finally:
+                        proceso.terminate()
+                        proceso.wait()
+                finally:
+                    shutil.rmtree(directorio, ignore_errors=True)
+
+                print(f"{synchronous:<11} {'lotes' if lotes else 'directo':<8} {clientes:>8} {r['rps']:>8.0f} "
+                      f"{r['p50']:>8.1f} {r['p95']:>8.1f} {r['errores']:>8}")
+
+
+if __name__ == "__main__":
+    main()
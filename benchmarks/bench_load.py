@@ -0,0 +1,306 @@
+"""Prueba de carga en proceso de los routers, con comparacion contra una linea base.
+
+Uso:
+    python -m benchmarks.bench_load [--tamanos 1k,100k,1m] [--operaciones 100] [--clientes 1]
+                                    [--baseline benchmarks/baseline_load.json] [--guardar-baseline]
+                                    [--tolerancia 0.25] [--margen-ms 2] [--tolerancia-sql 0] [--datos DIR]
+
+Para cada tamaño (cantidad de respuestas sembradas; 10 por sesion) se siembra una
+base SQLite temporal con datos deterministas y se levanta la app real en un proceso
+aparte (con ``DATABASE_URL`` apuntando a esa base), que se maneja con httpx sobre
+ASGI, sin red. Escenarios:
+
+* ``flujo``: crear sesion, responder 10 preguntas, completarla y pedir sus estadisticas.
+* cada endpoint de ``/statistics`` (las globales y por categoria tambien con ``fresh=true``).
+* listados: 500 preguntas, una busqueda de texto, una pagina de 500 sesiones y las respuestas de una sesion con
+  su pregunta embebida.
+* leaderboard (general y por categoria) y la posicion de una sesion en el ranking.
+* series de ``/statistics/timeseries``: todos los dias de la base y dos dias por hora.
+
+Cada escenario repite la misma secuencia (semilla fija) ``--operaciones`` veces y
+se informa p50/p95/p99 (ms por operacion), operaciones/s y sentencias SQL por
+operacion (las que emiten los requests, segun las metricas de la app). Con
+``--baseline`` se compara contra una corrida guardada y el proceso termina con
+codigo 1 si el p95 empeora mas que ``--tolerancia`` (y mas que ``--margen-ms``, para
+no marcar ruido en endpoints de pocos ms) o si aumentan las sentencias SQL.
+Las latencias dependen de la maquina: la linea base se regenera con ``--guardar-baseline``.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(RAIZ, "benchmarks", "baseline_load.json")
+
+RESPUESTAS_POR_SESION = 10
+TAMANOS = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+CALENTAMIENTO = 3
+
+
+def datos_para(respuestas: int) -> dict:
+    sesiones = max(1, respuestas // RESPUESTAS_POR_SESION)
+    return {
+        "n_preguntas": max(100, min(10_000, sesiones)),
+        "n_sesiones": sesiones,
+        "respuestas_por_sesion": RESPUESTAS_POR_SESION,
+    }
+
+
+def percentil(valores, p):
+    """Percentil por rango mas cercano sobre una lista ordenada."""
+    if not valores:
+        return 0.0
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+# ---------------------------------------------------------------------------
+# Proceso de medicion (importa la app con la base ya configurada)
+
+
+def _escenarios(n_preguntas, n_sesiones):
+    async def flujo(http, rnd):
+        r = await http.post("/quiz-sessions/", json={"usuario_nombre": "bench"})
+        sesion = r.json()["id"]
+        for qid in rnd.sample(range(1, n_preguntas + 1), RESPUESTAS_POR_SESION):
+            await http.post("/answers/", json={
+                "quiz_session_id": sesion,
+                "question_id": qid,
+                "respuesta_seleccionada": rnd.randrange(4),
+                "tiempo_respuesta_segundos": rnd.randint(1, 60),
+            })
+        await http.put(f"/quiz-sessions/{sesion}/complete")
+        return await http.get(f"/statistics/session/{sesion}")
+
+    def get(path):
+        async def escenario(http, rnd):
+            return await http.get(path.format(sesion=rnd.randint(1, n_sesiones)))
+        return escenario
+
+    return {
+        "flujo": flujo,
+        "stats_global": get("/statistics/global"),
+        "stats_global_fresh": get("/statistics/global?fresh=true"),
+        "stats_categorias": get("/statistics/categories"),
+        "stats_categorias_fresh": get("/statistics/categories?fresh=true"),
+        "stats_dificiles": get("/statistics/questions/difficult"),
+        "stats_sesion": get("/statistics/session/{sesion}"),
+        "lista_preguntas": get("/questions/?limit=500"),
+        "busqueda_preguntas": get("/questions/search?q=explicacion 99&limit=50"),
+        "pagina_sesiones": get("/quiz-sessions/page?limit=500"),
+        "respuestas_sesion": get("/answers/session/{sesion}?include=question"),
+        "leaderboard": get("/statistics/leaderboard?limit=100"),
+        "leaderboard_categoria": get("/statistics/leaderboard?limit=100&categoria=historia"),
+        "rank_sesion": get("/quiz-sessions/{sesion}/rank"),
+        "serie_diaria": get("/statistics/timeseries?periodo=dia&since=2024-01-01T00:00:00"),
+        "serie_horaria": get("/statistics/timeseries?periodo=hora&since=2024-01-01T00:00:00&until=2024-01-03T00:00:00"),
+    }
+
+
+def _sentencias_sql(metrics):
+    return sum(serie[1] for serie in metrics.request_db_statements._series.values())
+
+
+async def _medir(app, metrics, escenario, operaciones, clientes, seed):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        rnd = random.Random(seed)
+        for _ in range(CALENTAMIENTO):
+            r = await escenario(http, rnd)
+            r.raise_for_status()
+
+        latencias, errores = [], 0
+        pendientes = operaciones
+        sql_inicial = _sentencias_sql(metrics)
+
+        async def cliente(i):
+            nonlocal errores, pendientes
+            rnd_cliente = random.Random(seed * 1000 + i)
+            while pendientes > 0:
+                pendientes -= 1
+                inicio = time.perf_counter()
+                r = await escenario(http, rnd_cliente)
+                if r.status_code >= 400:
+                    errores += 1
+                latencias.append((time.perf_counter() - inicio) * 1000)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente(i) for i in range(clientes)))
+        duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "operaciones": len(latencias),
+        "p50": percentil(latencias, 50),
+        "p95": percentil(latencias, 95),
+        "p99": percentil(latencias, 99),
+        "ops_s": len(latencias) / duracion,
+        "sql_por_op": (_sentencias_sql(metrics) - sql_inicial) / len(latencias),
+        "errores": errores,
+    }
+
+
+def _worker(respuestas, operaciones, clientes):
+    from app import metrics
+    from app.main import app
+
+    datos = datos_para(respuestas)
+
+    async def correr():
+        # ASGITransport no envia los eventos de lifespan: se inicia y cierra la app a mano
+        resultado = {}
+        async with app.router.lifespan_context(app):
+            for i, (nombre, escenario) in enumerate(
+                _escenarios(datos["n_preguntas"], datos["n_sesiones"]).items()
+            ):
+                resultado[nombre] = await _medir(app, metrics, escenario, operaciones, clientes, seed=i + 1)
+        return resultado
+
+    print(json.dumps(asyncio.run(correr())))
+
+
+# ---------------------------------------------------------------------------
+# Proceso principal: siembra, lanza un proceso por tamaño y compara
+
+
+def _base_sembrada(tamano, directorio):
+    from ._common import crear_engine, sembrar
+
+    path = os.path.join(directorio, f"quiz_{tamano}.db")
+    if not os.path.exists(path):
+        inicio = time.perf_counter()
+        engine = crear_engine(path + ".tmp")
+        sembrar(engine, **datos_para(TAMANOS[tamano]))
+        engine.dispose()
+        os.replace(path + ".tmp", path)
+        print(f"  base {tamano} sembrada en {time.perf_counter() - inicio:.1f} s", file=sys.stderr)
+    return path
+
+
+def correr_tamano(tamano, directorio_datos, operaciones, clientes):
+    trabajo = tempfile.mkdtemp(prefix="quiz_load_")
+    try:
+        # cada corrida trabaja sobre una copia: el flujo escribe en la base
+        path = os.path.join(trabajo, "quiz.db")
+        shutil.copy(_base_sembrada(tamano, directorio_datos), path)
+        env = dict(
+            os.environ,
+            PYTHONPATH=RAIZ,
+            DATABASE_URL=f"sqlite:///{path}",
+            LOG_LEVEL="WARNING",
+            METRICS_ENABLED="true",
+            SLOW_REQUEST_MS="0",
+            # la linea base se midio con las estadisticas materializadas activadas
+            STATS_SNAPSHOT_INTERVAL=os.environ.get("STATS_SNAPSHOT_INTERVAL", "30"),
+        )
+        salida = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_load", "--worker", str(TAMANOS[tamano]),
+             "--operaciones", str(operaciones), "--clientes", str(clientes)],
+            cwd=trabajo, env=env, stdout=subprocess.PIPE, check=True,
+        ).stdout
+        return json.loads(salida.decode().strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(trabajo, ignore_errors=True)
+
+
+def comparar(resultados, baseline, tolerancia, margen_ms, tolerancia_sql):
+    regresiones = []
+    for tamano, escenarios in resultados.items():
+        for nombre, r in escenarios.items():
+            base = baseline.get(tamano, {}).get(nombre)
+            if base is None:
+                continue
+            if r["p95"] > base["p95"] * (1 + tolerancia) and r["p95"] - base["p95"] > margen_ms:
+                regresiones.append(
+                    f"{tamano}/{nombre}: p95 {r['p95']:.2f} ms > {base['p95']:.2f} ms "
+                    f"(+{(r['p95'] / base['p95'] - 1) * 100:.0f}%)"
+                )
+            if r["sql_por_op"] > base["sql_por_op"] * (1 + tolerancia_sql) + 1e-9:
+                regresiones.append(
+                    f"{tamano}/{nombre}: {r['sql_por_op']:.1f} sentencias SQL por operacion "
+                    f"> {base['sql_por_op']:.1f}"
+                )
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", default="1k,100k,1m",
+                        help=f"Respuestas sembradas: {', '.join(TAMANOS)}")
+    parser.add_argument("--operaciones", type=int, default=100, help="Operaciones por escenario")
+    parser.add_argument("--clientes", type=int, default=1, help="Clientes concurrentes")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--guardar-baseline", action="store_true",
+                        help="Guarda los resultados como nueva linea base en lugar de comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="Aumento del p95 admitido respecto de la linea base (0.25 = 25%%)")
+    parser.add_argument("--margen-ms", type=float, default=2,
+                        help="Aumento absoluto del p95 (ms) por debajo del cual no se considera regresion")
+    parser.add_argument("--tolerancia-sql", type=float, default=0,
+                        help="Aumento de sentencias SQL por operacion admitido")
+    parser.add_argument("--datos", help="Directorio donde conservar las bases sembradas entre corridas")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        _worker(args.worker, args.operaciones, args.clientes)
+        return 0
+
+    tamanos = [t.strip().lower() for t in args.tamanos.split(",")]
+    desconocidos = [t for t in tamanos if t not in TAMANOS]
+    if desconocidos:
+        parser.error(f"Tamaños desconocidos: {', '.join(desconocidos)}")
+
+    directorio_datos = args.datos or tempfile.mkdtemp(prefix="quiz_load_datos_")
+    os.makedirs(directorio_datos, exist_ok=True)
+    resultados = {}
+    try:
+        print(f"{'tamaño':<6} {'escenario':<24} {'ops':>5} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'ops/s':>8} {'sql/op':>7} {'errores':>7}")
+        for tamano in tamanos:
+            resultados[tamano] = correr_tamano(tamano, directorio_datos, args.operaciones, args.clientes)
+            for nombre, r in resultados[tamano].items():
+                print(f"{tamano:<6} {nombre:<24} {r['operaciones']:>5} {r['p50']:>8.2f} {r['p95']:>8.2f} "
+                      f"{r['p99']:>8.2f} {r['ops_s']:>8.1f} {r['sql_por_op']:>7.1f} {r['errores']:>7}")
+    finally:
+        if not args.datos:
+            shutil.rmtree(directorio_datos, ignore_errors=True)
+
+    if args.guardar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(resultados)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Linea base guardada en {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Sin linea base en {args.baseline}: no se compara")
+        return 0
+
+    with open(args.baseline) as f:
+        regresiones = comparar(
+            resultados, json.load(f), args.tolerancia, args.margen_ms, args.tolerancia_sql
+        )
+    for r in regresiones:
+        print(f"REGRESION {r}")
+    if not regresiones:
+        print("Sin regresiones respecto de la linea base")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,61 @@
+"""Benchmark de importacion masiva de preguntas (NDJSON) en bloques.
+
+Uso:
+    python -m benchmarks.bench_question_import [--filas 1000000] [--chunk-size 1000]
+
+Las lineas se generan de forma perezosa, de modo que el aumento del pico de
+memoria del proceso (RSS) corresponde al importador y no al archivo de entrada.
+"""
+import argparse
+import json
+import os
+import resource
+
+from app.schemas.import_export import Formato
+from app.services.question_import_service import QuestionImporter
+
+from ._common import CATEGORIAS, DIFICULTADES, crear_engine_temporal, cronometro, sesion_para
+
+
+def generar_lineas(n):
+    for i in range(n):
+        yield json.dumps({
+            "pregunta": f"Pregunta importada {i}",
+            "opciones": ["a", "b", "c", "d"],
+            "respuesta_correcta": i % 4,
+            "categoria": CATEGORIAS[i % len(CATEGORIAS)],
+            "dificultad": DIFICULTADES[i % len(DIFICULTADES)],
+            "explicacion": None if i % 2 else f"Explicacion {i}",
+        }) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    engine, path = crear_engine_temporal()
+    db = sesion_para(engine)
+    try:
+        rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with cronometro() as t:
+            resumen = QuestionImporter(db, chunk_size=args.chunk_size).importar_lineas(
+                generar_lineas(args.filas), Formato.ndjson
+            )
+        # ru_maxrss esta en KiB en Linux
+        aumento = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_inicial
+
+        segundos = t["ms"] / 1000
+        print(f"filas={args.filas} chunk_size={args.chunk_size}")
+        print(f"importadas={resumen.importadas} errores={resumen.con_error} chunks={resumen.chunks}")
+        print(f"tiempo={segundos:.1f} s  filas/s={resumen.importadas / segundos:,.0f}  "
+              f"aumento del pico de RSS={aumento / 1024:.1f} MiB")
+    finally:
+        db.close()
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
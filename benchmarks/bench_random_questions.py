@@ -0,0 +1,76 @@
+"""Benchmark de /questions/random: carga completa + random.sample vs. indice en memoria.
+
+Uso:
+    python -m benchmarks.bench_random_questions [--preguntas 100000] [--k 10] [--repeticiones 50]
+"""
+import argparse
+import os
+import random
+import statistics
+
+from app.models.question import Question
+from app.routers.questions import random_questions
+from app.services.question_index import question_index
+
+from ._common import ContadorSQL, crear_engine_temporal, cronometro, sembrar, sesion_para
+
+
+# Camino anterior: todas las preguntas activas como objetos ORM
+def random_questions_legacy(limit, db):
+    items = db.query(Question).filter(Question.is_active == True).all()
+    if not items:
+        return []
+    return random.sample(items, min(limit, len(items)))
+
+
+def medir(engine, fn, repeticiones):
+    tiempos, sentencias = [], 0
+    for _ in range(repeticiones):
+        db = sesion_para(engine)
+        try:
+            with ContadorSQL(engine) as contador, cronometro() as t:
+                fn(db)
+            tiempos.append(t["ms"])
+            sentencias = contador.total
+        finally:
+            db.close()
+    return statistics.median(tiempos), max(tiempos), sentencias
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preguntas", type=int, default=100_000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    engine, path = crear_engine_temporal()
+    try:
+        sembrar(engine, n_preguntas=args.preguntas, n_sesiones=0, respuestas_por_sesion=0)
+
+        db = sesion_para(engine)
+        with cronometro() as carga:
+            question_index.cargar(db)
+        db.close()
+
+        casos = [
+            ("legacy (all + sample)", lambda db: random_questions_legacy(args.k, db)),
+            ("indice", lambda db: random_questions(limit=args.k, db=db)),
+            ("indice categoria+dificultad",
+             lambda db: random_questions(limit=args.k, categoria="ciencia", dificultad="dificil", db=db)),
+        ]
+
+        print(f"preguntas={args.preguntas} k={args.k} carga inicial del indice={carga['ms']:.1f} ms")
+        print(f"{'camino':<30} {'p50 ms':>9} {'max ms':>9} {'sql':>5}")
+        repeticiones = {"legacy (all + sample)": max(1, args.repeticiones // 10)}
+        for nombre, fn in casos:
+            p50, peor, sql = medir(engine, fn, repeticiones.get(nombre, args.repeticiones))
+            print(f"{nombre:<30} {p50:>9.2f} {peor:>9.2f} {sql:>5}")
+    finally:
+        question_index.invalidar()
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
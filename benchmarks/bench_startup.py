@@ -0,0 +1,166 @@
+"""Benchmark de arranque en frio: import de la app (``python -X importtime``) y hasta servir requests.
+
+Uso:
+    python -m benchmarks.bench_startup [--repeticiones 5] [--top 15] [--workers 1,4] [--base PATH]
+                                       [--max-import-ms N] [--max-arranque-ms N]
+
+Cada repeticion es un proceso nuevo (como un pod recien creado):
+
+* ``import``: ``python -X importtime -c "import app.main"``. Se informa la mediana del
+  proceso completo y del import de ``app.main`` y, de la corrida mediana, el tiempo
+  propio de import por paquete (fastapi, sqlalchemy, app, ...) y los modulos mas
+  lentos. Importar la app no debe tocar la base: si la crea, es un error.
+* ``arranque``: ``uvicorn app.main:app --workers N`` sobre una copia de ``--base`` (por
+  defecto una base nueva), desde que se lanza hasta que todos los workers terminan
+  el lifespan (esquema y migraciones con el lock entre workers, precargas y pool) y
+  ``GET /`` responde.
+
+Con ``--max-import-ms``/``--max-arranque-ms`` el proceso termina con codigo 1 si la
+mediana supera el limite, para detectar regresiones del arranque en frio.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+from .bench_concurrency import _puerto_libre
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIMEOUT = 120
+
+
+def _entorno(directorio):
+    return dict(
+        os.environ,
+        PYTHONPATH=RAIZ,
+        DATABASE_URL=f"sqlite:///{os.path.join(directorio, 'quiz.db')}",
+        LOG_LEVEL="WARNING",
+    )
+
+
+def parsear_importtime(texto):
+    """(modulo, propio us, acumulado us) de cada linea de ``-X importtime``."""
+    modulos = []
+    for linea in texto.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        modulos.append((nombre.strip(), int(propio), int(acumulado)))
+    return modulos
+
+
+def medir_import():
+    directorio = tempfile.mkdtemp(prefix="quiz_startup_")
+    try:
+        inicio = time.perf_counter()
+        salida = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            cwd=directorio, env=_entorno(directorio), stderr=subprocess.PIPE, check=True,
+        )
+        proceso_ms = (time.perf_counter() - inicio) * 1000
+        toco_base = os.path.exists(os.path.join(directorio, "quiz.db"))
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    modulos = parsear_importtime(salida.stderr.decode())
+    app_ms = next((acumulado for nombre, _, acumulado in modulos if nombre == "app.main"), 0) / 1000
+    return {"proceso_ms": proceso_ms, "app_ms": app_ms, "modulos": modulos, "toco_base": toco_base}
+
+
+def medir_arranque(workers, base=None):
+    directorio = tempfile.mkdtemp(prefix="quiz_startup_")
+    try:
+        if base:
+            shutil.copy(base, os.path.join(directorio, "quiz.db"))
+        puerto = _puerto_libre()
+        inicio = time.perf_counter()
+        proceso = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(puerto),
+             "--workers", str(workers), "--log-level", "info", "--no-access-log"],
+            cwd=directorio, env=_entorno(directorio), stderr=subprocess.PIPE, text=True,
+        )
+        limite = threading.Timer(TIMEOUT, proceso.kill)
+        limite.start()
+        try:
+            # cada worker registra "Application startup complete." al terminar su lifespan
+            listos = 0
+            while listos < workers:
+                linea = proceso.stderr.readline()
+                if not linea:
+                    raise RuntimeError("El servidor termino antes de iniciar")
+                listos += "Application startup complete" in linea
+            # con un solo worker el socket se abre despues del lifespan
+            while True:
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{puerto}/", timeout=TIMEOUT) as r:
+                        r.read()
+                    return (time.perf_counter() - inicio) * 1000
+                except urllib.error.URLError:
+                    if proceso.poll() is not None:
+                        raise
+                    time.sleep(0.005)
+        finally:
+            limite.cancel()
+            proceso.terminate()
+            proceso.communicate()
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Modulos mas lentos a mostrar")
+    parser.add_argument("--workers", default="1,4", help="Cantidades de workers de uvicorn, separadas por coma")
+    parser.add_argument("--base", help="Base SQLite a copiar para el arranque (por defecto, una base nueva)")
+    parser.add_argument("--max-import-ms", type=float, help="Limite para la mediana del import de app.main")
+    parser.add_argument("--max-arranque-ms", type=float, help="Limite para la mediana del arranque")
+    args = parser.parse_args(argv)
+
+    fallas = []
+
+    corridas = sorted((medir_import() for _ in range(args.repeticiones)), key=lambda c: c["app_ms"])
+    mediana = corridas[len(corridas) // 2]
+    import_ms = statistics.median(c["app_ms"] for c in corridas)
+    print(f"import: proceso {statistics.median(c['proceso_ms'] for c in corridas):.0f} ms, "
+          f"app.main {import_ms:.0f} ms (mediana de {args.repeticiones})")
+
+    por_paquete = Counter()
+    for nombre, propio, _ in mediana["modulos"]:
+        por_paquete[nombre.split(".")[0]] += propio
+    print(f"\n{'paquete':<24} {'ms':>8}")
+    for paquete, propio in por_paquete.most_common(args.top):
+        print(f"{paquete:<24} {propio / 1000:>8.1f}")
+
+    print(f"\n{'modulo':<48} {'propio ms':>10} {'acum. ms':>10}")
+    for nombre, propio, acumulado in sorted(mediana["modulos"], key=lambda m: -m[1])[:args.top]:
+        print(f"{nombre:<48} {propio / 1000:>10.1f} {acumulado / 1000:>10.1f}")
+
+    if any(c["toco_base"] for c in corridas):
+        fallas.append("importar app.main creo la base")
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        fallas.append(f"import de app.main: {import_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+
+    print(f"\n{'workers':>7} {'p50 ms':>8} {'max ms':>8}")
+    for workers in (int(x) for x in args.workers.split(",")):
+        tiempos = [medir_arranque(workers, args.base) for _ in range(args.repeticiones)]
+        arranque_ms = statistics.median(tiempos)
+        print(f"{workers:>7} {arranque_ms:>8.0f} {max(tiempos):>8.0f}")
+        if args.max_arranque_ms is not None and arranque_ms > args.max_arranque_ms:
+            fallas.append(f"arranque con {workers} workers: {arranque_ms:.0f} ms > {args.max_arranque_ms:.0f} ms")
+
+    for falla in fallas:
+        print(f"FALLA {falla}")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""Benchmark de QuizService: consultas agregadas vs. el recorrido N+1 anterior.
+
+Uso:
+    python -m benchmarks.bench_statistics [--sizes 100,1000,5000] [--legacy-max 5000]
+
+Para cada tamaño (cantidad de preguntas; cada sesion responde 10 preguntas y hay
+tantas sesiones como preguntas) se mide cantidad de sentencias SQL y latencia de
+``estadisticas_globales``, ``preguntas_dificiles`` y ``estadisticas_por_categoria``,
+y se verifica que ambos caminos devuelvan exactamente el mismo resultado.
+"""
+import argparse
+import os
+
+from app.models.answer import Answer
+from app.models.question import Question
+from app.models.quiz_session import QuizSession
+from app.services.quiz_service import QuizService
+
+from ._common import ContadorSQL, crear_engine_temporal, cronometro, sembrar, sesion_para
+
+
+# Implementacion anterior (N+1), conservada solo como referencia de comparacion
+class LegacyStats:
+
+    @staticmethod
+    def estadisticas_globales(db):
+        total_preguntas = db.query(Question).filter(Question.is_active == True).count()
+        sesiones = db.query(QuizSession).filter(QuizSession.estado == "completado").all()
+        total_sesiones = len(sesiones)
+        if total_sesiones > 0:
+            promedio_aciertos = sum(s.preguntas_correctas for s in sesiones) / total_sesiones
+        else:
+            promedio_aciertos = 0
+        categoria_stats = {}
+        for p in db.query(Question).all():
+            respuestas = db.query(Answer).filter(Answer.question_id == p.id).all()
+            if len(respuestas) == 0:
+                continue
+            incorrectas = sum(1 for r in respuestas if not r.es_correcta)
+            categoria_stats.setdefault(p.categoria, []).append(incorrectas / len(respuestas))
+        return {
+            "total_preguntas_activas": total_preguntas,
+            "total_sesiones_completadas": total_sesiones,
+            "promedio_aciertos_general": promedio_aciertos,
+            "categorias_mas_dificiles": {
+                cat: sum(vals) / len(vals) for cat, vals in categoria_stats.items()
+            },
+        }
+
+    @staticmethod
+    def preguntas_dificiles(db):
+        resultado = []
+        for p in db.query(Question).all():
+            respuestas = db.query(Answer).filter(Answer.question_id == p.id).all()
+            if not respuestas:
+                continue
+            incorrectas = sum(1 for r in respuestas if not r.es_correcta)
+            resultado.append({
+                "pregunta": p.pregunta,
+                "veces_respondida": len(respuestas),
+                "incorrectas": incorrectas,
+                "tasa_de_error": incorrectas / len(respuestas),
+            })
+        resultado.sort(key=lambda x: x["tasa_de_error"], reverse=True)
+        return resultado
+
+    @staticmethod
+    def estadisticas_por_categoria(db):
+        categorias = {}
+        for q in db.query(Question).all():
+            data = categorias.setdefault(q.categoria, {"correctas": 0, "total": 0})
+            for r in db.query(Answer).filter(Answer.question_id == q.id).all():
+                data["total"] += 1
+                if r.es_correcta:
+                    data["correctas"] += 1
+        return {
+            cat: (d["correctas"] / d["total"] if d["total"] > 0 else None)
+            for cat, d in categorias.items()
+        }
+
+
+METODOS = ["estadisticas_globales", "preguntas_dificiles", "estadisticas_por_categoria"]
+
+
+def medir(engine, impl, metodo):
+    db = sesion_para(engine)
+    try:
+        with ContadorSQL(engine) as contador, cronometro() as t:
+            resultado = getattr(impl, metodo)(db)
+        return resultado, contador.total, t["ms"]
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--legacy-max", type=int, default=5000,
+                        help="No ejecutar la version N+1 por encima de este tamaño")
+    args = parser.parse_args(argv)
+
+    print(f"{'preguntas':>9} {'respuestas':>10} {'metodo':<28} {'sql nuevo':>9} {'ms nuevo':>9} "
+          f"{'sql viejo':>9} {'ms viejo':>9}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        engine, path = crear_engine_temporal()
+        try:
+            sembrar(engine, n_preguntas=n, n_sesiones=n, respuestas_por_sesion=10)
+            for metodo in METODOS:
+                nuevo, sql_nuevo, ms_nuevo = medir(engine, QuizService, metodo)
+                if n <= args.legacy_max:
+                    viejo, sql_viejo, ms_viejo = medir(engine, LegacyStats, metodo)
+                    if viejo != nuevo:
+                        raise SystemExit(f"Resultados distintos en {metodo} (n={n})")
+                    viejo_txt = f"{sql_viejo:>9} {ms_viejo:>9.1f}"
+                else:
+                    viejo_txt = f"{'-':>9} {'-':>9}"
+                print(f"{n:>9} {n * 10:>10} {metodo:<28} {sql_nuevo:>9} {ms_nuevo:>9.1f} {viejo_txt}")
+        finally:
+            engine.dispose()
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""Configuracion comun de los tests: la app usa una base SQLite temporal."""
+import os
+import shutil
+import tempfile
+
+# antes de importar la app: app.database crea el engine con DATABASE_URL al importarse
+_DIRECTORIO = tempfile.mkdtemp(prefix="quiz_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DIRECTORIO, 'quiz.db')}"
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_DIRECTORIO, ignore_errors=True)
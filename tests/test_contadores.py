@@ -0,0 +1,96 @@
+"""Los contadores mantenidos en vivo coinciden con un recalculo desde ``answers``.
+
+Las respuestas actualizan en la misma transaccion los contadores por pregunta y por
+categoria, el progreso de cada sesion y los agregados por hora/dia. Despues de cada
+paso del flujo (responder, modificar, completar, borrar una sesion y cambiar la
+categoria de una pregunta) los ``verificar`` de cada servicio no deben encontrar
+diferencias. Se ejecuta con el endpoint sincronico y con la escritura diferida
+(``answer_writer``, el camino de ``ANSWER_WRITE_BEHIND=1``).
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.schemas.answer import AnswerCreate
+from app.services.answer_writer import answer_writer
+from app.services.rollup_service import RollupService
+from app.services.session_counter_service import SessionCounterService
+from app.services.stats_counter_service import StatsCounterService
+
+PREGUNTAS = [
+    ("historia", "facil"),
+    ("historia", "dificil"),
+    ("math", "medio"),
+    ("ciencia", "facil"),
+]
+
+
+@pytest.fixture(scope="module")
+def cliente():
+    with TestClient(app) as c:
+        yield c
+    answer_writer.detener()
+
+
+def _registrar_sincronico(cliente, datos):
+    r = cliente.post("/answers/", json=datos)
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+def _registrar_diferido(cliente, datos):
+    return answer_writer.enviar(AnswerCreate(**datos)).result(timeout=10).id
+
+
+@pytest.fixture(params=[_registrar_sincronico, _registrar_diferido], ids=["sincronico", "diferido"])
+def registrar(request, cliente):
+    return lambda datos: request.param(cliente, datos)
+
+
+def _sin_diferencias():
+    with SessionLocal() as db:
+        assert SessionCounterService.verificar(db) == []
+        assert StatsCounterService.verificar(db) == {"preguntas": [], "categorias": []}
+        assert RollupService.verificar(db) == {"intervalos": [], "bins": []}
+
+
+def test_contadores_coinciden_con_las_respuestas(cliente, registrar):
+    preguntas = []
+    for i, (categoria, dificultad) in enumerate(PREGUNTAS):
+        r = cliente.post("/questions/", json={
+            "pregunta": f"Pregunta {i}", "opciones": ["a", "b", "c"], "respuesta_correcta": i % 3,
+            "categoria": categoria, "dificultad": dificultad,
+        })
+        assert r.status_code == 200, r.text
+        preguntas.append(r.json()["id"])
+    sesiones = [cliente.post("/quiz-sessions/", json={"usuario_nombre": n}).json()["id"] for n in ("a", "b")]
+
+    # respuestas correctas e incorrectas en las dos sesiones
+    respuestas = {}
+    for s, sesion in enumerate(sesiones):
+        for i, pregunta in enumerate(preguntas):
+            respuestas[sesion, pregunta] = registrar({
+                "quiz_session_id": sesion, "question_id": pregunta,
+                "respuesta_seleccionada": (i + s) % 3, "tiempo_respuesta_segundos": 5 + i,
+            })
+    _sin_diferencias()
+
+    # una respuesta pasa de incorrecta a correcta y cambia su tiempo
+    r = cliente.put(f"/answers/{respuestas[sesiones[1], preguntas[0]]}", json={
+        "quiz_session_id": sesiones[1], "question_id": preguntas[0],
+        "respuesta_seleccionada": 0, "tiempo_respuesta_segundos": 30,
+    })
+    assert r.status_code == 200 and r.json()["es_correcta"], r.text
+    _sin_diferencias()
+
+    for sesion in sesiones:
+        assert cliente.put(f"/quiz-sessions/{sesion}/complete").status_code == 200
+    _sin_diferencias()
+
+    assert cliente.delete(f"/quiz-sessions/{sesiones[0]}").status_code == 200
+    _sin_diferencias()
+
+    r = cliente.put(f"/questions/{preguntas[0]}", json={"categoria": "general"})
+    assert r.status_code == 200, r.text
+    _sin_diferencias()
@@ -0,0 +1,34 @@
+"""Las consultas frecuentes (``PLANES``) usan su indice en una base migrada.
+
+Se ejecuta con ``python -m pytest``. Si un cambio de esquema o de una consulta hace
+que SQLite deje de usar el indice esperado, el test falla en lugar de volverse un
+recorrido completo de la tabla en produccion.
+"""
+import re
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.services.migration_service import PLANES, MigrationService
+
+# "SCAN tabla [USING ... INDEX]" recorre la tabla o un indice entero (salvo en FTS5,
+# donde SCAN es la busqueda en el indice de texto completo)
+RECORRIDO_COMPLETO = re.compile(r"^SCAN (?!.*VIRTUAL TABLE)")
+
+
+@pytest.fixture(scope="module")
+def planes(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('planes') / 'quiz.db'}")
+    try:
+        MigrationService.migrar(engine)
+        yield {r["consulta"]: r for r in MigrationService.verificar_planes(engine)}
+    finally:
+        engine.dispose()
+
+
+@pytest.mark.parametrize("consulta", [descripcion for descripcion, _, _ in PLANES])
+def test_consulta_usa_su_indice(planes, consulta):
+    resultado = planes[consulta]
+    assert resultado["ok"], f"no usa {resultado['indice']}: {resultado['plan']}"
+    recorridos = [paso for paso in resultado["plan"] if RECORRIDO_COMPLETO.match(paso)]
+    assert not recorridos, f"recorre la tabla o el indice entero: {resultado['plan']}"